@@ -50,6 +50,8 @@ def detect_IIA_specific(league, year, start_index, end_index, removal_amount):
     # Select players within the specified index range
     target_players = list(official_borda_results.iloc[start_index-1:end_index]['Player'])
     players_outside_range = list(official_borda_results.loc[~official_borda_results['Player'].isin(target_players), 'Player'])
+    # Official rank of every player, looked up once per player instead of filtering the table in the loop
+    official_rank = dict(zip(official_borda_results['Player'], official_borda_results['Rank']))
 
     output_data = []
 
@@ -60,7 +62,7 @@ def detect_IIA_specific(league, year, start_index, end_index, removal_amount):
             new_borda_results = remove_and_recalculate(league, year, list(player_combo))
             
             # Adjust the target range based on the removed players’ positions
-            removed_player_ranks = [official_borda_results[official_borda_results['Player'] == player]['Rank'].iloc[0] for player in player_combo]
+            removed_player_ranks = [official_rank[player] for player in player_combo]
             adjust_start_index = start_index - sum(1 for rank in removed_player_ranks if rank < start_index)
             adjust_end_index = end_index - sum(1 for rank in removed_player_ranks if rank < end_index)
             
@@ -68,19 +70,12 @@ def detect_IIA_specific(league, year, start_index, end_index, removal_amount):
             
             # Check if new ranking of target players has changed
             if new_target_players != target_players:
-                new_borda_results['Rank'] = range(1, len(new_borda_results) + 1)
-
-                # Calculate the new ranks of target players after removal
-                new_ranks_of_target_players = [
-                    new_borda_results[new_borda_results['Player'] == p]['Rank'].iloc[0]
-                    for p in new_target_players
-                ]
+                # The new target players are the rows adjust_start_index..adjust_end_index of the new results,
+                # so their new ranks follow from their position in that slice
+                new_ranks_of_target_players = list(range(adjust_start_index, adjust_start_index + len(new_target_players)))
 
                 # Calculate the original ranks of the newly ranked players in the new target list
-                original_ranks_of_new_players = [
-                    official_borda_results[official_borda_results['Player'] == p]['Rank'].iloc[0]
-                    for p in new_target_players
-                ]
+                original_ranks_of_new_players = [official_rank[p] for p in new_target_players]
 
                 output_data.append({
                     "Year": year,
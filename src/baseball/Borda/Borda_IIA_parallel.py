@@ -1,91 +1,61 @@
 import pandas as pd
-from itertools import combinations
+import sys
 # Run multiple tasks in parallel
 from concurrent.futures import ProcessPoolExecutor
-from collections import defaultdict
+from multiprocessing import Manager
 import time
 
+sys.path.append('./src/common')
+from ballot_store import load_mvp_election, load_all_mvp, mvp_ballot_path
+from ballot_arena import BallotArena, attach_arena
+from iia_engine import RemovalTables, RemovalIndex, REMOVAL_TABLES_VERSION, REMOVAL_INDEX_VERSION, detect_iia, iter_iia
+from precompute_cache import cached
+from result_sink import ExternalSortCSV, send_records, receive_records
+from combination_chunks import plan_chunks
+
 
 rank_points = [14, 9, 8, 7, 6, 5, 4, 3, 2, 1]
 
-# Precompute rank points difference for efficiency
-# rank_diff = {i: rank_points[i] - rank_points[i + 1] for i in range(len(rank_points) - 1)}
+# Removal tables already loaded by this process, keyed on (year, league); a pool worker runs many chunks
+_removal_tables = {}
 
-def remove_and_recalculate(league, year, names_to_remove, ballots=None, borda_results=None):
+def load_removal_tables(league, year):
     """
-    Avoid Repeated I/O Operations because reading the CSV file each time is costly. 
-    Our approach is to load the file once and pass it as a parameter.
+    Load the ballots of one election once and precompute the per-candidate position tables
+    the recount needs, for the 14-9-8-...-1 weights. Only the derived arrays are kept in the persistent
+    cache, keyed on the contents of the ballot CSV (see src/common/precompute_cache.py); the tables are
+    rebuilt around the loaded Election (a view into the shared arena in pool workers) once per process.
     """
-    if ballots is None:
-        ballot_path = f'./data/baseball/processed_data/mvp_ballots_by_year/{year}_{league}_votes.csv'
-        # Restrict the columns read in to be 1st, 2nd, 3rd, 4th, 5th, 6th, 7th, 8th, 9th, 10th
-        ballots = pd.read_csv(ballot_path, usecols=['1st', '2nd', '3rd', '4th', '5th', '6th', '7th', '8th', '9th', '10th'])
-    
-    if borda_results is None:
-        borda_path = f'./src/baseball/Borda/results/borda_14-9-8--1/{year}_{league}_14-9-8--1.csv'
-        borda_results = pd.read_csv(borda_path)
+    if (year, league) not in _removal_tables:
+        election = load_mvp_election(year, league)
+        arrays = cached('mvp_removal_tables', REMOVAL_TABLES_VERSION, [mvp_ballot_path(year, league)],
+                        (year, league, rank_points), lambda: RemovalTables(election, rank_points).derived_arrays())
+        _removal_tables[(year, league)] = RemovalTables.from_derived(election, arrays)
+    return _removal_tables[(year, league)]
 
-    """
-    When "Player" is the index, Pandas can directly access rows with loc[player_name] 
-    using a highly optimized hash lookup. This makes retrieving and updating specific rows faster
-    """ 
-    borda_results.set_index('Player', inplace=True)
 
+def remove_and_recalculate(league, year, names_to_remove, tables=None):
     """
-    DataFrame operations are slow in large data sets, so minimizing row-level operations will help. 
-    Therefore, when recalculating points for each player_name, storing the changes in a dictionary 
-    and updating the DataFrame in bulk at the end to improve speed.
+    Avoid Repeated I/O Operations and ballot scans: the RemovalTables of an election are built once
+    and passed as a parameter, then every removal is a closed-form update of the score vector
+    (see src/common/iia_engine.py), which also handles the non-consecutive 14-9-8 weights.
+
+    Returns the recalculated Borda results as a DataFrame ['Player', 'Borda Points'], sorted.
     """
-    # Dictionary to store point adjustments, switching to collections.defaultdict(int) eliminates the need for get calls. 
-    points_adjustments = defaultdict(int)
-
-    try:
-        """
-        elder version:
-        # Iterate through names to remove and ballots to adjust points
-        for name in names_to_remove:
-            for _, row in ballots.iterrows():
-                if name in row.values:
-                    player_idx = list(row.values).index(name)
-                    # Add corresponding points for players ranked after the target, max col idx is 10
-                    for i in range(player_idx + 1, 10):  
-                        player_name = row.iloc[i]
-                        points_to_add = rank_diff.get(i - 1, 0)
-                        points_adjustments[player_name] = points_adjustments.get(player_name, 0) + points_to_add
-        """
-        
-        """
-        new version:
-        We want to prevent cases like in a single row of the ballot, both 1st and 2nd are removed,
-        but the the 5 points addition by removing the 1st player is added to 2nd, instead of 3rd
-        """
-        for _, row in ballots.iterrows():
-            # Create an set to store the index of players we need to remove, allow search in O(1) time
-            removed_player_idxs = {i for i, player in enumerate(row) if player in names_to_remove}
-
-            # Iterate the each player in the row to add points based on their new index, skip the removed players 
-            idx = 0 
-            # idx is the new ranking and i is the original ranking
-            for i in range(0, 10): 
-                if i not in removed_player_idxs:
-                    player_name = row.iloc[i]
-                    points_adjustments[player_name] += rank_points[idx] - rank_points[i]   # new - original
-                    idx += 1
-    except KeyError as e:
-        print(f"Key error during adjustment: {e}")
-    except Exception as e:
-        print(f"Unexpected error in remove_and_recalculate: {e}")
-        
-    # Apply the adjustments in bulk
-    for player_name, points in points_adjustments.items():
-        if player_name.strip() in borda_results.index:
-            borda_results.loc[player_name.strip(), 'Borda Points'] += points
+    if tables is None:
+        tables = load_removal_tables(league, year)
 
-    # Remove players from the Borda results
-    borda_results.drop(names_to_remove, inplace=True, errors='ignore')
-    
-    # Sort the dataframe and revert Player from index to colunm title
-    borda_results = borda_results.reset_index().sort_values(by='Borda Points', ascending=False)
+    election = tables.election
+    removed_ids = election.ids(names_to_remove)
+
+    # Players ranked below a removed player move up on that ballot and earn that position's points
+    new_scores = tables.scores_after_removal(removed_ids)
+    new_order = tables.ranking_after_removal(removed_ids, new_scores)
+
+    borda_results = pd.DataFrame({
+        'Player': election.decode(new_order),
+        'Borda Points': tables.points(new_scores[new_order])
+    })
 
     return borda_results
 
@@ -96,99 +66,118 @@ def remove_and_recalculate(league, year, names_to_remove, ballots=None, borda_re
 # df = remove_and_recalculate("NL", 2017, ["Arenado", "Blackmon"])
 # print(df)
 
-# borda_path = f'./src/baseball/Borda/results/borda_14-9-8--1/2012_AL_14-9-8--1.csv'
-# official_borda_results = pd.read_csv(borda_path)
-# ballot_path = f'./data/baseball/processed_data/mvp_ballots_by_year/2012_AL_votes.csv'
-# ballots = pd.read_csv(ballot_path)
-# official_borda_results_copy = official_borda_results.copy(deep=True)
-# df = remove_and_recalculate("AL", 2012, ["Cabrera", "Trout", "Verlander"], ballots, official_borda_results_copy)
+# tables = load_removal_tables("AL", 2012)
+# df = remove_and_recalculate("AL", 2012, ["Cabrera", "Trout", "Verlander"], tables)
 # print(df)
 
 
 
-def detect_IIA_specific(league, year, target_ranks, removal_amount, max_removed_ranking):
-    borda_path = f'./src/baseball/Borda/results/borda_14-9-8--1/{year}_{league}_14-9-8--1.csv'
-
-    official_borda_results = pd.read_csv(borda_path)
-    # Assign ranks to the players based on their position in the DataFrame
-    official_borda_results['Rank'] = range(1, len(official_borda_results) + 1)
-
-    ballot_path = f'./data/baseball/processed_data/mvp_ballots_by_year/{year}_{league}_votes.csv'
-    # Restrict the columns to read in are 1st,2nd,3rd,4th,5th,6th,7th,8th,9th,10th
-    ballots = pd.read_csv(ballot_path, usecols=['1st', '2nd', '3rd', '4th', '5th', '6th', '7th', '8th', '9th', '10th'])
+def detect_IIA_records(league, year, target_ranks, removal_amount, max_removed_ranking, prune=True, gray=False):
+    """
+    Same search as detect_IIA_specific, returned as a list of row dicts, which is all a pool
+    worker needs to send back to the parent.
+    """
+    # Precompute the removal tables once for this election, the official ranking comes with them
+    tables = load_removal_tables(league, year)
 
-    # Extract the target players based on the specified index range, df starts at index 0
-    target_players = list(official_borda_results.iloc[[rank - 1 for rank in target_ranks]]['Player'])
     # Identify players who are not within the target range and filter players based on the max_removed_ranking
-    players_outside_range = list(
-        official_borda_results[
-            (official_borda_results['Rank'] < max_removed_ranking) &
-            (~official_borda_results['Player'].isin(target_players))
-        ]['Player']
-    )
+    players_outside_range = [
+        player_id for player_id in tables.official_order
+        if tables.official_rank[player_id] < max_removed_ranking and tables.official_rank[player_id] not in target_ranks
+    ]
     
-    # List to store the output data
-    output_data = []
-
-    # Iterate over combinations of players to be removed from the outside range
-    for player_combo in combinations(players_outside_range, removal_amount):
-        try:
-            # Remove the selected players and recalculate the Borda results
-            new_borda_results = remove_and_recalculate(league, year, list(player_combo), ballots, official_borda_results.copy())
-            # Get the ranks of the removed players from the official results
-            removed_player_ranks = [official_borda_results[official_borda_results['Player'] == player]['Rank'].iloc[0] for player in player_combo]
-            
-            # Dictionary to store adjustments for each rank, original rank -> new rank
-            adjustments = {rank: 0 for rank in target_ranks}
-
-            # Calculate the adjustments for each target rank based on removed players
-            for rank in target_ranks:
-                adjustments[rank] = rank - sum(1 for r in removed_player_ranks if r < rank)
-
-            # Identify the new target players based on the adjusted indices
-            new_target_players = []
-            for rank in target_ranks:
-                new_target_player = new_borda_results.iloc[adjustments[rank] - 1]['Player']
-                new_target_players.append(new_target_player)
-            
-            # Check if the new target players differ from the original target players
-            if new_target_players != target_players:
-                new_borda_results['Rank'] = range(1, len(new_borda_results) + 1)
-                
-                """
-                # Retrieve the new ranks of the target players in the recalculated results
-                new_ranks_of_target_players = [new_borda_results[new_borda_results['Player'] == p]['Rank'].iloc[0] for p in target_players]
-                reverse_adjustments = {v: k for k, v in adjustments.items()}
-                new_ranks_of_target_players_adjusted = [reverse_adjustments.get(rank, rank) for rank in new_ranks_of_target_players]
-                """
-
-                # Retrieve the original ranks of the new target players from the official results
-                original_ranks_of_new_players = [official_borda_results[official_borda_results['Player'] == p]['Rank'].iloc[0] for p in new_target_players]
-                
-                # Append the results to the output data
-                output_data.append({
-                    "Year": year,
-                    "League": league,
-                    "Removed-Players": player_combo,
-                    "RP-Ranking": tuple(removed_player_ranks),
-                    "Original-Players": tuple(target_players),
-                    "Original-Rankings": tuple(target_ranks),
-                    # "New-Ranking": tuple(new_ranks_of_target_players_adjusted),
-                    "New-Players": tuple(new_target_players),
-                    "New-Rankings": tuple(original_ranks_of_new_players)
-                })
-        except KeyError as e:
-            print(f"Key error in detect_IIA_specific: {e}")
-        except Exception as e:
-            print(f"Unexpected error in detect_IIA_specific: {e} {year} {league} {player_combo}")
-
-     # Convert the output data list into a DataFrame
-    output_df = pd.DataFrame(output_data)
+    # Iterate over combinations of players to be removed from the outside range, keep the ones that change the targets
+    # prune: skip groups of combinations whose score bounds show they cannot reorder the targets (branch and bound)
+    # gray (without prune): walk the combinations swapping one player at a time, updating the scores incrementally
+    violations = detect_iia(tables, target_ranks, players_outside_range, removal_amount, prune=prune, gray=gray)
+    return IIA_records(league, year, tables, target_ranks, violations)
+
+
+def IIA_records(league, year, tables, target_ranks, violations):
+    """Turn the (removed_ids, new_target_ids) violations of detect_iia into output rows."""
+    return list(iter_IIA_records(league, year, tables, target_ranks, violations))
+
+
+def iter_IIA_records(league, year, tables, target_ranks, violations):
+    """IIA_records as a generator, one output row per violation as the violations come in."""
+    election = tables.election
+    target_players = tables.official.names_at(target_ranks)
+
+    for removed_ids, new_target_ids in violations:
+        # Get the ranks of the removed players and of the new target players from the official results
+        removed_player_ranks = [int(tables.official_rank[player_id]) for player_id in removed_ids]
+        original_ranks_of_new_players = [int(tables.official_rank[player_id]) for player_id in new_target_ids]
+
+        yield {
+            "Year": year,
+            "League": league,
+            "Removed-Players": tuple(election.decode(removed_ids)),
+            "RP-Ranking": tuple(removed_player_ranks),
+            "Original-Players": tuple(target_players),
+            "Original-Rankings": tuple(target_ranks),
+            "New-Players": tuple(election.decode(new_target_ids)),
+            "New-Rankings": tuple(original_ranks_of_new_players)
+        }
+
+
+def stream_IIA_records(result_queue, task, league, year, target_ranks, removal_amount, max_removed_ranking, prune=True,
+                       index_range=None, gray=False):
+    """
+    Worker task of detect_IIA_all: the same search as detect_IIA_records, with the rows sent to the
+    parent's sink in batches while the search is running instead of returned at the end.
+    With index_range = (start, stop), only these removal combinations are checked (one chunk of the
+    election, see src/common/combination_chunks.py).
+    """
+    tables = load_removal_tables(league, year)
+    players_outside_range = [
+        player_id for player_id in tables.official_order
+        if tables.official_rank[player_id] < max_removed_ranking and tables.official_rank[player_id] not in target_ranks
+    ]
+    violations = iter_iia(tables, target_ranks, players_outside_range, removal_amount, prune=prune,
+                          index_range=index_range, gray=gray)
+    return send_records(result_queue, task, iter_IIA_records(league, year, tables, target_ranks, violations))
+
+
+def removal_pool_size(election, target_ranks, max_removed_ranking):
+    """Number of players stream_IIA_records may remove from one election, known before any scoring."""
+    ranks = range(1, min(election.n_candidates + 1, max_removed_ranking))
+    return sum(1 for rank in ranks if rank not in target_ranks)
+
+
+def load_removal_index(league, year, removal_amount, max_removed_ranking):
+    """
+    New rankings of every removal of removal_amount players ranked above max_removed_ranking,
+    computed once per election and kept in the persistent cache. Every target window is a query on it.
+    """
+    tables = load_removal_tables(league, year)
+    removable = [player_id for player_id in tables.official_order if tables.official_rank[player_id] < max_removed_ranking]
+    arrays = cached('mvp_removal_index', REMOVAL_INDEX_VERSION, [mvp_ballot_path(year, league)],
+                    (year, league, rank_points, removal_amount, max_removed_ranking),
+                    lambda: RemovalIndex(tables, removable, removal_amount).derived_arrays())
+    return RemovalIndex.from_derived(tables, arrays)
+
+
+def detect_IIA_window_records(league, year, target_windows, removal_amount, max_removed_ranking):
+    """
+    detect_IIA_records for several target_ranks lists at once, all answered from one removal index.
+
+    Returns:
+        list: one list of output rows per entry of target_windows
+    """
+    index = load_removal_index(league, year, removal_amount, max_removed_ranking)
+    return [IIA_records(league, year, index.tables, target_ranks, index.query(target_ranks))
+            for target_ranks in target_windows]
+
+
+def detect_IIA_specific(league, year, target_ranks, removal_amount, max_removed_ranking, prune=True, gray=False):
+    # Convert the output data list into a DataFrame
+    output_df = pd.DataFrame(detect_IIA_records(league, year, target_ranks, removal_amount, max_removed_ranking, prune,
+                                                gray))
     return output_df
 
 
 
-def detect_IIA_all(target_ranks, removal_amount, max_removed_ranking, sort_key):
+def detect_IIA_all(target_ranks, removal_amount, max_removed_ranking, sort_key, prune=True, gray=False):
     """
     Detects IIA violations across all years and leagues, with specified player ranges and removal amounts.
     
@@ -197,30 +186,53 @@ def detect_IIA_all(target_ranks, removal_amount, max_removed_ranking, sort_key):
         removal_amount (int): Number of irrelevant alternatives to remove during the analysis.
         max_removed_ranking: the strict upper bound for the ranking of removed players
         sort_key: the column we want to sort the final dataframe by
+        prune: skip removal combinations that provably cannot reorder the targets (branch and bound),
+            which makes removal amounts of 4-6 with max_removed_ranking up to 26 practical
+        gray: when prune is off, enumerate the combinations in revolving-door order with incremental
+            score updates (see iia_engine.iter_iia_gray); the same rows are found, rows with equal
+            sort keys may come out in a different order
     """
 
-    all_data = []
-
-    # Use a process pool to parallelize the workload for different year and league combinations
-    with ProcessPoolExecutor() as executor:
-        futures = [
-            executor.submit(detect_IIA_specific, league, year, target_ranks, removal_amount, max_removed_ranking)
-            for year in range(2012, 2024)   # 2012-2023
-            for league in ["AL", "NL"]
-        ]
-        # Collect results from each future
-        for future in futures:
-            try:
-                # Get the result DataFrame from the future
-                result_df = future.result()
-                if not result_df.empty:
-                    all_data.append(result_df)
-            except Exception as e:
-                print(f"Error processing a year/league combo: {e}")
-
+    output_path = f"./src/baseball/Borda/IIA_results/borda_IIA_range_{target_ranks}_remove_{removal_amount}_maxRemoved_{max_removed_ranking}.csv"
+
+    # Load the ballots once in the parent and share them with the workers (with their position tables),
+    # so no worker re-reads a file. Workers stream their rows through a queue into a sorted CSV sink,
+    # which spills sorted runs to disk, so memory stays flat however many violations there are
+    # Every election is cut into chunks of about the same number of removal combinations, so a large
+    # election is not left running on one worker while the others are idle
+    ballots = load_all_mvp()
+    elections = [(year, league) for year in range(2012, 2024) for league in ["AL", "NL"]]   # 2012-2023
+    pool_sizes = [removal_pool_size(ballots[key], target_ranks, max_removed_ranking) if key in ballots else 0
+                  for key in elections]
+    with BallotArena('mvp', ballots) as arena, Manager() as manager, \
+            ExternalSortCSV(output_path, sort_key) as sink:
+        result_queue = manager.Queue(maxsize=64)
+        # Use a process pool to parallelize the workload for different year and league combinations
+        with ProcessPoolExecutor(initializer=attach_arena, initargs=(arena.spec,)) as executor:
+            # Largest elections first; the task numbers follow the election order, so the output order is unchanged
+            futures = [
+                executor.submit(stream_IIA_records, result_queue, task, elections[i][1], elections[i][0], target_ranks,
+                                removal_amount, max_removed_ranking, prune, (start, stop), gray)
+                for task, i, start, stop in plan_chunks(pool_sizes, removal_amount)
+            ]
+            receive_records(result_queue, sink, futures)
+            # Report the failed year/league combos
+            for future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"Error processing a year/league combo: {e}")
+
+        if sink.close():
+            print("Data saved.")
+        else:
+            print("No data to save.")
+
+
+def save_IIA_results(all_data, target_ranks, removal_amount, max_removed_ranking, sort_key):
     if all_data:
-        # Combine all DataFrames into one
-        final_df = pd.concat(all_data, ignore_index=True)
+        # Combine all rows into one DataFrame
+        final_df = pd.DataFrame(all_data)
         # Sort the dataframe by sort_key
         final_df.sort_values(by=sort_key, ascending=False, inplace=True)
         final_df.to_csv(f"./src/baseball/Borda/IIA_results/borda_IIA_range_{target_ranks}_remove_{removal_amount}_maxRemoved_{max_removed_ranking}.csv", index=False)
@@ -231,6 +243,38 @@ def detect_IIA_all(target_ranks, removal_amount, max_removed_ranking, sort_key):
 
 
 
+def detect_IIA_sweep(target_windows, removal_amount, max_removed_ranking, sort_key):
+    """
+    detect_IIA_all for several target_ranks lists (e.g. [1..3], [1..4], ..., [1..15]) with the same
+    removal_amount and max_removed_ranking. The new ranking of every removal is computed once per
+    election (load_removal_index) and each window is a filter on it, instead of one full run per window.
+    Writes the same CSV per window as detect_IIA_all.
+
+    Args:
+        target_windows (list): list of target_ranks lists
+        removal_amount, max_removed_ranking, sort_key: see detect_IIA_all
+    """
+    window_data = [[] for _ in target_windows]
+
+    with BallotArena('mvp', load_all_mvp()) as arena:
+        with ProcessPoolExecutor(initializer=attach_arena, initargs=(arena.spec,)) as executor:
+            futures = [
+                executor.submit(detect_IIA_window_records, league, year, target_windows, removal_amount, max_removed_ranking)
+                for year in range(2012, 2024)   # 2012-2023
+                for league in ["AL", "NL"]
+            ]
+            for future in futures:
+                try:
+                    for data, records in zip(window_data, future.result()):
+                        data.extend(records)
+                except Exception as e:
+                    print(f"Error processing a year/league combo: {e}")
+
+    for target_ranks, data in zip(target_windows, window_data):
+        save_IIA_results(data, target_ranks, removal_amount, max_removed_ranking, sort_key)
+
+
+
 # # multiprocessing requires that the main entry point of the script be protected
 # if __name__ == '__main__':
 
@@ -239,6 +283,11 @@ def detect_IIA_all(target_ranks, removal_amount, max_removed_ranking, sort_key):
 
 
     
+# # All windows [1..3] to [1..15] of one removal amount from a single removal index per election
+# if __name__ == '__main__':
+#     detect_IIA_sweep([list(range(1, target_count + 1)) for target_count in range(3, 15 + 1)], 2, 15, "New-Rankings")
+
+
 # if __name__ == '__main__':
 #     sort_key = "New-Rankings"
 
@@ -290,8 +339,13 @@ side notes:
 
 1. Big O:
 
-the big O of detect_IIA_all() is O(Y * L * C(e, r) * n), with Y being the year, L being the league, 
-    e being number of non-target players, r being removal amount, n being total number of rows in ballots
+the big O of detect_IIA_all() was O(Y * L * C(e, r) * n), with Y being the year, L being the league, 
+    e being number of non-target players, r being removal amount, n being total number of rows in ballots.
+With the precomputed RemovalTables it is O(Y * L * (n * c^2 + C(e, r) * c)) for r = 1, c being the number
+    of candidates, and a vectorized O(r * n + n * 10) recount per combination for r > 1.
+For r = 1 all single removals are now answered at once from the candidates x candidates matrix of
+    post-removal scores (RemovalTables.single_removal_changes), about 0.3 ms per election instead of
+    one recount and sort per candidate; the whole detect_IIA_all run is then mostly process-pool startup.
 
 
 2. Running time:
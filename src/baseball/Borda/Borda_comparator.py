@@ -1,51 +1,52 @@
+import numpy as np
 import pandas as pd
-import os
-
-# Function to read the top N players from a given CSV file path and return their names
-def get_top_n_players(file_path, top_n):
-    if os.path.exists(file_path):
-        df = pd.read_csv(file_path)
-        df = df[df['Borda Points'] > 0]  # Filter out players with 0 Borda Points
-        top_players = df['Player'].head(top_n).tolist()  # Get top N players
-        return top_players
-    else:
-        print(f"File {file_path} not found.")
-        return []
+import sys
+
+sys.path.append('./src/common')
+from ballot_store import load_mvp_election, mvp_election_keys
+from borda_scoring import MVP_SCHEMES, borda_rankings
+from positional_winners import possible_winners
+from scheme_sweep import geometric_schemes, monotone_integer_schemes, truncated_borda_schemes, scheme_sweep, reversal_summary
+from voter_jackknife import voter_jackknife, pivotal_voters
+
+# Weight-scheme families of borda_scheme_sweep, each as (scheme names, schemes x 10 positions weight matrix)
+SCHEME_FAMILIES = {
+    'geometric': lambda: geometric_schemes(np.round(np.linspace(0.01, 1, 100), 2), 10),
+    'monotone': lambda: monotone_integer_schemes(10, 4),
+    'truncated': lambda: truncated_borda_schemes(10),
+}
+
+# Function to return the top N players' names of a scheme's ranking
+def get_top_n_players(ranking, points, top_n):
+    top_ids = ranking.order[:top_n]
+    top_ids = top_ids[points[top_ids] > 0]  # Filter out players with 0 Borda Points
+    return ranking.election.decode(top_ids)  # Get top N players
 
 # Function to process a specific league, year, and top number of players and return specified format
 def process_league_year(league, year, top_n):
-    base_path = f"./src/baseball/Borda/results/"
-    
-    # Construct paths for each Borda system
-    official_borda_path = os.path.join(base_path, f'borda_14-9-8--1/{year}_{league}_14-9-8--1.csv')
-    borda_top1_path = os.path.join(base_path, f'borda_top1/{year}_{league}_top1.csv')
-    borda_top3_path = os.path.join(base_path, f'borda_top3/{year}_{league}_top3.csv')
-    borda_top5_path = os.path.join(base_path, f'borda_top5/{year}_{league}_top5.csv')
-    borda_top10_path = os.path.join(base_path, f'borda_top10/{year}_{league}_top10.csv')
-    dowdall_path = os.path.join(base_path, f'borda_Dowdall/{year}_{league}_Dowdall.csv')
-    
+    # Score and rank every Borda system for this election in one vectorized call
+    rankings = borda_rankings(load_mvp_election(year, league), MVP_SCHEMES)
+
     # Get top N players' names from each system
-    official_borda_players = get_top_n_players(official_borda_path, top_n)
-    borda_top1_players = get_top_n_players(borda_top1_path, top_n)
-    borda_top3_players = get_top_n_players(borda_top3_path, top_n)
-    borda_top5_players = get_top_n_players(borda_top5_path, top_n)
-    borda_top10_players = get_top_n_players(borda_top10_path, top_n)
-    dowdall_players = get_top_n_players(dowdall_path, top_n)
-
-    # Read official Borda file to create a ranking lookup
-    df_official = pd.read_csv(official_borda_path)
-    df_official = df_official[df_official['Borda Points'] > 0]  # Filter out players with 0 Borda Points
-    df_official['Rank'] = df_official.index + 1  # Assign ranks based on order
-    
-    # Create a dictionary to look up ranks based on player names
-    rank_lookup = dict(zip(df_official['Player'], df_official['Rank']))
+    official_borda_players = get_top_n_players(*rankings['14-9-8--1'], top_n)
+    borda_top1_players = get_top_n_players(*rankings['top1'], top_n)
+    borda_top3_players = get_top_n_players(*rankings['top3'], top_n)
+    borda_top5_players = get_top_n_players(*rankings['top5'], top_n)
+    borda_top10_players = get_top_n_players(*rankings['top10'], top_n)
+    dowdall_players = get_top_n_players(*rankings['Dowdall'], top_n)
+
+    # Use the official ranking to look up ranks, players with 0 Borda Points have none
+    official, official_points = rankings['14-9-8--1']
+    def rank_lookup(player):
+        player_id = official.election.name_to_id[player]
+        return str(official.rank[player_id]) if official_points[player_id] > 0 else "N/A"
     
     # Find the ranks of each player in the top lists based on the official Borda ranking
-    borda_top1_ranks = [str(rank_lookup.get(player, "N/A")) for player in borda_top1_players]
-    borda_top3_ranks = [str(rank_lookup.get(player, "N/A")) for player in borda_top3_players]
-    borda_top5_ranks = [str(rank_lookup.get(player, "N/A")) for player in borda_top5_players]
-    borda_top10_ranks = [str(rank_lookup.get(player, "N/A")) for player in borda_top10_players]
-    dowdall_ranks = [str(rank_lookup.get(player, "N/A")) for player in dowdall_players]
+    borda_top1_ranks = [rank_lookup(player) for player in borda_top1_players]
+    borda_top3_ranks = [rank_lookup(player) for player in borda_top3_players]
+    borda_top5_ranks = [rank_lookup(player) for player in borda_top5_players]
+    borda_top10_ranks = [rank_lookup(player) for player in borda_top10_players]
+    dowdall_ranks = [rank_lookup(player) for player in dowdall_players]
 
     # Return the combined results as a dictionary
     return {
@@ -67,13 +68,11 @@ def process_league_year(league, year, top_n):
 # Function to process all leagues and years, construct the output file path, and save the results
 def borda_comparator(top_n):
     results = []
-    leagues = ['AL', 'NL']
-    years = range(2012, 2024)  # Years 2012 to 2023
     
-    for year in years:
-        for league in leagues:
-            result = process_league_year(league, year, top_n)
-            results.append(result)
+    # Years 2012 to 2023, both leagues
+    for year, league in mvp_election_keys():
+        result = process_league_year(league, year, top_n)
+        results.append(result)
 
     output_file = f"./src/baseball/Borda/borda-comparison-top{top_n}.csv"
 
@@ -89,4 +88,65 @@ def borda_comparator(top_n):
     print(f"Results saved to {output_file}")
 
 
-borda_comparator(1)
+# Function to evaluate a whole family of weight schemes on every league and year, and save which ones
+# elect another MVP or change the top N compared with the official 14-9-8--1 points
+def borda_scheme_sweep(family, top_n):
+    names, weights = SCHEME_FAMILIES[family]()
+    summaries, details = [], []
+
+    for year, league in mvp_election_keys():
+        # Every scheme of the family is scored in one matrix multiply for this election
+        sweep = scheme_sweep(load_mvp_election(year, league), names, weights, MVP_SCHEMES['14-9-8--1'], top_n)
+        summaries.append({'Season': year, 'League': league, **reversal_summary(sweep, top_n)})
+        details.append(sweep[sweep[f'Top-{top_n}-Changed']].assign(Season=year, League=league))
+
+    output_file = f"./src/baseball/Borda/scheme-sweep-{family}-top{top_n}.csv"
+    pd.DataFrame(summaries).to_csv(output_file, index=False)
+    # Schemes that changed the top N, per league and year
+    changes_file = f"./src/baseball/Borda/scheme-sweep-{family}-top{top_n}-changes.csv"
+    changes = pd.concat(details, ignore_index=True)
+    changes[['Season', 'League'] + list(changes.columns[:-2])].to_csv(changes_file, index=False)
+    print(f"Results saved to {output_file} and {changes_file}")
+
+
+# Function to list, for every league and year, the players that some positional rule (any non-increasing
+# weights over the 10 ballot positions) would make the MVP, with weights that do it; solved exactly, no grid
+def borda_possible_winners():
+    results = []
+
+    for year, league in mvp_election_keys():
+        election = load_mvp_election(year, league)
+        winners = possible_winners(election)
+        winners = winners[winners['Can-Win']]
+        results.append({
+            'Season': year,
+            'League': league,
+            'Official Borda': get_top_n_players(*borda_rankings(election, MVP_SCHEMES)['14-9-8--1'], 1)[0],
+            'Possible Winners': ', '.join(winners['Candidate']),
+            'Weights': '; '.join(winners['Weights']),
+        })
+
+    output_file = "./src/baseball/Borda/borda-possible-winners.csv"
+    pd.DataFrame(results).to_csv(output_file, index=False)
+    print(f"Results saved to {output_file}")
+
+
+# Function to list, for every league and year, the writers whose ballot alone decides the MVP or the top N
+# under the official 14-9-8--1 points: leaving that one ballot out changes them
+def borda_voter_jackknife(top_n):
+    results = []
+
+    for year, league in mvp_election_keys():
+        # Every leave-one-out electorate of this election is scored and ranked at once
+        jackknife = voter_jackknife(load_mvp_election(year, league), MVP_SCHEMES['14-9-8--1'], top_n)
+        results.append(pivotal_voters(jackknife, top_n).assign(Season=year, League=league))
+
+    output_file = f"./src/baseball/Borda/voter-jackknife-top{top_n}.csv"
+    pivotal = pd.concat(results, ignore_index=True)
+    pivotal[['Season', 'League'] + list(pivotal.columns[:-2])].to_csv(output_file, index=False)
+    print(f"Results saved to {output_file}")
+
+
+if __name__ == '__main__':
+    borda_comparator(1)
+
@@ -1,12 +1,17 @@
 import csv
+import os
+import sys
 from collections import defaultdict
 
+sys.path.append('./src/common')
+from ballot_store import load_mvp_election, mvp_election_keys
+from borda_scoring import MVP_SCHEMES, borda_tables
+
 """
 Calculate Borda points for players in a specific year and league
-from a given CSV file containing MVP ballots.
+from the encoded MVP ballots of that year and league.
 
 Parameters:
-    data_file (str): Path to the CSV file with MVP ballots.
     weights (list): List of weights assigned to player rankings.
     year (int): The year for which to calculate Borda points.
     league (str): The league ('AL' or 'NL') for which to calculate Borda points.
@@ -14,54 +19,62 @@ Parameters:
 """
 
 
-def borda_mvp_specific(data_file, weights, year, league, output_filename):
-    # Dictionary to store the total Borda points for each player
-    borda_scores = defaultdict(int)
+def borda_mvp_specific(weights, year, league, output_filename):
+    borda_mvp_schemes(year, league, {output_filename: weights})
 
-    with open(data_file, mode='r') as file:
-        reader = csv.reader(file)
-        next(reader)  # Skip the header row
 
-        # Iterate through each voter's ballot
-        for row in reader:
-            row_year = row[0]
-            row_league = row[1]
-            
-            # Filter by the specified league and year
-            if row_year == str(year) and row_league == league:
-                players = row[5:15]
-                for i, player in enumerate(players):
-                    if player:
-                        borda_scores[player] += weights[i]
+"""
+Calculate Borda points for a specific year and league under several weight schemes at once.
+All schemes are scored by one matrix multiply over the election's position-count table,
+instead of re-reading the ballots once per scheme.
+
+Parameters:
+    year (int): The year for which to calculate Borda points.
+    league (str): The league ('AL' or 'NL') for which to calculate Borda points.
+    schemes (dict): output_filename -> weights, defaults to every scheme in the results folder.
+"""
 
-    # Sort players by their total Borda points
-    sorted_players = sorted(borda_scores.items(), key=lambda x: x[1], reverse=True)
 
-    year_ = year - 2000
-    output_file = f'./src/baseball/Borda/results/borda_{output_filename}/{year}_{league}_{output_filename}.csv'
+def borda_mvp_schemes(year, league, schemes=MVP_SCHEMES):
+    election = load_mvp_election(year, league)
+    tables = borda_tables(election, schemes)
 
-    # Write the results to the output CSV
-    with open(output_file, mode='w', newline='') as file:
-        writer = csv.writer(file)
-        writer.writerow(['Player', 'Borda Points'])
-        writer.writerows(sorted_players)
+    for output_filename, table in tables.items():
+        output_file = f'./src/baseball/Borda/results/borda_{output_filename}/{year}_{league}_{output_filename}.csv'
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
 
-    print(f"Borda results for {league} in {year} saved to {output_file}")
+        # Write the results to the output CSV
+        with open(output_file, mode='w', newline='') as file:
+            writer = csv.writer(file, lineterminator='\n')
+            writer.writerow(['Player', 'Borda Points'])
+            writer.writerows(table.itertuples(index=False))
+
+        print(f"Borda results for {league} in {year} saved to {output_file}")
 
 
 """
 Calculate Borda points for all years and both leagues.
 
 Parameters:
-    data_file (str): Path to the CSV file with MVP ballots.
     weights (list): List of weights assigned to player rankings.
 """
 
 
-def borda_mvp_entire(data_file, weights, output_filename):
-    for year in range(2012, 2024):
-        borda_mvp_specific(data_file, weights, year, "AL", output_filename)
-        borda_mvp_specific(data_file, weights, year, "NL", output_filename)
+def borda_mvp_entire(weights, output_filename):
+    borda_mvp_entire_schemes({output_filename: weights})
+
+
+"""
+Calculate Borda points for all years and both leagues under several weight schemes at once.
+
+Parameters:
+    schemes (dict): output_filename -> weights, defaults to every scheme in the results folder.
+"""
+
+
+def borda_mvp_entire_schemes(schemes=MVP_SCHEMES):
+    for year, league in mvp_election_keys():
+        borda_mvp_schemes(year, league, schemes)
 
 """
 Debug function to compute and display the Borda points for a specific player
@@ -109,8 +122,12 @@ def borda_mvp_debug(data_file, weights, year, league, player_name):
 data_file = './data/baseball/processed_data/mvp_ballots_all/mvp_ballots_v1.csv'
 weights = [1, 1/2, 1/3, 1/4, 1/5, 1/6, 1/7, 1/8, 1/9, 1/10]  
 
-# borda_mvp_specific(data_file, weights, 2012, "AL")
+# borda_mvp_specific(weights, 2012, "AL", "Dowdall")
 
-borda_mvp_entire(data_file, weights, "Dowdall")
+# borda_mvp_entire(weights, "Dowdall")
 
 # borda_mvp_debug(data_file, weights, 2012, "AL", "Jeter")
+
+if __name__ == '__main__':
+    # Rebuild every results folder (14-9-8--1, top1/3/5/10, Dowdall) in one pass per election
+    borda_mvp_entire_schemes()
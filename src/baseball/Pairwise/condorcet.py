@@ -1,74 +1,102 @@
 import pandas as pd
+import sys
+
+sys.path.append('./src/common')
+from ballot_store import load_mvp_election, mvp_election_keys
+from borda_scoring import MVP_SCHEMES, borda_tables
+from pairwise_matrix import pairwise_matrix
+from majority_relation import majority_sets
+from bootstrap_paradoxes import bootstrap_paradoxes
+
+
+def majority_results(league, year):
+    """
+    Borda ranking (14-9-8-...-1) and majority relation of one election, from a single pass over its ballots.
+
+    Returns:
+        tuple: (list of players in Borda order, dict of majority_sets with the ids decoded to names)
+    """
+    election = load_mvp_election(year, league)
+    borda_results = borda_tables(election, {'14-9-8--1': MVP_SCHEMES['14-9-8--1']})['14-9-8--1']
+
+    sets = majority_sets(pairwise_matrix(election))
+    for key in ('Condorcet Winner', 'Condorcet Loser'):
+        sets[key] = None if sets[key] is None else election.names[sets[key]]
+    for key in ('Smith Set', 'Schwartz Set'):
+        sets[key] = election.decode(sets[key])
+
+    return borda_results['Player'].tolist(), sets
+
 
 def find_condorcet_winner(league, year, top_n):
-    borda_path = f'./src/baseball/Borda/results/borda_14-9-8--1/{year}_{league}_14-9-8--1.csv'
-    borda_results = pd.read_csv(borda_path)
-    
-    top_players = borda_results['Player'].head(top_n).tolist()
-    
-    pairwise_path = f'./src/baseball/Pairwise/pairwise_results/{year} {league}.csv'
-    pairwise_results = pd.read_csv(pairwise_path)
-    
-    # Check each top player to see if they win against all other top players
-    for player in top_players:
-        is_condorcet_winner = True
-        
-        # Loop through each row in pairwise results and check outcomes for the current player
-        for _, row in pairwise_results.iterrows():
-            if row['PlayerA'] == player:
-                # Current player is PlayerA, check if they win over PlayerB
-                if row['A>B'] <= row['B>A']:  # If PlayerA doesn't have more votes than PlayerB
-                    is_condorcet_winner = False
-                    break
-            elif row['PlayerB'] == player:
-                # Current player is PlayerB, check if they win over PlayerA
-                if row['B>A'] <= row['A>B']:  # If PlayerB doesn't have more votes than PlayerA
-                    is_condorcet_winner = False
-                    break
-
-        # If player wins against all others in pairwise, return as the Condorcet winner
-        if is_condorcet_winner:
-            return player
-    
+    # The Condorcet winner (beats every other player head to head), if it is one of the top_n Borda players
+    borda_ranking, sets = majority_results(league, year)
+    top_players = borda_ranking[:top_n]
+
+    if sets['Condorcet Winner'] in top_players:
+        return sets['Condorcet Winner']
+
     # If no Condorcet winner found, return None
     return None
 
 
 # for i in range (2012, 2024):
-    print(find_condorcet_winner("AL", i, 3))
-    print(find_condorcet_winner("NL", i, 3))
+#     print(find_condorcet_winner("AL", i, 3))
+#     print(find_condorcet_winner("NL", i, 3))
 
 
 def borda_condorcet():
     results = []
 
-    for year in range(2012, 2024):
-        for league in ["AL", "NL"]:
-            # Find Borda winner
-            borda_path = f'./src/baseball/Borda/results/borda_14-9-8--1/{year}_{league}_14-9-8--1.csv'
-            borda_results = pd.read_csv(borda_path)
-            borda_winner = borda_results['Player'].iloc[0]  
-
-            condorcet_winner = find_condorcet_winner(league, year, top_n=3)
-
-            if condorcet_winner is None:
-                indicator = 1  # Condorcet winner does not exist
-            elif borda_winner == condorcet_winner:
-                indicator = 0  # Condorcet winner exists and is the same as Borda winner
-            else:
-                indicator = 2  # Condorcet winner exists but is not the same as Borda winner
-
-            results.append({
-                "Year": year,
-                "League": league,
-                "Borda Winner": borda_winner,
-                "Condorcet Winner": condorcet_winner,
-                "Paradox": indicator
-            })
+    for year, league in mvp_election_keys():
+        # Find Borda winner and Condorcet winner (among the top 3) with one majority computation
+        borda_ranking, sets = majority_results(league, year)
+        borda_winner = borda_ranking[0]
+
+        condorcet_winner = sets['Condorcet Winner'] if sets['Condorcet Winner'] in borda_ranking[:3] else None
+
+        if condorcet_winner is None:
+            indicator = 1  # Condorcet winner does not exist
+        elif borda_winner == condorcet_winner:
+            indicator = 0  # Condorcet winner exists and is the same as Borda winner
+        else:
+            indicator = 2  # Condorcet winner exists but is not the same as Borda winner
+
+        results.append({
+            "Year": year,
+            "League": league,
+            "Borda Winner": borda_winner,
+            "Condorcet Winner": condorcet_winner,
+            "Paradox": indicator
+        })
 
     results_df = pd.DataFrame(results)
     results_df.to_csv("./src/baseball/Pairwise/borda_condorcet_results.csv", index=False)
 
 
-borda_condorcet()
-        
+def bootstrap_paradox_frequency(n_samples=10000, target_ranks=(1, 2, 3), max_removed_ranking=15, seed=0):
+    """
+    How often IIA (one player removed, as in detect_IIA_all), Borda/Condorcet disagreement and Condorcet cycles
+    occur when each election's ballots are resampled with replacement, with 95% confidence intervals.
+
+    Args:
+        n_samples (int): bootstrap electorates per election
+        target_ranks (tuple): ranks a removal must not change
+        max_removed_ranking (int): strict upper bound for the rank of the removed player
+        seed (int): seed of the resampling
+    """
+    removal_ranks = [rank for rank in range(1, max_removed_ranking) if rank not in target_ranks]
+    results = []
+
+    for year, league in mvp_election_keys():
+        frequencies = bootstrap_paradoxes(load_mvp_election(year, league), MVP_SCHEMES['14-9-8--1'], n_samples, seed,
+                                          target_ranks, removal_ranks)
+        results.append(frequencies.assign(Year=year, League=league))
+
+    results_df = pd.concat(results, ignore_index=True)
+    results_df = results_df[['Year', 'League'] + list(results_df.columns[:-2])]
+    results_df.to_csv("./src/baseball/Pairwise/bootstrap_paradox_frequency.csv", index=False)
+
+
+if __name__ == '__main__':
+    borda_condorcet()
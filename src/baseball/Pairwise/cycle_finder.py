@@ -1,5 +1,10 @@
 import pandas as pd
-import itertools
+import sys
+
+sys.path.append('./src/common')
+from ballot_store import load_mvp_election
+from pairwise_matrix import pairwise_matrix
+from majority_relation import majority_graph, iter_cycles
 
 def preprocess_pairwise_data(pairwise_df):
     """
@@ -18,182 +23,62 @@ def preprocess_pairwise_data(pairwise_df):
     return pairwise_dict
 
 
-def get_player_rankings(ranking_file):
+def get_player_rankings(election, ranking_file):
     """
-    Read the player rankings from a CSV file.
-    Returns a dictionary mapping players to their rank and points.
+    Read the player rankings from a CSV file (rank = row number, 1-indexed).
+    Returns a Ranking of the election's players, looked up by player id or name without touching pandas.
     """
     ranking_df = pd.read_csv(ranking_file)
-    ranking_df['Rank'] = ranking_df.index + 1  # Rank is based on the row number (1-indexed)
-    ranking_dict = {row['Player']: {'Rank': row['Rank'], 'Points': row['Borda Points']}
-                    for _, row in ranking_df.iterrows()}
-    return ranking_dict
+    return election.ranking_by_names(ranking_df['Player'])
 
 
 def cycle_finder(league, year, cycle_size):
-    # Read the nominees name list
-    data_path = f"./data/baseball/processed_data/auxiliary_files/mvp_nominees_by_year/mvp_nominees_{year}_{league}.csv"
-    df = pd.read_csv(data_path)
-
-    # Extract the player names from the 'Player' column
-    name_list = df['Player'].tolist()
-
-    # Generate all possible cycle-size combinations, sorted
-    combinations = [sorted(combo) for combo in itertools.combinations(name_list, cycle_size)]
+    """
+    Find every Condorcet cycle with cycle_size players (any size of at least 3) in one election.
 
-    # Read the pairwise data CSV file (PlayerA, PlayerB, A>B, B>A)
-    pairwise_path = f"./src/baseball/Pairwise/pairwise_results/{year} {league}.csv"
-    pairwise_df = pd.read_csv(pairwise_path)
-    
-    pairwise_dict = preprocess_pairwise_data(pairwise_df)
+    The majority graph (A -> B when more voters rank A above B) is built once from the pairwise counts,
+    and its cycles are enumerated inside the strongly connected components (see src/common/majority_relation.py),
+    so every cyclic order is found, not only the one following the sorted names.
+    A cycle is listed from its alphabetically first player, towards the alphabetically smaller of its two neighbours.
+    """
+    # Pairwise counts of the election, [a, b] = voters ranking a above b (player ids are in alphabetical order)
+    election = load_mvp_election(year, league)
+    pairwise = pairwise_matrix(election)
 
     # Read player rankings (Borda Points)
     ranking_file = f"./data/baseball/processed_data/mvp_official_results_by_year/{league}_{year - 2000}.csv"
-    player_rankings = get_player_rankings(ranking_file)
-    
-    # Iterate through each combination
+    player_rankings = get_player_rankings(election, ranking_file)
+
+    cycles = []
+    for cycle in iter_cycles(majority_graph(pairwise), cycle_size):
+        # Same cycle, read in the other direction, when that starts with the smaller name
+        if cycle[1] > cycle[-1]:
+            cycle = (cycle[0],) + cycle[:0:-1]
+        cycles.append(cycle)
+    # Order like the combinations of the sorted names
+    cycles.sort(key=lambda cycle: (sorted(cycle), cycle))
+
+    letters = 'abcdefghijklmnopqrstuvwxyz'[:cycle_size]
     valid_combinations = []
-    for combo in combinations:
-        # different conditions check based on cycle sizes
-        if cycle_size == 3:
-            a, b, c = combo
-            try:
-                a_b_result = pairwise_dict[(a, b)]
-                a_c_result = pairwise_dict[(a, c)]
-                b_c_result = pairwise_dict[(b, c)]
-            except KeyError:
-                continue  # Skip this combination if any pair data is missing
-
-            # A>B, B>C, C>A OR A<B, B<C, C<A
-            if ((a_b_result[0] > a_b_result[1] and  
-                 b_c_result[0] > b_c_result[1] and  
-                 a_c_result[1] > a_c_result[0]) or 
-                (a_b_result[1] > a_b_result[0] and  
-                 b_c_result[1] > b_c_result[0] and  
-                 a_c_result[0] > a_c_result[1])):
-
-                # Get the rankings and points of the players
-                a_rank = player_rankings.get(a, {'Rank': 'N/A', 'Points': 'N/A'})
-                b_rank = player_rankings.get(b, {'Rank': 'N/A', 'Points': 'N/A'})
-                c_rank = player_rankings.get(c, {'Rank': 'N/A', 'Points': 'N/A'})
-
-                valid_combinations.append({
-                    'Year': year,
-                    'League': league,
-                    'Combo': f'{a}, {b}, {c}',
-                    'Rankings': f'{a_rank["Rank"]}, {b_rank["Rank"]}, {c_rank["Rank"]}',
-                    'ab': f'({a} {b})',
-                    'a>b': f'{a_b_result[0]}',
-                    'b>a': f'{a_b_result[1]}',
-                    'bc': f'({b} {c})', 
-                    'b>c': f'{b_c_result[0]}', 
-                    'c>b': f'{b_c_result[1]}', 
-                    'ca': f'({c} {a})', 
-                    'c>a': f'{a_c_result[1]}', 
-                    'a>c': f'{a_c_result[0]}'
-                })
-        
-        elif cycle_size == 4:
-            a, b, c, d = combo
-            try:
-                a_b_result = pairwise_dict[(a, b)]
-                a_c_result = pairwise_dict[(a, c)]
-                a_d_result = pairwise_dict[(a, d)]
-                b_c_result = pairwise_dict[(b, c)]
-                b_d_result = pairwise_dict[(b, d)]
-                c_d_result = pairwise_dict[(c, d)]
-            except KeyError:
-                continue 
-
-            # A>B, B>C, C>D, D>A OR A<B, B<C, C<D, D<A
-            if ((a_b_result[0] > a_b_result[1] and  
-                 b_c_result[0] > b_c_result[1] and  
-                 c_d_result[0] > c_d_result[1] and  
-                 a_d_result[1] > a_d_result[0]) or 
-                (a_b_result[1] > a_b_result[0] and  
-                 b_c_result[1] > b_c_result[0] and  
-                 c_d_result[1] > c_d_result[0] and  
-                 a_d_result[0] > a_d_result[1])):   
-
-                a_rank = player_rankings.get(a, {'Rank': 'N/A', 'Points': 'N/A'})
-                b_rank = player_rankings.get(b, {'Rank': 'N/A', 'Points': 'N/A'})
-                c_rank = player_rankings.get(c, {'Rank': 'N/A', 'Points': 'N/A'})
-                d_rank = player_rankings.get(d, {'Rank': 'N/A', 'Points': 'N/A'})
-
-                valid_combinations.append({
-                    'Year': year,
-                    'League': league,
-                    'Combo': f'{a}, {b}, {c}, {d}',
-                    'Rankings': f'{a_rank["Rank"]}, {b_rank["Rank"]}, {c_rank["Rank"]}, {d_rank["Rank"]}',
-                    'ab': f'({a} {b})',
-                    'a>b': f'{a_b_result[0]}',
-                    'b>a': f'{a_b_result[1]}',
-                    'bc': f'({b} {c})', 
-                    'b>c': f'{b_c_result[0]}', 
-                    'c>b': f'{b_c_result[1]}',
-                    'cd': f'({c} {d})',
-                    'c>d': f'{c_d_result[0]}',
-                    'd>c': f'{c_d_result[1]}',
-                    'da': f'({d} {a})',
-                    'd>a': f'{a_d_result[1]}',
-                    'a>d': f'{a_d_result[0]}'
-                })
-
-        elif cycle_size == 5:
-            a, b, c, d, e = combo
-            try:
-                a_b_result = pairwise_dict[(a, b)]
-                a_c_result = pairwise_dict[(a, c)]
-                a_d_result = pairwise_dict[(a, d)]
-                a_e_result = pairwise_dict[(a, e)]
-                b_c_result = pairwise_dict[(b, c)]
-                b_d_result = pairwise_dict[(b, d)]
-                b_e_result = pairwise_dict[(b, e)]
-                c_d_result = pairwise_dict[(c, d)]
-                c_e_result = pairwise_dict[(c, e)]
-                d_e_result = pairwise_dict[(d, e)]
-            except KeyError:
-                continue 
-
-            # A>B, B>C, C>D, D>E, E>A OR A<B, B<C, C<D, D<E, E<A
-            if ((a_b_result[0] > a_b_result[1] and
-                 b_c_result[0] > b_c_result[1] and
-                 c_d_result[0] > c_d_result[1] and
-                 d_e_result[0] > d_e_result[1] and
-                 a_e_result[1] > a_e_result[0]) or
-                (a_b_result[1] > a_b_result[0] and
-                 b_c_result[1] > b_c_result[0] and
-                 c_d_result[1] > c_d_result[0] and
-                 d_e_result[1] > d_e_result[0] and
-                 a_e_result[0] > a_e_result[1])):
-
-                a_rank = player_rankings.get(a, {'Rank': 'N/A', 'Points': 'N/A'})
-                b_rank = player_rankings.get(b, {'Rank': 'N/A', 'Points': 'N/A'})
-                c_rank = player_rankings.get(c, {'Rank': 'N/A', 'Points': 'N/A'})
-                d_rank = player_rankings.get(d, {'Rank': 'N/A', 'Points': 'N/A'})
-                e_rank = player_rankings.get(e, {'Rank': 'N/A', 'Points': 'N/A'})
-
-                valid_combinations.append({
-                    'Year': year,
-                    'League': league,
-                    'Combo': f'{a}, {b}, {c}, {d}, {e}',
-                    'Rankings': f'{a_rank["Rank"]}, {b_rank["Rank"]}, {c_rank["Rank"]}, {d_rank["Rank"]}, {e_rank["Rank"]}',
-                    'ab': f'({a} {b})',
-                    'a>b': f'{a_b_result[0]}',
-                    'b>a': f'{a_b_result[1]}',
-                    'bc': f'({b} {c})',
-                    'b>c': f'{b_c_result[0]}',
-                    'c>b': f'{b_c_result[1]}',
-                    'cd': f'({c} {d})',
-                    'c>d': f'{c_d_result[0]}',
-                    'd>c': f'{c_d_result[1]}',
-                    'de': f'({d} {e})',
-                    'd>e': f'{d_e_result[0]}',
-                    'e>d': f'{d_e_result[1]}',
-                    'ea': f'({e} {a})',
-                    'e>a': f'{a_e_result[1]}',
-                    'a>e': f'{a_e_result[0]}'
-                })
+    for cycle in cycles:
+        names = election.decode(cycle)
+        # Get the rankings of the players
+        ranks = [player_rankings.rank[player] or 'N/A' for player in cycle]
+
+        row = {
+            'Year': year,
+            'League': league,
+            'Combo': ', '.join(names),
+            'Rankings': ', '.join(str(rank) for rank in ranks),
+        }
+        # One (x y), x>y, y>x group per edge of the cycle: ab, bc, ..., and the closing edge back to a
+        for i in range(cycle_size):
+            j = (i + 1) % cycle_size
+            x, y = letters[i], letters[j]
+            row[f'{x}{y}'] = f'({names[i]} {names[j]})'
+            row[f'{x}>{y}'] = f'{pairwise[cycle[i], cycle[j]]}'
+            row[f'{y}>{x}'] = f'{pairwise[cycle[j], cycle[i]]}'
+        valid_combinations.append(row)
 
     # Convert the valid combinations to a DataFrame
     valid_combos_df = pd.DataFrame(valid_combinations)
@@ -239,7 +124,8 @@ def cycle_finder_cutoff_3cycle(cutoff):
 
 
 
-cycle_finder_all(5)
+if __name__ == '__main__':
+    cycle_finder_all(5)
 
 
 # cycle_finder_cutoff(10)
@@ -0,0 +1,275 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+import contextlib
+import importlib.util
+
+"""
+Benchmark harness for the Borda, pairwise, cycle and IIA workloads.
+
+Run from the repository root:
+    python src/benchmarks/run_benchmarks.py                  # time everything, compare with the baseline
+    python src/benchmarks/run_benchmarks.py --save-baseline  # time everything and make it the new baseline
+    python src/benchmarks/run_benchmarks.py --only cycle_finder detect_IIA_all_cold detect_IIA_all_warm
+    python src/benchmarks/run_benchmarks.py --only synthetic_pairwise synthetic_tables --voters 100000 --candidates 200
+
+Every benchmark calls the real entry point of a script on the checked-in data with fixed parameters.
+The synthetic_* benchmarks time the shared kernels on one seeded synthetic AP poll (synthetic_elections.py)
+whose size is set by --voters and --candidates; the ballots are drawn once, outside the timings.
+The calls run in a scratch directory holding a link to ./data and empty output folders, so no results
+file or cache entry of the repository is touched. The IIA scans read and fill the precomputation
+cache, so each is timed twice: *_cold empties the scratch ./cache before every repeat, *_warm fills it
+once before the timings. The minimum over the repeats is compared with the baseline, and the run
+fails (exit code 1) when a benchmark is slower than the baseline by more than the threshold.
+
+Every run is written to src/benchmarks/results/<timestamp>.json (not tracked by git);
+the baseline is src/benchmarks/baseline.json. Timings depend on the machine, so a baseline is only
+meaningful on the machine that recorded it.
+"""
+
+BENCHMARK_DIR = './src/benchmarks'
+RESULTS_DIR = f'{BENCHMARK_DIR}/results'
+BASELINE_PATH = f'{BENCHMARK_DIR}/baseline.json'
+
+# A benchmark fails when its best time exceeds the baseline's best time by more than this fraction
+THRESHOLD = 0.25
+REPEAT = 3
+
+# Default size of the synthetic election: Plackett-Luce ballots of 25 ranks
+SYNTHETIC_VOTERS = 20000
+SYNTHETIC_CANDIDATES = 100
+
+# Folders the entry points write into, created empty in the scratch directory
+OUTPUT_DIRS = [
+    './src/baseball/Borda/results',
+    './src/baseball/Borda/IIA_results',
+    './src/baseball/Pairwise/pairwise_results',
+    './src/college-polls/Borda/IIA_results',
+    './cache',
+]
+
+
+def load_script(path):
+    """Import a script by file path (several live in folders with '-' in their names)."""
+    name = os.path.splitext(os.path.basename(path))[0]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    # Registered under its name so the functions it hands to a process pool can be pickled
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def clear_cache():
+    """Empty ./cache (in the scratch directory), so the next call computes every precomputation again."""
+    shutil.rmtree('./cache', ignore_errors=True)
+    os.makedirs('./cache')
+
+
+def load_benchmarks(voters=SYNTHETIC_VOTERS, candidates=SYNTHETIC_CANDIDATES):
+    """
+    name -> (parameters, calls per timing, zero-argument callable, setup run before every repeat or None).
+    The scripts are imported here, from the
+    repository root, since they find src/common through the relative path './src/common'.
+    The single-election workloads take milliseconds, so they are timed over many calls, like timeit.
+    """
+    sys.path.append('./src/common')
+    from borda_scoring import MVP_SCHEMES, POLL_SCHEMES, borda_scores
+    from pairwise_matrix import pairwise_matrix
+    from iia_engine import RemovalTables, detect_iia
+    from synthetic_elections import synthetic_election
+    borda_count = load_script('./src/baseball/Borda/Borda_count.py')
+    pairwise = load_script('./src/baseball/Pairwise/pairwise.py')
+    cycles = load_script('./src/baseball/Pairwise/cycle_finder.py')
+    borda_iia = load_script('./src/baseball/Borda/Borda_IIA_parallel.py')
+    poll_iia = load_script('./src/college-polls/Borda/IIA_results/temp_new_2.py')
+
+    def scan_baseball():
+        borda_iia.detect_IIA_all([1, 2, 3], 2, 15, 'New-Rankings')
+
+    def scan_polls():
+        poll_iia.analyze_all_paradoxes([1, 2, 3], 2)
+
+    benchmarks = {
+        'borda_mvp_specific': ("14-9-8--1, 2012 AL", 200,
+                               lambda: borda_count.borda_mvp_specific(MVP_SCHEMES['14-9-8--1'], 2012, 'AL', 'benchmark'),
+                               None),
+        'pairwise_comparison': ("2012 AL", 200,
+                                lambda: pairwise.pairwise_comparison(2012, 'AL'), None),
+        'cycle_finder': ("AL 2012, 4-cycles", 200,
+                         lambda: cycles.cycle_finder('AL', 2012, 4), None),
+        'detect_IIA_all_cold': ("targets [1, 2, 3], remove 2, max removed rank 15, empty cache", 1,
+                                scan_baseball, clear_cache),
+        'detect_IIA_all_warm': ("targets [1, 2, 3], remove 2, max removed rank 15, filled cache", 1,
+                                scan_baseball, None),
+        'analyze_all_paradoxes_cold': ("targets [1, 2, 3], remove 2, empty cache", 1, scan_polls, clear_cache),
+        'analyze_all_paradoxes_warm': ("targets [1, 2, 3], remove 2, filled cache", 1, scan_polls, None),
+    }
+
+    # Drawn on first use, so runs that skip the synthetic benchmarks do not pay for it
+    synthetic = {}
+
+    def election():
+        if not synthetic:
+            synthetic['election'] = synthetic_election((2100, 1), voters, candidates, 25, 'plackett-luce', seed=0)
+            synthetic['tables'] = RemovalTables(synthetic['election'], POLL_SCHEMES['top25'], by_position=True)
+        return synthetic['election']
+
+    def tables():
+        election()
+        return synthetic['tables']
+
+    size = f"{voters} voters, {candidates} candidates"
+    benchmarks.update({
+        'synthetic_borda': (f"{size}, top25", 200,
+                            lambda: borda_scores(election(), [POLL_SCHEMES['top25']]), None),
+        'synthetic_pairwise': (size, 1,
+                               lambda: pairwise_matrix(election()), None),
+        'synthetic_tables': (f"{size}, top25", 1,
+                             lambda: RemovalTables(election(), POLL_SCHEMES['top25'], by_position=True), None),
+        'synthetic_iia': (f"{size}, targets [1, 2, 3], remove 2 of the rest", 1,
+                          lambda: detect_iia(tables(), [1, 2, 3], tables().official_order[3:], 2,
+                                             adjust_ranks=False, gray=True), None),
+        'synthetic_iia_pruned': (f"{size}, targets [1, 2, 3], remove 2 of ranks 4-23, branch and bound", 1,
+                                 lambda: detect_iia(tables(), [1, 2, 3], tables().official_order[3:23], 2,
+                                                    adjust_ranks=False, prune=True), None),
+    })
+    return benchmarks
+
+
+@contextlib.contextmanager
+def scratch_directory():
+    """Work in a temporary copy of the repository layout: ./data linked, empty output folders."""
+    root = os.getcwd()
+    scratch = tempfile.mkdtemp(prefix='benchmarks_')
+    try:
+        os.symlink(os.path.join(root, 'data'), os.path.join(scratch, 'data'))
+        for folder in OUTPUT_DIRS:
+            os.makedirs(os.path.join(scratch, folder), exist_ok=True)
+        os.chdir(scratch)
+        yield scratch
+    finally:
+        os.chdir(root)
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def time_benchmark(function, number=1, repeat=REPEAT, setup=None):
+    """
+    Time `number` calls of a benchmark, `repeat` times, with its prints silenced.
+    `setup` (if any) runs before every repeat, outside the timing.
+    Returns the time per call of every repeat, in seconds.
+    """
+    times = []
+    for _ in range(repeat):
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            for _ in range(number):
+                function()
+            times.append((time.perf_counter() - start) / number)
+    return times
+
+
+def run_benchmarks(names=None, repeat=REPEAT, voters=SYNTHETIC_VOTERS, candidates=SYNTHETIC_CANDIDATES):
+    """
+    Time the benchmarks (all by default), the synthetic ones on an election of the given size.
+
+    Returns:
+        dict: the run record written as JSON: machine, date and {name: {parameters, number, times, min, median}}
+            with the times per call
+    """
+    benchmarks = load_benchmarks(voters, candidates)
+    names = names or list(benchmarks)
+    results = {}
+    with scratch_directory():
+        for name in names:
+            parameters, number, function, setup = benchmarks[name]
+            if name.startswith('synthetic_') or name.endswith('_warm'):
+                # Draws the synthetic election or fills the cache once, outside the timings
+                with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                    function()
+            times = time_benchmark(function, number, repeat, setup)
+            results[name] = {'parameters': parameters, 'number': number, 'times': times,
+                             'min': min(times), 'median': statistics.median(times)}
+            print(f"{name}: best {min(times) * 1000:.2f} ms, median {statistics.median(times) * 1000:.2f} ms"
+                  f" per call ({parameters})")
+    return {
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'machine': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+        'repeat': repeat,
+        'benchmarks': results,
+    }
+
+
+def compare(run, baseline, threshold=THRESHOLD):
+    """
+    Print every benchmark against the baseline.
+
+    Returns:
+        list: names of the benchmarks slower than the baseline by more than the threshold
+    """
+    regressions = []
+    for name, result in run['benchmarks'].items():
+        reference = baseline['benchmarks'].get(name)
+        if reference is None:
+            print(f"{name}: no baseline")
+            continue
+        if result['parameters'] != reference['parameters']:
+            print(f"{name}: parameters differ from the baseline ({reference['parameters']}), not compared")
+            continue
+        ratio = result['min'] / reference['min']
+        status = 'REGRESSION' if ratio > 1 + threshold else 'ok'
+        print(f"{name}: {result['min'] * 1000:.2f} ms vs baseline {reference['min'] * 1000:.2f} ms ({ratio:.2f}x) {status}")
+        if status == 'REGRESSION':
+            regressions.append(name)
+    return regressions
+
+
+def save_json(record, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(record, f, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Time the Borda, pairwise, cycle and IIA workloads.')
+    parser.add_argument('--only', nargs='+', help='benchmark names to run (default: all)')
+    parser.add_argument('--repeat', type=int, default=REPEAT, help='runs per benchmark')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help='allowed slowdown over the baseline, as a fraction (0.25 = 25%%)')
+    parser.add_argument('--save-baseline', action='store_true', help='store this run as the new baseline')
+    parser.add_argument('--voters', type=int, default=SYNTHETIC_VOTERS, help='voters of the synthetic election')
+    parser.add_argument('--candidates', type=int, default=SYNTHETIC_CANDIDATES,
+                        help='candidates of the synthetic election')
+    args = parser.parse_args(argv)
+
+    run = run_benchmarks(args.only, args.repeat, args.voters, args.candidates)
+    save_json(run, f"{RESULTS_DIR}/{run['date'].replace(':', '-')}.json")
+
+    if args.save_baseline:
+        save_json(run, BASELINE_PATH)
+        print(f"Baseline saved to {BASELINE_PATH}")
+        return 0
+    if not os.path.exists(BASELINE_PATH):
+        print(f"No baseline yet, run with --save-baseline to create {BASELINE_PATH}")
+        return 0
+    with open(BASELINE_PATH) as f:
+        regressions = compare(run, json.load(f), args.threshold)
+    if regressions:
+        print(f"Slower than the baseline by more than {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
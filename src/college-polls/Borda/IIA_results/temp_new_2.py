@@ -1,35 +1,29 @@
-import pandas as pd
-from itertools import combinations
 from concurrent.futures import ProcessPoolExecutor
-from collections import defaultdict
+from multiprocessing import Manager
 import time
-import os
-import pickle
-import hashlib
+import sys
+
+sys.path.append('./src/common')
+from ballot_store import load_poll_election, load_all_polls, poll_ballot_path
+from ballot_arena import BallotArena, attach_arena
+from iia_engine import RemovalTables, REMOVAL_TABLES_VERSION, iter_iia, target_changed
+from precompute_cache import CACHE_DIR, cached
+from result_sink import ExternalSortCSV, send_records, receive_records
+from combination_chunks import plan_chunks
 
 # Predefined rank points for top 25 teams
 rank_points = list(range(25, 0, -1))
 
-def generate_cache_key(year, week, weights):
-    """
-    Generate a unique cache key for the preprocessed data.
-    
-    Args:
-        year (int): Season year
-        week (int): Week number
-        weights (list): Weight list used for scoring
-        
-    Returns:
-        str: Unique cache key
-    """
-    # Create a string containing all the parameters
-    params = f"{year}_{week}_{'-'.join(map(str, weights))}"
-    # Generate a hash of the parameters
-    return hashlib.md5(params.encode()).hexdigest()
+# Removal tables already loaded by this process, keyed on (year, week, weights); a pool worker runs many chunks
+_removal_tables = {}
 
-def load_or_preprocess_data(year, week, weights, cache_dir="./cache"):
+def load_or_preprocess_data(year, week, weights, cache_dir=CACHE_DIR):
     """
     Load preprocessed data from cache if available, otherwise process and cache it.
+    The cache entry is keyed on the contents of the ballot CSV, the weights and the version of the
+    removal tables, so it is rebuilt whenever any of them changes (see src/common/precompute_cache.py).
+    It holds only the derived arrays: the tables are rebuilt around the loaded poll (a view into the
+    shared arena in pool workers), once per process.
     
     Args:
         year (int): Season year
@@ -38,62 +32,20 @@ def load_or_preprocess_data(year, week, weights, cache_dir="./cache"):
         cache_dir (str): Directory to store cache files
         
     Returns:
-        tuple: (removal_effects, original_scores, original_teams) or None if data unavailable
+        tuple: (tables, original_teams) or None if data unavailable
     """
+    memo_key = (year, week, tuple(weights))
     try:
-        # Create cache directory if it doesn't exist
-        os.makedirs(cache_dir, exist_ok=True)
-        
-        # Generate cache key and file path
-        cache_key = generate_cache_key(year, week, weights)
-        cache_file = os.path.join(cache_dir, f"{cache_key}.pkl")
-        
-        # Try to load from cache
-        if os.path.exists(cache_file):
-            with open(cache_file, 'rb') as f:
-                return pickle.load(f)
-        
-        # If not in cache, process the data
-        ballot_path = f'./data/college-polls/processed_data/ballot_data_by_season_and_week/season_{year}/{year}_week{week}_top25.csv'
-        rankings_path = f'./src/college-polls/Borda/results/borda_top25/season_{year}/{year}_week{week}_top25.csv'
-        
-        ballots = pd.read_csv(ballot_path)
-        rankings_df = pd.read_csv(rankings_path)
-        original_teams = rankings_df["Teams"].tolist()
-        
-        # Calculate original scores
-        original_scores = defaultdict(int)
-        for _, ballot in ballots.iterrows():
-            for idx, team in enumerate(ballot.iloc[3:]):
-                if idx < len(weights):
-                    original_scores[team] += weights[idx]
-        
-        # Preprocess removal effects
-        removal_effects = {team: {} for team in original_teams}
-        rankings = ballots.iloc[:, 3:].values
-        
-        for removed_team in original_teams:
-            for ballot in rankings:
-                if removed_team in ballot:
-                    removed_idx = list(ballot).index(removed_team)
-                    
-                    adjusted_points = defaultdict(int)
-                    for i in range(removed_idx + 1, len(ballot)):
-                        team_name = ballot[i]
-                        adjusted_points[team_name] += 1
-                    
-                    for team, points in adjusted_points.items():
-                        if team in removal_effects[removed_team]:
-                            removal_effects[removed_team][team] += points
-                        else:
-                            removal_effects[removed_team][team] = points
-        
-        # Cache the results
-        result = (removal_effects, original_scores, original_teams)
-        with open(cache_file, 'wb') as f:
-            pickle.dump(result, f)
-        
-        return result
+        if memo_key not in _removal_tables:
+            # Load the encoded ballots and precompute the removal tables,
+            # which recount the scores after any removal for any weight list (not only consecutive ones)
+            election = load_poll_election(year, week)
+            arrays = cached('poll_removal_tables', REMOVAL_TABLES_VERSION, [poll_ballot_path(year, week)],
+                            (year, week, list(weights)),
+                            lambda: RemovalTables(election, weights, by_position=True).derived_arrays(), cache_dir)
+            tables = RemovalTables.from_derived(election, arrays)
+            _removal_tables[memo_key] = tables, election.decode(tables.official_order)
+        return _removal_tables[memo_key]
         
     except FileNotFoundError:
         return None
@@ -101,7 +53,7 @@ def load_or_preprocess_data(year, week, weights, cache_dir="./cache"):
         print(f'Error processing {year} week {week}: {e}')
         return None
 
-def detect_paradox(year, week, target_rankings, removed_teams, weights=None):
+def detect_paradox(year, week, target_rankings, removed_teams, weights=None, strict=True):
     """
     Detect ranking paradoxes for specific combinations of removals.
     
@@ -111,6 +63,9 @@ def detect_paradox(year, week, target_rankings, removed_teams, weights=None):
         target_rankings (list): Rankings to analyze
         removed_teams (list): Teams to remove
         weights (list): Optional custom weight list
+        strict (bool): Ignore changes that only come from how a tie is broken: a team now at a target
+            ranking with the same points as the target team it displaced shares that ranking with it,
+            as in process_year_week
     
     Returns:
         dict: Paradox information if found, None otherwise
@@ -123,85 +78,104 @@ def detect_paradox(year, week, target_rankings, removed_teams, weights=None):
     if data is None:
         return None
         
-    removal_effects, original_scores, original_teams = data
+    tables, _ = data
+    election = tables.election
     
     # Get target teams
-    target_teams = [original_teams[i - 1] for i in target_rankings]
+    target_ids = tables.official_order[[i - 1 for i in target_rankings]]
     
-    # Recalculate scores with removals
-    new_scores = original_scores.copy()
+    # Recalculate scores with removals, only the teams at the target rankings are picked from the new ranking
+    removed_ids = election.ids(removed_teams)
+    scores = tables.scores_after_removal(removed_ids)
+    new_target_ids = tables.ids_after_removal(removed_ids, target_rankings, scores)
     
-    # Apply all adjustments from removed teams
-    for removed_team in removed_teams:
-        effects = removal_effects[removed_team]
-        for team, adjustment in effects.items():
-            if team in new_scores and team not in removed_teams:
-                new_scores[team] += adjustment
-    
-    # Remove scores for removed teams
-    for team in removed_teams:
-        new_scores.pop(team, None)
-    
-    # Get new rankings
-    sorted_teams = sorted(new_scores.items(), key=lambda x: x[1], reverse=True)
-    sorted_teams = [team for team, _ in sorted_teams]
-    
-    # Compare new positions for target teams
-    new_target_teams = [sorted_teams[i - 1] for i in target_rankings]
-    
-    if new_target_teams != target_teams:
-        # Get original rankings of removed teams
-        removed_rankings = [original_teams.index(team) + 1 for team in removed_teams]
-        # Get original rankings of new target teams
-        new_rankings = [original_teams.index(team) + 1 for team in new_target_teams]
-        
-        return {
-            'Season': str(year),
-            'Week': str(week),
-            'Removed-Teams': tuple(removed_teams),
-            'RT-Ranking': tuple(removed_rankings),
-            'Original-Teams': tuple(target_teams),
-            'Original-Rankings': tuple(target_rankings),
-            'New-Teams': tuple(new_target_teams),
-            'New-Rankings': tuple(new_rankings)
-        }
+    if target_changed(scores, target_ids, new_target_ids, removed_ids, strict):
+        return paradox_record(year, week, tables.official, target_rankings, removed_teams,
+                              election.decode(new_target_ids))
         
     return None
 
-def process_year_week(year, week, target_rankings, remove_amount, weights):
-    """Process a specific year and week for paradoxes."""
+def paradox_record(year, week, ranking, target_rankings, removed_teams, new_target_teams):
+    """
+    Build the output row of one paradox (a removal that changed the target teams).
+    `ranking` is the official ranking of the week (tables.official), whose lookups need no list scan.
+    """
+    target_teams = ranking.names_at(target_rankings)
+    # Get original rankings of removed teams
+    removed_rankings = ranking.ranks_of(removed_teams)
+    # Get original rankings of new target teams
+    new_rankings = ranking.ranks_of(new_target_teams)
+    
+    return {
+        'Season': str(year),
+        'Week': str(week),
+        'Removed-Teams': tuple(removed_teams),
+        'RT-Ranking': tuple(removed_rankings),
+        'Original-Teams': tuple(target_teams),
+        'Original-Rankings': tuple(target_rankings),
+        'New-Teams': tuple(new_target_teams),
+        'New-Rankings': tuple(new_rankings)
+    }
+
+def process_year_week(year, week, target_rankings, remove_amount, weights, max_eligible=10, prune=True,
+                      result_queue=None, task=0, index_range=None, gray=False):
+    """
+    Process a specific year and week for paradoxes.
+    
+    Args:
+        max_eligible (int): Number of highest-ranked non-target teams that may be removed
+        prune (bool): Skip groups of removals that provably cannot change the target teams (branch and bound),
+            which keeps remove_amount of 4-6 over the top 25 practical
+        result_queue: When given, the paradox records are sent in batches to the parent's sink while the search
+            runs (see src/common/result_sink.py) and only their number is returned
+        task (int): Position of this year/week in the submission order, sent along with the records
+        index_range (tuple): (start, stop), only check these removal combinations (one chunk of the year/week,
+            see src/common/combination_chunks.py); all of them by default
+        gray (bool): Without prune, walk the removals in revolving-door order, swapping one team per step, and
+            update the scores incrementally (see iia_engine.iter_iia_gray); index_range then counts in that order
+    """
     start_time = time.time()
     
     try:
         # Load data
         data = load_or_preprocess_data(year, week, weights)
         if data is None:
-            return []
+            return [] if result_queue is None else 0
             
-        _, _, all_teams = data
+        tables, all_teams = data
+        election = tables.election
         
         # Remove target teams from consideration
         eligible_teams = [team for i, team in enumerate(all_teams) 
-                        if i + 1 not in target_rankings][:10]
+                        if i + 1 not in target_rankings][:max_eligible]
         
-        # Check all possible combinations of removals
-        results = []
-        for teams_to_remove in combinations(eligible_teams, remove_amount):
-            result = detect_paradox(year, week, target_rankings, 
-                                 list(teams_to_remove), weights)
-            if result:
-                results.append(result)
+        # Check all possible combinations of removals, the target ranks are compared without shifting
+        violations = iter_iia(tables, target_rankings, election.ids(eligible_teams), remove_amount,
+                              adjust_ranks=False, prune=prune, index_range=index_range, gray=gray)
+        records = (paradox_record(year, week, tables.official, target_rankings,
+                                  election.decode(removed_ids), election.decode(new_target_ids))
+                   for removed_ids, new_target_ids in violations)
+        if result_queue is None:
+            results = list(records)
+        else:
+            results = send_records(result_queue, task, records)
                 
         elapsed_time = time.time() - start_time
-        print(f"Processed year {year}, week {week} in {elapsed_time:.2f} seconds")
+        chunk = '' if index_range is None else f" (combinations {index_range[0]}-{index_range[1]})"
+        print(f"Processed year {year}, week {week}{chunk} in {elapsed_time:.2f} seconds")
         
         return results
         
     except Exception as e:
         print(f'Error processing {year} week {week}: {e}')
-        return []
+        return [] if result_queue is None else 0
 
-def analyze_all_paradoxes(target_rankings, remove_amount, weights=None):
+def eligible_count(election, target_rankings, max_eligible):
+    """Number of teams process_year_week may remove from one poll week."""
+    n_teams = election.n_candidates
+    return max(0, min(max_eligible, n_teams - sum(1 for rank in target_rankings if rank <= n_teams)))
+
+def analyze_all_paradoxes(target_rankings, remove_amount, weights=None, max_eligible=10, prune=True, gray=False):
     """
     Analyze paradoxes across all seasons and weeks using parallel processing.
     
@@ -209,35 +183,49 @@ def analyze_all_paradoxes(target_rankings, remove_amount, weights=None):
         target_rankings (list): Rankings to analyze
         remove_amount (int): Number of teams to remove
         weights (list): Optional custom weight list
+        max_eligible (int): Number of highest-ranked non-target teams that may be removed
+        prune (bool): Use the branch-and-bound search, see process_year_week
+        gray (bool): Use the revolving-door search when prune is off, see process_year_week; paradoxes with
+            the same New-Rankings may be listed in a different order
     """
     if weights is None:
         weights = rank_points
         
-    all_results = []
+    output_path = f"./src/college-polls/Borda/IIA_results/temp_output_{target_rankings}_{remove_amount}.csv"
+    if max_eligible != 10:
+        output_path = output_path.replace('.csv', f'_eligible{max_eligible}.csv')
     
-    with ProcessPoolExecutor() as executor:
-        futures = [
-            executor.submit(process_year_week, year, week, target_rankings, remove_amount, weights)
-            for year in range(2014, 2025)
-            for week in range(1, 18)
-        ]
-        
-        for future in futures:
-            try:
-                results = future.result()
-                all_results.extend(results)
-            except Exception as e:
-                print(f'Error collecting results: {e}')
+    # Every poll is loaded once here and shared with the workers through shared memory.
+    # The workers stream their paradox records through a queue into a sink that sorts on New-Rankings
+    # with sorted runs on disk, so memory stays flat however many paradoxes are found.
+    # Every year/week is cut into chunks of about the same number of removal combinations, so a big week
+    # does not keep one worker busy while the others sit idle; idle workers take the next queued chunk
+    polls = load_all_polls()
+    year_weeks = [(year, week) for year in range(2014, 2025) for week in range(1, 18)]
+    pool_sizes = [eligible_count(polls[key], target_rankings, max_eligible) if key in polls else 0
+                  for key in year_weeks]
+    with BallotArena('poll', polls) as arena, Manager() as manager, \
+            ExternalSortCSV(output_path, 'New-Rankings') as sink:
+        result_queue = manager.Queue(maxsize=64)
+        with ProcessPoolExecutor(initializer=attach_arena, initargs=(arena.spec,)) as executor:
+            # Biggest weeks first; the task numbers follow year/week order, so the output order is unchanged
+            futures = [
+                executor.submit(process_year_week, *year_weeks[i], target_rankings, remove_amount, weights, max_eligible, prune,
+                                result_queue, task, (start, stop), gray)
+                for task, i, start, stop in plan_chunks(pool_sizes, remove_amount)
+            ]
+            receive_records(result_queue, sink, futures)
+            
+            for future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f'Error collecting results: {e}')
     
-    if all_results:
-        results_df = pd.DataFrame(all_results)
-        results_df.sort_values(by='New-Rankings', ascending=False, inplace=True)
-        
-        output_path = f"./src/college-polls/Borda/IIA_results/temp_output_{target_rankings}_{remove_amount}.csv"
-        results_df.to_csv(output_path, index=False)
-        print(f"Results saved to {output_path}")
-    else:
-        print("No paradoxes found.")
+        if sink.close():
+            print(f"Results saved to {output_path}")
+        else:
+            print("No paradoxes found.")
 
 if __name__ == '__main__':
     analyze_all_paradoxes([1, 2, 3, 4, 5], 2)
@@ -0,0 +1,26 @@
+import pandas as pd
+import sys
+
+sys.path.append('./src/common')
+from ballot_store import load_poll_election, poll_election_keys
+from borda_scoring import POLL_SCHEMES
+from voter_jackknife import voter_jackknife, pivotal_voters
+
+# Function to list, for every season and week, the pollsters whose ballot alone decides the top team or the
+# top N of the AP poll: leaving that one ballot out changes them. Ties keep the rank-column order of the results
+def poll_voter_jackknife(top_n, scheme='top25'):
+    results = []
+
+    for year, week in poll_election_keys():
+        # Every leave-one-out poll of this week is scored and ranked at once
+        jackknife = voter_jackknife(load_poll_election(year, week), POLL_SCHEMES[scheme], top_n, by_position=True)
+        results.append(pivotal_voters(jackknife, top_n).assign(Season=year, Week=week))
+
+    output_file = f"./src/college-polls/Borda/voter-jackknife-{scheme}-top{top_n}.csv"
+    pivotal = pd.concat(results, ignore_index=True)
+    pivotal[['Season', 'Week'] + list(pivotal.columns[:-2])].to_csv(output_file, index=False)
+    print(f"Results saved to {output_file}")
+
+
+if __name__ == '__main__':
+    poll_voter_jackknife(1)
@@ -1,47 +1,47 @@
 import pandas as pd
+import sys
 
-def find_condorcet_winner(week, year, top_n):
-    try:
-        borda_path = f'./src/college-polls/Borda/results/borda_top25/season_{year}/{year}_week{week}_top25.csv'
-        borda_results = pd.read_csv(borda_path)
-    except Exception as e:
-        print(f"Error reading Borda results for week {week}, year {year}: {e}")
-        return None
+sys.path.append('./src/common')
+from ballot_store import load_poll_election, poll_election_keys
+from borda_scoring import POLL_SCHEMES, borda_tables
+from pairwise_matrix import pairwise_matrix
+from majority_relation import majority_sets
+from bootstrap_paradoxes import bootstrap_paradoxes
+
+
+def majority_results(week, year):
+    """
+    Borda ranking (top25 weights) and majority relation of one poll, from a single pass over its ballots.
+
+    Returns:
+        tuple: (list of teams in Borda order, dict of majority_sets with the ids decoded to names)
+
+    Raises:
+        FileNotFoundError: when there is no poll for that week
+    """
+    election = load_poll_election(year, week)
+    borda_results = borda_tables(election, {'top25': POLL_SCHEMES['top25']}, name_column='Teams', by_position=True)['top25']
+
+    sets = majority_sets(pairwise_matrix(election))
+    for key in ('Condorcet Winner', 'Condorcet Loser'):
+        sets[key] = None if sets[key] is None else election.names[sets[key]]
+    for key in ('Smith Set', 'Schwartz Set'):
+        sets[key] = election.decode(sets[key])
+
+    return borda_results['Teams'].tolist(), sets
 
-    try:
-        top_players = borda_results['Teams'].head(top_n).tolist()
-    except Exception as e:
-        print(f"Error processing top players for week {week}, year {year}: {e}")
-        return None
 
+def find_condorcet_winner(week, year, top_n):
     try:
-        pairwise_path = f'./src/college-polls/Pairwise/results/season_{year}/{year}_week{week}_condorcet.csv'
-        pairwise_results = pd.read_csv(pairwise_path)
+        borda_ranking, sets = majority_results(week, year)
     except Exception as e:
-        print(f"Error reading pairwise results for week {week}, year {year}: {e}")
+        print(f"Error reading ballots for week {week}, year {year}: {e}")
         return None
 
-    # Check each top player to see if they win against all other top players
-    for player in top_players:
-        is_condorcet_winner = True
-        try:
-            # Loop through each row in pairwise results and check outcomes for the current player
-            for _, row in pairwise_results.iterrows():
-                if row['TeamA'] == player:
-                    if row['A>B'] <= row['B>A']:
-                        is_condorcet_winner = False
-                        break
-                elif row['TeamB'] == player:
-                    if row['B>A'] <= row['A>B']:
-                        is_condorcet_winner = False
-                        break
-        except Exception as e:
-            print(f"Error evaluating player {player} in week {week}, year {year}: {e}")
-            continue
-
-        # If player wins against all others in pairwise, return as the Condorcet winner
-        if is_condorcet_winner:
-            return player
+    # The Condorcet winner (beats every other team head to head), if it is one of the top_n Borda teams
+    top_players = borda_ranking[:top_n]
+    if sets['Condorcet Winner'] in top_players:
+        return sets['Condorcet Winner']
 
     # If no Condorcet winner found, return None
     return None
@@ -53,18 +53,13 @@ def borda_condorcet():
     for year in range(2014, 2025):
         for week in range(1, 18):
             try:
-                # Find Borda winner
-                borda_path = f'./src/college-polls/Borda/results/borda_top25/season_{year}/{year}_week{week}_top25.csv'
-                borda_results = pd.read_csv(borda_path)
-                borda_winner = borda_results['Teams'].iloc[0]
+                # Find Borda winner and Condorcet winner (among the top 3) with one majority computation
+                borda_ranking, sets = majority_results(week, year)
+                borda_winner = borda_ranking[0]
+                condorcet_winner = sets['Condorcet Winner'] if sets['Condorcet Winner'] in borda_ranking[:3] else None
             except Exception as e:
-                print(f"Error finding Borda winner for week {week}, year {year}: {e}")
+                print(f"Error finding Borda and Condorcet winners for week {week}, year {year}: {e}")
                 borda_winner = None
-
-            try:
-                condorcet_winner = find_condorcet_winner(week, year, top_n=3)
-            except Exception as e:
-                print(f"Error finding Condorcet winner for week {week}, year {year}: {e}")
                 condorcet_winner = None
 
             if condorcet_winner is None:
@@ -89,5 +84,35 @@ def borda_condorcet():
         print(f"Error saving results to CSV: {e}")
 
 
+def bootstrap_paradox_frequency(n_samples=10000, target_rankings=(1, 2, 3), max_eligible=10, seed=0):
+    """
+    How often IIA (one team removed, as in analyze_all_paradoxes), Borda/Condorcet disagreement and Condorcet
+    cycles occur when each poll's ballots are resampled with replacement, with 95% confidence intervals.
+
+    Args:
+        n_samples (int): bootstrap polls per week
+        target_rankings (tuple): rankings a removal must not change (compared without shifting)
+        max_eligible (int): number of highest-ranked non-target teams that may be removed
+        seed (int): seed of the resampling
+    """
+    results = []
+
+    for year, week in poll_election_keys():
+        election = load_poll_election(year, week)
+        removal_ranks = [rank for rank in range(1, election.n_candidates + 1)
+                         if rank not in target_rankings][:max_eligible]
+        frequencies = bootstrap_paradoxes(election, POLL_SCHEMES['top25'], n_samples, seed, target_rankings,
+                                          removal_ranks, adjust_ranks=False, by_position=True)
+        results.append(frequencies.assign(Year=year, Week=week))
+
+    try:
+        results_df = pd.concat(results, ignore_index=True)
+        results_df = results_df[['Year', 'Week'] + list(results_df.columns[:-2])]
+        results_df.to_csv("./src/college-polls/Pairwise/bootstrap_paradox_frequency_cf.csv", index=False)
+    except Exception as e:
+        print(f"Error saving results to CSV: {e}")
+
+
 # Call the function
-borda_condorcet()
+if __name__ == '__main__':
+    borda_condorcet()
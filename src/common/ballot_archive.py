@@ -0,0 +1,141 @@
+import os
+import numpy as np
+from ballot_store import (Election, MVP_LEAGUES, mvp_election_keys, poll_election_keys,
+                          mvp_ballot_path, poll_ballot_path, read_mvp_election, read_poll_election)
+
+"""
+Columnar archive of every MVP and AP-poll ballot.
+
+build_archive() packs all ballot CSVs into a handful of .npy columns in ARCHIVE_DIR:
+    <kind>_ballots.npy   int16, every election's ballot rows stacked (candidate ids local to the election)
+    <kind>_names.npy     str, every election's candidate table stacked
+    <kind>_voters.npy    str, every election's voter names stacked
+    <kind>_index.npy     int64, one row per election, see INDEX_COLUMNS
+with kind = 'mvp' or 'poll'. The files are memory-mapped by BallotArchive, so pulling one election
+is a slice of the mapped arrays, with no CSV parsing.
+
+The index keeps the size and modification time of each source CSV; an election whose CSV changed
+since the archive was built is reported as missing, so callers fall back to the CSV.
+"""
+
+ARCHIVE_DIR = './data/ballot_archive'
+
+INDEX_COLUMNS = ['key0', 'key1', 'ballot_start', 'ballot_stop', 'name_start', 'name_stop',
+                 'voter_start', 'voter_stop', 'source_size', 'source_mtime_ns']
+KEY0, KEY1, BALLOT_START, BALLOT_STOP, NAME_START, NAME_STOP, VOTER_START, VOTER_STOP, SOURCE_SIZE, SOURCE_MTIME = range(len(INDEX_COLUMNS))
+
+
+def _encode_key(kind, key):
+    # Leagues are stored as their position in MVP_LEAGUES so the index stays numeric
+    if kind == 'mvp':
+        return key[0], MVP_LEAGUES.index(key[1])
+    return key
+
+
+def _decode_key(kind, key0, key1):
+    if kind == 'mvp':
+        return int(key0), MVP_LEAGUES[key1]
+    return int(key0), int(key1)
+
+
+def _source_path(kind, key):
+    return mvp_ballot_path(*key) if kind == 'mvp' else poll_ballot_path(*key)
+
+
+def build_archive(archive_dir=ARCHIVE_DIR):
+    """
+    Conversion step: parse every ballot CSV once and write the columnar archive.
+
+    Args:
+        archive_dir (str): output directory, created if needed
+    """
+    os.makedirs(archive_dir, exist_ok=True)
+    sources = {
+        'mvp': [(key, read_mvp_election(*key)) for key in mvp_election_keys()],
+        'poll': [(key, read_poll_election(*key)) for key in poll_election_keys()],
+    }
+
+    for kind, elections in sources.items():
+        index = np.zeros((len(elections), len(INDEX_COLUMNS)), dtype=np.int64)
+        ballots, names, voters = [], [], []
+        n_ballots = n_names = n_voters = 0
+
+        for row, (key, election) in enumerate(elections):
+            stat = os.stat(_source_path(kind, key))
+            index[row] = [*_encode_key(kind, key),
+                          n_ballots, n_ballots + election.n_voters,
+                          n_names, n_names + election.n_candidates,
+                          n_voters, n_voters + election.n_voters,
+                          stat.st_size, stat.st_mtime_ns]
+            ballots.append(election.ballots)
+            names.extend(election.names)
+            voters.extend(election.voters)
+            n_ballots += election.n_voters
+            n_names += election.n_candidates
+            n_voters += election.n_voters
+
+        np.save(os.path.join(archive_dir, f'{kind}_ballots.npy'), np.concatenate(ballots))
+        np.save(os.path.join(archive_dir, f'{kind}_names.npy'), np.array(names, dtype=str))
+        np.save(os.path.join(archive_dir, f'{kind}_voters.npy'), np.array(voters, dtype=str))
+        np.save(os.path.join(archive_dir, f'{kind}_index.npy'), index)
+        print(f"{len(elections)} {kind} elections saved to {archive_dir}")
+
+
+class BallotArchive:
+    """
+    Read side of the archive. All columns are opened with mmap_mode='r'; a kind without files
+    (e.g. a synthetic archive holding only poll elections) has no keys.
+
+    Args:
+        archive_dir (str): directory written by build_archive
+    """
+
+    def __init__(self, archive_dir=ARCHIVE_DIR):
+        self.archive_dir = archive_dir
+        self._columns = {}
+        self._rows = {}
+        for kind in ('mvp', 'poll'):
+            self._rows[kind] = {}
+            if not os.path.exists(os.path.join(archive_dir, f'{kind}_index.npy')):
+                continue
+            columns = {column: np.load(os.path.join(archive_dir, f'{kind}_{column}.npy'), mmap_mode='r')
+                       for column in ('ballots', 'names', 'voters', 'index')}
+            self._columns[kind] = columns
+            self._rows[kind] = {_decode_key(kind, *row[[KEY0, KEY1]]): i for i, row in enumerate(columns['index'])}
+
+    @staticmethod
+    def exists(archive_dir=ARCHIVE_DIR):
+        return all(os.path.exists(os.path.join(archive_dir, f'{kind}_index.npy')) for kind in ('mvp', 'poll'))
+
+    def keys(self, kind):
+        """Election keys stored for 'mvp' or 'poll', in archive order."""
+        return list(self._rows[kind])
+
+    def is_current(self, kind, key):
+        """True when the election is archived and its source CSV is unchanged since the build."""
+        if key not in self._rows[kind]:
+            return False
+        row = self._columns[kind]['index'][self._rows[kind][key]]
+        try:
+            stat = os.stat(_source_path(kind, key))
+        except FileNotFoundError:
+            return False
+        return stat.st_size == row[SOURCE_SIZE] and stat.st_mtime_ns == row[SOURCE_MTIME]
+
+    def election(self, kind, key):
+        """
+        One election as an Election whose ballot matrix is a view into the memory-mapped column.
+
+        Raises:
+            KeyError: when the election is not in the archive
+        """
+        columns = self._columns[kind]
+        row = columns['index'][self._rows[kind][key]]
+        ballots = columns['ballots'][row[BALLOT_START]:row[BALLOT_STOP]]
+        names = columns['names'][row[NAME_START]:row[NAME_STOP]].tolist()
+        voters = columns['voters'][row[VOTER_START]:row[VOTER_STOP]].tolist()
+        return Election(key, names, voters, ballots)
+
+
+if __name__ == '__main__':
+    build_archive()
@@ -0,0 +1,120 @@
+import numpy as np
+from multiprocessing import shared_memory
+import ballot_store
+from ballot_store import Election
+
+"""
+Shared-memory ballot arena for the ProcessPoolExecutor scanners.
+
+The parent process loads the elections once and copies their encoded ballots, rank-position tables
+and position-count tables into a single multiprocessing.shared_memory block:
+    ballots      int16, every election's ballot rows stacked (voters x rank positions)
+    positions    int16, every election's rank_positions() table, flattened one after the other
+    counts       int64, every election's position_counts() table, stacked (candidates x rank positions)
+Workers attach to the block in the pool initializer. From then on load_mvp_election / load_poll_election
+in the worker return Elections whose arrays are views into the block, so nothing is re-read or copied
+and only the small result records travel back to the parent.
+
+Usage:
+    with BallotArena('mvp', load_all_mvp()) as arena:
+        with ProcessPoolExecutor(initializer=attach_arena, initargs=(arena.spec,)) as executor:
+            ...
+"""
+
+# Byte alignment of the three regions inside the block
+ALIGN = 8
+
+
+def _aligned(n_bytes):
+    return -(-n_bytes // ALIGN) * ALIGN
+
+
+class BallotArena:
+    """
+    Parent side: owns the shared-memory block and unlinks it on close().
+
+    Args:
+        kind (str): 'mvp' or 'poll', the loader the workers will be served through
+        elections (dict): election key -> Election, e.g. load_all_mvp()
+
+    Attributes:
+        spec (dict): small picklable description of the block (name, layout and candidate / voter names),
+            passed to attach_arena in every worker
+    """
+
+    def __init__(self, kind, elections):
+        elections = list(elections.values())
+        length = elections[0].ballot_length if elections else 0
+
+        # Layout: offsets are in elements of each region's dtype
+        entries = []
+        n_ballots = n_positions = n_counts = 0
+        for election in elections:
+            entries.append((election.key, election.names, election.voters, n_ballots, n_positions, n_counts))
+            n_ballots += election.n_voters
+            n_positions += election.n_candidates * election.n_voters
+            n_counts += election.n_candidates
+        ballots_bytes = _aligned(n_ballots * length * np.dtype(np.int16).itemsize)
+        positions_bytes = _aligned(n_positions * np.dtype(np.int16).itemsize)
+        counts_bytes = n_counts * length * np.dtype(np.int64).itemsize
+
+        self._shm = shared_memory.SharedMemory(create=True, size=max(ballots_bytes + positions_bytes + counts_bytes, 1))
+        self.spec = {
+            'name': self._shm.name,
+            'kind': kind,
+            'ballot_length': length,
+            'sizes': (n_ballots, n_positions, n_counts),
+            'entries': entries,
+        }
+
+        ballots, positions, counts = _regions(self._shm, self.spec)
+        for election, (_, _, _, ballot_start, position_start, count_start) in zip(elections, entries):
+            n, v = election.n_candidates, election.n_voters
+            ballots[ballot_start:ballot_start + v] = election.ballots
+            positions[position_start:position_start + n * v] = election.rank_positions().ravel()
+            counts[count_start:count_start + n] = election.position_counts()
+
+    def close(self):
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _regions(shm, spec):
+    # The three arrays of the block, as views
+    length = spec['ballot_length']
+    n_ballots, n_positions, n_counts = spec['sizes']
+    ballots = np.ndarray((n_ballots, length), dtype=np.int16, buffer=shm.buf)
+    offset = _aligned(ballots.nbytes)
+    positions = np.ndarray(n_positions, dtype=np.int16, buffer=shm.buf, offset=offset)
+    offset += _aligned(positions.nbytes)
+    counts = np.ndarray((n_counts, length), dtype=np.int64, buffer=shm.buf, offset=offset)
+    return ballots, positions, counts
+
+
+# Block attached by this worker process, kept referenced so the views stay valid
+_attached = []
+
+
+def attach_arena(spec):
+    """
+    Worker side (use as the ProcessPoolExecutor initializer): attach to the block and register its
+    elections with ballot_store, with the rank-position and count tables already filled in.
+    """
+    shm = shared_memory.SharedMemory(name=spec['name'])
+    _attached.append(shm)
+    ballots, positions, counts = _regions(shm, spec)
+
+    elections = {}
+    for key, names, voters, ballot_start, position_start, count_start in spec['entries']:
+        n, v = len(names), len(voters)
+        election = Election(key, names, voters, ballots[ballot_start:ballot_start + v])
+        election._rank_positions = positions[position_start:position_start + n * v].reshape(n, v)
+        election._position_counts = counts[count_start:count_start + n]
+        elections[key] = election
+    ballot_store.share_elections(spec['kind'], elections)
@@ -0,0 +1,335 @@
+import os
+import glob
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+"""
+Shared ballot store for the baseball MVP and college-poll analyses.
+
+Every ballot file is parsed once into an integer matrix (voters x rank positions) holding
+candidate IDs, together with a name <-> id table. Borda, pairwise and IIA code can then work
+on the matrix with vectorized NumPy arithmetic instead of walking string DataFrames with iterrows().
+
+Paths are relative to the repository root, like the rest of the scripts.
+"""
+
+MVP_BALLOT_DIR = './data/baseball/processed_data/mvp_ballots_by_year'
+POLL_BALLOT_DIR = './data/college-polls/processed_data/ballot_data_by_season_and_week'
+
+MVP_YEARS = range(2012, 2024)   # 2012-2023
+MVP_LEAGUES = ["AL", "NL"]
+POLL_SEASONS = range(2014, 2025)   # 2014-2024
+POLL_WEEKS = range(1, 18)
+
+MVP_RANK_COLUMNS = ['1st', '2nd', '3rd', '4th', '5th', '6th', '7th', '8th', '9th', '10th']
+POLL_RANK_COLUMNS = ['1st', '2nd', '3rd', '4th', '5th', '6th', '7th', '8th', '9th', '10th',
+                     '11th', '12th', '13th', '14th', '15th', '16th', '17th', '18th', '19th', '20th',
+                     '21st', '22nd', '23rd', '24th', '25th']
+
+# Candidate id stored in a ballot slot that was left blank
+EMPTY = -1
+# Rank of a candidate missing from a Ranking
+UNRANKED = 0
+
+
+class Election:
+    """
+    One election (a (year, league) MVP vote or a (season, week) AP poll) in integer-encoded form.
+
+    Attributes:
+        key (tuple): (year, league) or (season, week)
+        names (list): candidate names, index = candidate id (sorted alphabetically)
+        name_to_id (dict): candidate name -> candidate id
+        voters (list): voter (writer / pollster) names, index = ballot row
+        ballots (np.ndarray): int16 matrix (voters x rank positions) of candidate ids, EMPTY for blanks
+    """
+
+    def __init__(self, key, names, voters, ballots):
+        self.key = key
+        self.names = list(names)
+        self.name_to_id = {name: i for i, name in enumerate(self.names)}
+        self.voters = list(voters)
+        self.ballots = ballots
+        self._position_counts = None
+        self._rank_positions = None
+
+    @property
+    def n_candidates(self):
+        return len(self.names)
+
+    @property
+    def n_voters(self):
+        return self.ballots.shape[0]
+
+    @property
+    def ballot_length(self):
+        return self.ballots.shape[1]
+
+    def ids(self, names):
+        """Translate a list of candidate names into an int array of candidate ids."""
+        return np.array([self.name_to_id[name] for name in names], dtype=np.intp)
+
+    def decode(self, ids):
+        """Translate candidate ids back into names."""
+        return [self.names[i] for i in ids]
+
+    def position_counts(self):
+        """
+        Count table of shape (candidates x rank positions): entry [c, p] is the number of
+        ballots that put candidate c in position p. Computed once and cached.
+        """
+        if self._position_counts is None:
+            n, length = self.n_candidates, self.ballot_length
+            filled = self.ballots != EMPTY
+            # Flatten (candidate, position) into one bin index so a single bincount fills the table
+            cells = self.ballots.astype(np.intp) * length + np.arange(length)
+            counts = np.bincount(cells[filled], minlength=n * length)
+            self._position_counts = counts.reshape(n, length)
+        return self._position_counts
+
+    def rank_positions(self):
+        """
+        Position of every candidate on every ballot, shape (candidates x voters).
+        Candidates left off a ballot get ballot_length, i.e. they sit below every ranked candidate.
+        Computed once and cached.
+        """
+        if self._rank_positions is None:
+            positions = np.full((self.n_candidates, self.n_voters), self.ballot_length, dtype=np.int16)
+            voter_idx, position_idx = np.nonzero(self.ballots != EMPTY)
+            positions[self.ballots[voter_idx, position_idx], voter_idx] = position_idx
+            self._rank_positions = positions
+        return self._rank_positions
+
+    def ranking(self, order, scores=None):
+        """
+        Ranking of this election from candidate ids in ranking order (rank 1 first).
+        With the scores (by candidate id) the ranking also knows its ties, see Ranking.tie_groups.
+        """
+        return Ranking(self, order, scores=scores)
+
+    def ranking_by_names(self, names):
+        """
+        Ranking from candidate names in ranking order, e.g. the rows of an official results file.
+        Rank = position in `names`; names that are not on any ballot are skipped without closing the gap.
+        """
+        ranks = {self.name_to_id[name]: rank for rank, name in enumerate(names, start=1) if name in self.name_to_id}
+        return Ranking(self, list(ranks), list(ranks.values()))
+
+    def __repr__(self):
+        return f"Election({self.key}, candidates={self.n_candidates}, voters={self.n_voters}, length={self.ballot_length})"
+
+
+def shared_ranks(scores, order):
+    """
+    Ranks with ties shared ("1224" competition ranking): every candidate of a group with equal scores
+    gets the best rank of the group.
+
+    Args:
+        scores (np.ndarray): score per candidate id
+        order (np.ndarray): candidate ids in ranking order (best first)
+
+    Returns:
+        np.ndarray: shared rank (1-based) of every entry of `order`, by position
+    """
+    ordered = np.asarray(scores)[order]
+    first_of_group = np.ones(len(ordered), dtype=bool)
+    first_of_group[1:] = ordered[1:] != ordered[:-1]
+    return np.maximum.accumulate(np.where(first_of_group, np.arange(1, len(ordered) + 1), 0))
+
+
+class Ranking:
+    """
+    An ordering of the candidates of one election with O(1) lookups in both directions,
+    built once so that scanning loops never filter a DataFrame to find a rank or a name.
+
+    Attributes:
+        election (Election): election the candidate ids belong to
+        order (np.ndarray): candidate ids in ranking order (rank 1 first)
+        rank (np.ndarray): rank (1-based) of every candidate id, UNRANKED for candidates not in `order`
+        names (list): candidate names in ranking order
+        shared_rank (np.ndarray): rank of every candidate id with ties shared (equal scores get the best rank
+            of their group), only when the ranking was built with scores; None otherwise
+    """
+
+    def __init__(self, election, order, ranks=None, scores=None):
+        self.election = election
+        self.order = np.asarray(order, dtype=np.intp)
+        self.rank = np.full(election.n_candidates, UNRANKED, dtype=np.intp)
+        self.rank[self.order] = np.arange(1, len(self.order) + 1) if ranks is None else ranks
+        self.names = election.decode(self.order)
+        self.shared_rank = None
+        if scores is not None:
+            self.shared_rank = np.full(election.n_candidates, UNRANKED, dtype=np.intp)
+            self.shared_rank[self.order] = shared_ranks(scores, self.order)
+
+    def __len__(self):
+        return len(self.order)
+
+    def rank_of(self, name):
+        """Rank of one candidate name, UNRANKED when it is not ranked."""
+        candidate = self.election.name_to_id.get(name)
+        return UNRANKED if candidate is None else int(self.rank[candidate])
+
+    def ranks_of(self, names):
+        """Ranks of a list of candidate names."""
+        return [self.rank_of(name) for name in names]
+
+    def ids_at(self, ranks):
+        """Candidate ids at a list of (1-based) ranks."""
+        return self.order[np.asarray(ranks, dtype=np.intp) - 1]
+
+    def names_at(self, ranks):
+        """Candidate names at a list of (1-based) ranks."""
+        return self.election.decode(self.ids_at(ranks))
+
+    def tie_groups(self):
+        """
+        Groups of tied candidates (two or more with equal scores) as lists of names in ranking order,
+        best group first. Needs a ranking built with scores.
+        """
+        shared = self.shared_rank[self.order]
+        bounds = np.append(np.flatnonzero(np.diff(shared, prepend=UNRANKED)), len(self))
+        return [self.names[start:stop] for start, stop in zip(bounds[:-1], bounds[1:]) if stop - start > 1]
+
+    def __repr__(self):
+        return f"Ranking({self.election.key}, ranked={len(self)})"
+
+
+def encode_ballots(rankings, names=None):
+    """
+    Encode a 2-D array of candidate names into candidate ids.
+
+    Args:
+        rankings (array-like): voters x rank positions array of names, blanks as NaN or ''
+        names (list): optional fixed candidate list; defaults to the sorted names on the ballots
+
+    Returns:
+        tuple: (ballots, names) with ballots an int16 matrix and names the id -> name list
+    """
+    rankings = np.asarray(rankings, dtype=object)
+    cells = pd.Series(rankings.ravel()).str.strip().replace('', np.nan)
+
+    if names is None:
+        names = sorted(cells.dropna().unique())
+    # Categorical codes give every name its index in `names` in one pass, and -1 (EMPTY) for blanks
+    codes = pd.Categorical(cells, categories=names).codes
+    ballots = codes.astype(np.int16).reshape(rankings.shape)
+    return ballots, list(names)
+
+
+def mvp_ballot_path(year, league):
+    return f'{MVP_BALLOT_DIR}/{year}_{league}_votes.csv'
+
+
+def poll_ballot_path(year, week):
+    return f'{POLL_BALLOT_DIR}/season_{year}/{year}_week{week}_top25.csv'
+
+
+def read_mvp_election(year, league, path=None):
+    """Parse one MVP ballot CSV (by default the one of mvp_ballot_path) into an Election (no caching, no archive)."""
+    df = pd.read_csv(path or mvp_ballot_path(year, league), usecols=['Name'] + MVP_RANK_COLUMNS)
+    ballots, names = encode_ballots(df[MVP_RANK_COLUMNS].values)
+    return Election((year, league), names, df['Name'].tolist(), ballots)
+
+
+def read_poll_election(year, week, path=None):
+    """Parse one AP-poll ballot CSV (by default the one of poll_ballot_path) into an Election (no caching, no archive)."""
+    df = pd.read_csv(path or poll_ballot_path(year, week))
+    ballots, names = encode_ballots(df[POLL_RANK_COLUMNS].values)
+    return Election((year, week), names, df['Pollster'].tolist(), ballots)
+
+
+@lru_cache(maxsize=None)
+def _archive():
+    # The columnar archive is optional: use it when it has been built (see ballot_archive.py)
+    from ballot_archive import BallotArchive
+    return BallotArchive() if BallotArchive.exists() else None
+
+
+# Elections served from a shared-memory arena in a worker process, (kind, key) -> Election (see ballot_arena.py)
+_shared = {}
+
+
+def share_elections(kind, elections):
+    """
+    Serve the given elections from the loaders instead of reading them again.
+
+    Args:
+        kind (str): 'mvp' or 'poll'
+        elections (dict): election key -> Election
+    """
+    _shared.update({(kind, key): election for key, election in elections.items()})
+    load_mvp_election.cache_clear()
+    load_poll_election.cache_clear()
+
+
+def _load_election(kind, key, read):
+    if (kind, key) in _shared:
+        return _shared[(kind, key)]
+    archive = _archive()
+    if archive is not None and archive.is_current(kind, key):
+        return archive.election(kind, key)
+    return read(*key)
+
+
+@lru_cache(maxsize=None)
+def load_mvp_election(year, league):
+    """
+    Load one MVP vote from mvp_ballots_by_year. Loaded once per process and cached;
+    taken from the shared ballot arena in pool workers, else from the memory-mapped ballot archive
+    when it is built and up to date.
+
+    Args:
+        year (int): MVP year
+        league (str): 'AL' or 'NL'
+
+    Returns:
+        Election
+    """
+    return _load_election('mvp', (year, league), read_mvp_election)
+
+
+@lru_cache(maxsize=None)
+def load_poll_election(year, week):
+    """
+    Load one AP top-25 poll from ballot_data_by_season_and_week. Loaded once per process and cached;
+    taken from the shared ballot arena in pool workers, else from the memory-mapped ballot archive
+    when it is built and up to date.
+
+    Args:
+        year (int): season
+        week (int): week number
+
+    Returns:
+        Election
+
+    Raises:
+        FileNotFoundError: when there is no poll for that week
+    """
+    return _load_election('poll', (year, week), read_poll_election)
+
+
+def mvp_election_keys():
+    """All (year, league) pairs that have a ballot file."""
+    return [(year, league) for year in MVP_YEARS for league in MVP_LEAGUES
+            if os.path.exists(mvp_ballot_path(year, league))]
+
+
+def poll_election_keys():
+    """All (season, week) pairs that have a ballot file, in season/week order."""
+    keys = []
+    for path in glob.glob(f'{POLL_BALLOT_DIR}/season_*/*_week*_top25.csv'):
+        year, week = os.path.basename(path).replace('_top25.csv', '').split('_week')
+        keys.append((int(year), int(week)))
+    return sorted(keys)
+
+
+def load_all_mvp():
+    """Load every MVP election. Returns a dict (year, league) -> Election."""
+    return {key: load_mvp_election(*key) for key in mvp_election_keys()}
+
+
+def load_all_polls():
+    """Load every AP poll week. Returns a dict (season, week) -> Election."""
+    return {key: load_poll_election(*key) for key in poll_election_keys()}
@@ -0,0 +1,240 @@
+import numpy as np
+import pandas as pd
+from ballot_store import Election
+from borda_scoring import exact_weight_matrix, first_seen_order
+from voter_jackknife import ballot_contributions
+
+"""
+Bootstrap estimates of how often the paradoxes would occur if the electorate were drawn again.
+
+A bootstrap electorate draws n_voters ballots with replacement, i.e. multinomial counts over the distinct
+ballots of the election; no ballot is ever copied. Every statistic needed is linear in those counts:
+    - Borda scores: counts @ (points each distinct ballot gives each candidate)
+    - pairwise matrix: counts @ (which candidate each distinct ballot puts above which)
+    - scores after removing any one candidate: counts @ (each ballot's pair_delta, see iia_engine.py)
+so a chunk of samples costs three matrix multiplies, and the paradoxes are then read off the whole chunk
+with vectorized comparisons:
+    - IIA: removing one candidate of the removal pool changes the candidates at the target ranks
+      (single removals of detect_IIA_all / analyze_all_paradoxes, strict by default)
+    - Borda-Condorcet: a Condorcet winner exists among the Borda top 3 and is not the Borda winner
+      (Paradox = 2 in borda_condorcet)
+    - No-Condorcet-Winner: no Condorcet winner among the Borda top 3 (Paradox = 1 in borda_condorcet)
+    - Cycle: the majority graph has a Condorcet cycle of any size (see cycle_finder)
+Only the running number of occurrences is kept across chunks, so memory does not grow with the number of
+samples. The frequencies come with Wilson score intervals.
+
+All counts and scaled scores are integers below 2 ** 53, so the float64 (BLAS) products are exact.
+Ties are broken by the first-seen order of the observed election in every sample.
+"""
+
+PARADOXES = ('IIA', 'Borda-Condorcet', 'No-Condorcet-Winner', 'Cycle')
+
+# Cells of the largest per-chunk array (samples x candidates x candidates), about 8 MB of float64
+CHUNK_CELLS = 2 ** 20
+
+
+def distinct_ballots(election):
+    """
+    The distinct ballots of an election with their multiplicities.
+
+    Returns:
+        tuple: (int16 distinct ballots x rank positions matrix, int64 count of each)
+    """
+    ballots, counts = np.unique(election.ballots, axis=0, return_counts=True)
+    return ballots, counts.astype(np.int64)
+
+
+def has_cycle(graphs):
+    """
+    Whether each majority graph of a stack (samples x candidates x candidates, [a, b] = a beats b) has a cycle.
+
+    Graphs whose edges all go forward in the order of most wins are acyclic, which settles nearly every
+    sample with one comparison. The others are peeled exactly: candidates beaten by nobody left are removed
+    until none is, and whatever remains lies on a cycle.
+    """
+    n = graphs.shape[1]
+    # Place the candidates by decreasing wins; an edge from a later place to an earlier one is backward
+    order = np.argsort(-graphs.sum(axis=2), axis=1, kind='stable')
+    place = np.empty_like(order)
+    np.put_along_axis(place, order, np.arange(n)[None, :], axis=1)
+    backward = (graphs & (place[:, :, None] > place[:, None, :])).reshape(len(graphs), -1).any(axis=1)
+
+    cyclic = np.zeros(len(graphs), dtype=bool)
+    unsettled = np.flatnonzero(backward)
+    remaining = np.ones((len(unsettled), n), dtype=bool)
+    subgraphs = graphs[unsettled]
+    while True:
+        beaten = (subgraphs & remaining[:, :, None]).any(axis=1)
+        sources = remaining & ~beaten
+        if not sources.any():
+            break
+        remaining &= ~sources
+    cyclic[unsettled] = remaining.any(axis=1)
+    return cyclic
+
+
+def wilson_interval(successes, n, z=1.96):
+    """Wilson score interval of a binomial proportion (z = 1.96 for 95%). Returns (low, high)."""
+    if n == 0:
+        return np.nan, np.nan
+    p = successes / n
+    center = (p + z ** 2 / (2 * n)) / (1 + z ** 2 / n)
+    half = z * np.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2)) / (1 + z ** 2 / n)
+    return max(0.0, center - half), min(1.0, center + half)
+
+
+class BootstrapTables:
+    """
+    Per-distinct-ballot tables of an election; the statistics of an electorate given as counts over the
+    distinct ballots are counts @ table.
+
+    Attributes:
+        election (Election): election from ballot_store
+        ballots (np.ndarray): distinct ballots (distinct x rank positions)
+        counts (np.ndarray): multiplicity of every distinct ballot in the election
+        contributions (np.ndarray): float64 (distinct x candidates) scaled points each ballot gives
+        above (np.ndarray): float64 (distinct x candidates^2), [d, a * n + b] = 1 when ballot d puts a above b
+        pair_delta (np.ndarray): float64 (distinct x candidates^2), [d, r * n + c] = change of c's points on
+            ballot d when only r is removed
+        tiebreak_keys (np.ndarray): tie-break part of the ranking keys, higher for earlier first-seen candidates
+    """
+
+    def __init__(self, election, weights, by_position=False):
+        self.election = election
+        n, length = election.n_candidates, election.ballot_length
+        self.ballots, self.counts = distinct_ballots(election)
+        distinct = Election(election.key, election.names, range(len(self.ballots)), self.ballots)
+
+        scaled, _ = exact_weight_matrix(weights, length)
+        scaled = scaled[0]
+        # Scores times n plus the tie-break must stay exact in float64
+        if int(np.abs(scaled).max(initial=0)) * election.n_voters * (n + 1) >= 2 ** 53:
+            raise OverflowError('scaled weights are too large for exact bootstrap scores')
+        self.contributions = ballot_contributions(distinct, weights).astype(np.float64)
+
+        positions = distinct.rank_positions().astype(np.intp)   # candidates x distinct
+        above = positions.T[:, :, None] < positions.T[:, None, :]   # distinct x candidates x candidates
+        # Points gained by moving up one position from each position, as in iia_engine.RemovalTables
+        step = np.zeros(length + 1, dtype=np.int64)
+        step[1:length] = scaled[:-1] - scaled[1:]
+        gain = step[positions].T   # distinct x candidates
+        self.above = above.reshape(len(self.ballots), -1).astype(np.float64)
+        self.pair_delta = (above * gain[:, None, :]).reshape(len(self.ballots), -1).astype(np.float64)
+
+        tiebreak = first_seen_order(election, by_position)
+        self.tiebreak_keys = np.empty(n, dtype=np.float64)
+        self.tiebreak_keys[tiebreak] = np.arange(n - 1, -1, -1)
+
+    def paradoxes(self, counts, target_ranks=(1, 2, 3), removal_ranks=None, adjust_ranks=True, strict=True):
+        """
+        Which paradoxes occur in each electorate of a chunk.
+
+        Args:
+            counts (np.ndarray): (samples x distinct ballots) multiplicities, e.g. a chunk of multinomial draws
+            target_ranks (list): ranks (1-based) whose candidates an IIA removal must not change
+            removal_ranks (list): ranks of the candidates that may be removed (each sample's own ranking);
+                by default every rank that is not a target
+            adjust_ranks (bool): see iia_engine.detect_iia (True for baseball, False for college polls)
+            strict (bool): see iia_engine.detect_iia
+
+        Returns:
+            dict: paradox name (PARADOXES) -> bool array over the samples
+        """
+        counts = np.asarray(counts, dtype=np.float64)
+        n_samples, n = len(counts), self.election.n_candidates
+        samples = np.arange(n_samples)
+
+        # Borda ranking of every sample: one exact key per candidate, unique thanks to the tie-break
+        scores = counts @ self.contributions
+        order = np.argsort(-(scores * n + self.tiebreak_keys), axis=1)
+        rank = np.empty_like(order)
+        np.put_along_axis(rank, order, np.arange(1, n + 1)[None, :], axis=1)
+
+        # Condorcet winner among the Borda top 3, as in borda_condorcet
+        pairwise = (counts @ self.above).reshape(n_samples, n, n)
+        graph = pairwise > pairwise.transpose(0, 2, 1)
+        wins = graph.sum(axis=2)
+        winner = wins.argmax(axis=1)
+        in_top3 = (wins[samples, winner] == n - 1) & (rank[samples, winner] <= 3)
+
+        return {
+            'IIA': self._iia(counts, scores, order, rank, target_ranks, removal_ranks, adjust_ranks, strict),
+            'Borda-Condorcet': in_top3 & (rank[samples, winner] != 1),
+            'No-Condorcet-Winner': ~in_top3,
+            'Cycle': has_cycle(graph),
+        }
+
+    def _iia(self, counts, scores, order, rank, target_ranks, removal_ranks, adjust_ranks, strict):
+        n_samples, n = len(counts), self.election.n_candidates
+        target_ranks = np.asarray(target_ranks, dtype=np.intp)
+        if removal_ranks is None:
+            removal_ranks = [r for r in range(1, n + 1) if r not in target_ranks]
+        removal_ranks = np.asarray([r for r in removal_ranks if r <= n and r not in target_ranks], dtype=np.intp)
+        if len(removal_ranks) == 0:
+            return np.zeros(n_samples, dtype=bool)
+        target_ids = order[:, target_ranks - 1]   # samples x targets
+        pool = order[:, removal_ranks - 1]   # samples x removable candidates
+
+        # after[s, j, c] = points of c in sample s once pool[s, j] is removed
+        delta = (counts @ self.pair_delta).reshape(n_samples, n, n)
+        after = scores[:, None, :] + np.take_along_axis(delta, pool[:, :, None], axis=1)
+        keys = after * n + self.tiebreak_keys
+        np.put_along_axis(keys, pool[:, :, None], -np.inf, axis=2)
+
+        # Only the top max(target rank) of every new ranking is needed: argpartition, then sort those
+        depth = int(target_ranks.max())
+        top = np.argpartition(-keys, depth - 1, axis=2)[:, :, :depth]
+        top = np.take_along_axis(top, np.argsort(-np.take_along_axis(keys, top, axis=2), axis=2), axis=2)
+
+        new_ranks = np.broadcast_to(target_ranks, (n_samples, len(removal_ranks), len(target_ranks)))
+        if adjust_ranks:
+            new_ranks = new_ranks - (removal_ranks[None, :, None] < target_ranks[None, None, :])
+        new_ids = np.take_along_axis(top, new_ranks - 1, axis=2)   # samples x removed x targets
+        if strict:
+            targets = np.broadcast_to(target_ids[:, None, :], new_ids.shape)
+            changed = np.take_along_axis(after, new_ids, axis=2) != np.take_along_axis(after, targets, axis=2)
+        else:
+            changed = new_ids != target_ids[:, None, :]
+        return changed.any(axis=(1, 2))
+
+
+def bootstrap_paradoxes(election, weights, n_samples=10000, seed=0, target_ranks=(1, 2, 3), removal_ranks=None,
+                        adjust_ranks=True, by_position=False, strict=True, chunk_size=None, z=1.96):
+    """
+    Bootstrap frequency of every paradox of one election, with confidence intervals.
+
+    Args:
+        election (Election): election from ballot_store
+        weights (list): Borda points per rank position
+        n_samples (int): number of bootstrap electorates
+        seed (int): seed of the resampling, the same seed gives the same estimates
+        target_ranks, removal_ranks, adjust_ranks, strict: IIA settings, see BootstrapTables.paradoxes
+        by_position (bool): tie-break order, see borda_scoring.first_seen_order (True for college polls)
+        chunk_size (int): samples evaluated at once; by default about CHUNK_CELLS cells per array
+        z (float): normal quantile of the Wilson intervals (1.96 for 95%)
+
+    Returns:
+        DataFrame: one row per paradox, columns Paradox, Observed (in the election itself), Occurrences,
+            Frequency, CI-Low, CI-High
+    """
+    tables = BootstrapTables(election, weights, by_position)
+    settings = dict(target_ranks=target_ranks, removal_ranks=removal_ranks, adjust_ranks=adjust_ranks, strict=strict)
+    if chunk_size is None:
+        chunk_size = max(1, CHUNK_CELLS // election.n_candidates ** 2)
+
+    rng = np.random.default_rng(seed)
+    probabilities = tables.counts / tables.counts.sum()
+    occurrences = dict.fromkeys(PARADOXES, 0)
+    for start in range(0, n_samples, chunk_size):
+        draws = rng.multinomial(election.n_voters, probabilities, size=min(chunk_size, n_samples - start))
+        for name, occurred in tables.paradoxes(draws, **settings).items():
+            occurrences[name] += int(occurred.sum())
+
+    observed = tables.paradoxes(tables.counts[None, :], **settings)
+    rows = []
+    for name in PARADOXES:
+        low, high = wilson_interval(occurrences[name], n_samples, z)
+        rows.append({'Paradox': name, 'Observed': bool(observed[name][0]), 'Occurrences': occurrences[name],
+                     'Frequency': occurrences[name] / n_samples if n_samples else np.nan,
+                     'CI-Low': low, 'CI-High': high})
+    return pd.DataFrame(rows)
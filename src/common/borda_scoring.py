@@ -0,0 +1,197 @@
+import numpy as np
+import pandas as pd
+from math import lcm
+from fractions import Fraction
+from ballot_store import EMPTY
+
+"""
+Vectorized Borda scoring on the ballot store.
+
+A weight scheme is a list of points per rank position. Schemes are stacked into one
+(schemes x positions) matrix and applied to the (candidates x positions) count table of an
+election with a single matrix multiply, so every scheme is scored in one call per election.
+
+Fractional schemes (Dowdall's 1, 1/2, 1/3, ...) are scored exactly: exact_weight_matrix multiplies each
+scheme by the LCM of its weights' denominators, so the scores are int64 sums that do not depend on the
+summation order, and near-ties rank the same in serial and parallel runs. Points are divided by the
+scale only for display (scheme_points).
+"""
+
+# Largest denominator when a float weight is read back as a fraction (1/3 as a float -> Fraction(1, 3))
+MAX_DENOMINATOR = 10 ** 6
+
+# Weight schemes used for the baseball MVP results folders (src/baseball/Borda/results/borda_<name>)
+MVP_SCHEMES = {
+    '14-9-8--1': [14, 9, 8, 7, 6, 5, 4, 3, 2, 1],
+    'top1': [1],
+    'top3': [3, 2, 1],
+    'top5': [5, 4, 3, 2, 1],
+    'top10': [10, 9, 8, 7, 6, 5, 4, 3, 2, 1],
+    'Dowdall': [1 / k for k in range(1, 11)],
+}
+
+# Weight schemes used for the college-poll results folders (src/college-polls/Borda/results/borda_<name>)
+POLL_SCHEMES = {
+    'top25': list(range(25, 0, -1)),
+    'top10': list(range(10, 0, -1)),
+    'top5': [5, 4, 3, 2, 1],
+    'top3': [3, 2, 1],
+    'top1': [1],
+    'Dowdall': [1 / k for k in range(1, 26)],
+}
+
+
+def weight_matrix(weight_vectors, ballot_length):
+    """
+    Stack weight vectors into a (schemes x ballot_length) matrix.
+    Shorter vectors are padded with 0 points, longer ones are cut at the ballot length.
+
+    Args:
+        weight_vectors (list): list of weight lists (or a single weight list)
+        ballot_length (int): number of rank positions on a ballot
+
+    Returns:
+        np.ndarray: int64 matrix when every weight is an integer, float64 otherwise
+    """
+    if len(weight_vectors) and np.isscalar(weight_vectors[0]):
+        weight_vectors = [weight_vectors]
+    integral = all(float(w).is_integer() for weights in weight_vectors for w in weights)
+    matrix = np.zeros((len(weight_vectors), ballot_length), dtype=np.int64 if integral else np.float64)
+    for s, weights in enumerate(weight_vectors):
+        weights = list(weights)[:ballot_length]
+        matrix[s, :len(weights)] = weights
+    return matrix
+
+
+def exact_fraction(weight):
+    """A weight as a Fraction; floats are read back as the simplest fraction within MAX_DENOMINATOR."""
+    if isinstance(weight, (int, np.integer, Fraction)):
+        return Fraction(weight)
+    return Fraction(weight).limit_denominator(MAX_DENOMINATOR)
+
+
+def exact_weight_matrix(weight_vectors, ballot_length):
+    """
+    weight_matrix scaled to integers: every scheme is multiplied by the least common multiple of the
+    denominators of its weights (1 for integer schemes, 2520 for Dowdall over 10 positions).
+
+    Returns:
+        tuple: (int64 schemes x ballot_length matrix, int64 scale of every scheme)
+    """
+    if len(weight_vectors) and np.isscalar(weight_vectors[0]):
+        weight_vectors = [weight_vectors]
+    matrix = np.zeros((len(weight_vectors), ballot_length), dtype=np.int64)
+    scales = np.ones(len(weight_vectors), dtype=np.int64)
+    for s, weights in enumerate(weight_vectors):
+        fractions = [exact_fraction(w) for w in list(weights)[:ballot_length]]
+        scales[s] = lcm(1, *(f.denominator for f in fractions))
+        matrix[s, :len(fractions)] = [int(f * int(scales[s])) for f in fractions]
+    return matrix, scales
+
+
+def scheme_points(scores, scale):
+    """Scaled integer scores back to points: unchanged ints for integer schemes, floats otherwise."""
+    return scores if scale == 1 else scores / scale
+
+
+def borda_scores(election, weight_vectors):
+    """
+    Borda points of every candidate under every weight scheme in one matrix multiply.
+
+    Args:
+        election (Election): election from ballot_store
+        weight_vectors (list): list of weight lists, or an already stacked weight matrix
+
+    Returns:
+        np.ndarray: (schemes x candidates) score matrix, columns indexed by candidate id
+    """
+    if isinstance(weight_vectors, np.ndarray) and weight_vectors.ndim == 2:
+        weights = weight_vectors
+    else:
+        weights = weight_matrix(weight_vectors, election.ballot_length)
+    return weights @ election.position_counts().T
+
+
+def exact_borda_scores(election, weight_vectors):
+    """
+    borda_scores with exact_weight_matrix: every scheme is scored in int64, scaled to integers.
+
+    Returns:
+        tuple: ((schemes x candidates) int64 scaled scores, int64 scale of every scheme)
+    """
+    weights, scales = exact_weight_matrix(weight_vectors, election.ballot_length)
+    # A candidate is on a ballot at most once, so no score exceeds the largest weight times the voters
+    if weights.size and int(np.abs(weights).max()) * election.n_voters >= 2 ** 63:
+        raise OverflowError('scaled weights are too large for exact int64 scores')
+    return weights @ election.position_counts().T, scales
+
+
+def first_seen_order(election, by_position=False):
+    """
+    Candidate ids ordered by their first appearance when the ballots are read ballot by ballot
+    (baseball scripts) or, with by_position=True, rank column by rank column (college-poll notebook).
+    This is the order the original dict-based scripts inserted candidates in, so using it as the
+    tie-breaker reproduces their (stable) sort exactly.
+    """
+    flat = election.ballots.ravel(order='F' if by_position else 'C')
+    flat = flat[flat != EMPTY]
+    ids, first_index = np.unique(flat, return_index=True)
+    return ids[np.argsort(first_index, kind='stable')].astype(np.intp)
+
+
+def ranking_order(scores, tiebreak):
+    """
+    Candidate ids sorted by descending score; equal scores keep the order given in `tiebreak`.
+    One np.lexsort on (score, tie-break position), so the order never depends on the sort algorithm
+    and the same scores always give the same ranking, in any process.
+
+    Args:
+        scores (np.ndarray): score per candidate id
+        tiebreak (np.ndarray): candidate ids in tie-break order (every id appears once)
+    """
+    tiebreak = np.asarray(tiebreak)
+    # lexsort sorts on the last key first: descending score, then position in the tie-break order
+    return tiebreak[np.lexsort((np.arange(len(tiebreak)), -scores[tiebreak]))]
+
+
+def borda_rankings(election, schemes, by_position=False):
+    """
+    Score an election under several weight schemes at once and rank the candidates under each.
+
+    Args:
+        election (Election): election from ballot_store
+        schemes (dict): scheme name -> weight list, e.g. MVP_SCHEMES
+        by_position (bool): tie-break order, see first_seen_order (True for college polls)
+
+    Returns:
+        dict: scheme name -> (Ranking, points), points indexed by candidate id
+    """
+    # Ranked on the exact scaled scores, so fractional schemes have no floating-point near-ties
+    scores, scales = exact_borda_scores(election, list(schemes.values()))
+    tiebreak = first_seen_order(election, by_position)
+
+    rankings = {}
+    for s, scheme_name in enumerate(schemes):
+        ranking = election.ranking(ranking_order(scores[s], tiebreak), scores[s])
+        rankings[scheme_name] = (ranking, scheme_points(scores[s], scales[s]))
+    return rankings
+
+
+def borda_tables(election, schemes, name_column='Player', by_position=False):
+    """
+    Score an election under several weight schemes at once and return one sorted table per scheme,
+    in the same layout as the results CSVs.
+
+    Args:
+        election (Election): election from ballot_store
+        schemes (dict): scheme name -> weight list, e.g. MVP_SCHEMES
+        name_column (str): 'Player' for baseball, 'Teams' for college polls
+        by_position (bool): tie-break order, see first_seen_order (True for college polls)
+
+    Returns:
+        dict: scheme name -> DataFrame with columns [name_column, 'Borda Points'], best first
+    """
+    tables = {}
+    for scheme_name, (ranking, points) in borda_rankings(election, schemes, by_position).items():
+        tables[scheme_name] = pd.DataFrame({name_column: ranking.names, 'Borda Points': points[ranking.order]})
+    return tables
@@ -0,0 +1,191 @@
+import os
+from math import comb
+from bisect import insort
+
+"""
+Split the removal combinations of many elections into index ranges that pool workers take on demand.
+
+Combinations of k out of a pool of n are numbered 0 .. C(n, k) - 1 in itertools.combinations() order.
+unrank_combination turns an index into its combination directly, so a worker can start at any index
+without walking the ones before it, and iter_combinations_range enumerates one range.
+iter_revolving_door_swaps walks the same combinations in revolving-door (Gray code) order, where each
+combination differs from the previous one by a single swap, and yields just the swaps (Knuth's Algorithm R,
+TAOCP 7.2.1.3, iterative and O(1) amortized per step); unrank_revolving_door gives its starting combination
+for any index, so it is restricted to an index range in the same way.
+
+plan_chunks cuts every election's index space into ranges of about the same number of combinations.
+A big election becomes many small tasks instead of one straggler, and since a ProcessPoolExecutor hands
+the next queued task to whichever worker becomes idle, all workers stay busy until the last chunks.
+"""
+
+# Chunks per worker aimed for, so the tail of the run is made of short tasks
+CHUNKS_PER_WORKER = 8
+
+
+def unrank_combination(n, k, index):
+    """
+    The combination at position `index` of combinations(range(n), k).
+
+    Returns:
+        list: k increasing positions in range(n)
+    """
+    combination = []
+    start = 0
+    for picks_left in range(k, 0, -1):
+        # Skip whole blocks of combinations that begin with a smaller element
+        for first in range(start, n):
+            block = comb(n - first - 1, picks_left - 1)
+            if index < block:
+                combination.append(first)
+                start = first + 1
+                break
+            index -= block
+    return combination
+
+
+def iter_combinations_range(pool, k, start, stop):
+    """
+    combinations(pool, k) restricted to the indices start .. stop - 1, in the same order.
+    """
+    n = len(pool)
+    stop = min(stop, comb(n, k))
+    if start >= stop:
+        return
+    positions = unrank_combination(n, k, start)
+    for _ in range(start, stop):
+        yield tuple(pool[p] for p in positions)
+        # Next combination in lexicographic order: bump the rightmost position that can still move
+        i = k - 1
+        while i >= 0 and positions[i] == n - k + i:
+            i -= 1
+        if i < 0:
+            return
+        positions[i] += 1
+        for j in range(i + 1, k):
+            positions[j] = positions[j - 1] + 1
+
+
+def unrank_revolving_door(n, k, index):
+    """
+    The combination at position `index` of the revolving-door order of the k-combinations of range(n).
+
+    The order is defined recursively: R(n, k) = R(n - 1, k), then R(n - 1, k - 1) reversed with n - 1
+    added, so the index decides block by block whether n - 1 is in the combination.
+
+    Returns:
+        list: k increasing positions in range(n)
+    """
+    combination = []
+    reverse = False
+    while k > 0:
+        if k == n:
+            combination.extend(range(n))
+            break
+        without_last, with_last = comb(n - 1, k), comb(n - 1, k - 1)
+        if not reverse and index >= without_last:
+            # Second block of R(n, k): n - 1 is in, then R(n - 1, k - 1) reversed
+            combination.append(n - 1)
+            index -= without_last
+            k -= 1
+            reverse = True
+        elif reverse and index < with_last:
+            # First block of reversed R(n, k): n - 1 is in, then R(n - 1, k - 1) forward
+            combination.append(n - 1)
+            k -= 1
+            reverse = False
+        elif reverse:
+            index -= with_last
+        n -= 1
+    return sorted(combination)
+
+
+def iter_revolving_door_swaps(n, k, start=0, stop=None):
+    """
+    Swaps leading through the revolving-door order of the k-combinations of range(n), from the combination
+    at index start (see unrank_revolving_door) to the one at stop - 1: stop - start - 1 swaps, by
+    Knuth's Algorithm R. No combination is built; the caller applies the swaps to its own state.
+
+    Yields:
+        tuple: (out, into) positions, one leaving the combination and one entering it
+    """
+    stop = comb(n, k) if stop is None else min(stop, comb(n, k))
+    # c[0 .. k - 1] = the combination in increasing order, c[k] = n as a sentinel
+    c = unrank_revolving_door(n, k, start) + [n]
+    for _ in range(start + 1, stop):
+        # R3, easy case: move the smallest element up (k odd) or down (k even)
+        if k % 2 and c[0] + 1 < c[1]:
+            yield c[0], c[0] + 1
+            c[0] += 1
+            continue
+        if not k % 2 and c[0] > 0:
+            yield c[0], c[0] - 1
+            c[0] -= 1
+            continue
+        j = 2
+        increase = not k % 2
+        while True:
+            if not increase:
+                # R4: try to decrease c_j (here c_j = c_(j-1) + 1)
+                if c[j - 1] >= j:
+                    yield c[j - 1], j - 2
+                    c[j - 1], c[j - 2] = c[j - 2], j - 2
+                    break
+                j += 1
+                increase = True
+            else:
+                # R5: try to increase c_j (here c_(j-1) = j - 2)
+                if c[j - 1] + 1 < c[j]:
+                    yield j - 2, c[j - 1] + 1
+                    c[j - 2], c[j - 1] = c[j - 1], c[j - 1] + 1
+                    break
+                j += 1
+                if j > k:
+                    return
+                increase = False
+
+
+def iter_revolving_door(pool, k, start=0, stop=None):
+    """
+    The k-combinations of pool in revolving-door order, restricted to the indices start .. stop - 1
+    of that order, built from iter_revolving_door_swaps.
+
+    Yields:
+        tuple: combination of pool elements, in increasing pool position
+    """
+    n = len(pool)
+    stop = comb(n, k) if stop is None else min(stop, comb(n, k))
+    if start >= stop:
+        return
+    positions = unrank_revolving_door(n, k, start)
+    yield tuple(pool[p] for p in positions)
+    for out, into in iter_revolving_door_swaps(n, k, start, stop):
+        positions.remove(out)
+        insort(positions, into)
+        yield tuple(pool[p] for p in positions)
+
+
+def plan_chunks(pool_sizes, k, n_workers=None, chunks_per_worker=CHUNKS_PER_WORKER):
+    """
+    Cut the combinations of every election into index ranges.
+
+    Args:
+        pool_sizes (list): removal pool size of every election, in output order
+        k (int): removal amount
+        n_workers (int): pool size (default: number of CPUs)
+        chunks_per_worker (int): number of chunks per worker aimed for
+
+    Returns:
+        list: (task, election, start, stop) tuples, one per chunk; `task` numbers the chunks in election
+            order (so the results can be put back in that order), the list itself is ordered from the
+            largest election to the smallest, so the big ones start first
+    """
+    n_workers = n_workers or os.cpu_count() or 1
+    totals = [comb(size, k) for size in pool_sizes]
+    chunk_size = max(1, -(-sum(totals) // (n_workers * chunks_per_worker)))
+
+    chunks = []
+    for election, total in enumerate(totals):
+        # An election without combinations still gets one (empty) task
+        for start in range(0, max(total, 1), chunk_size):
+            chunks.append((len(chunks), election, start, min(start + chunk_size, total)))
+    return sorted(chunks, key=lambda chunk: -totals[chunk[1]])
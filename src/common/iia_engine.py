@@ -0,0 +1,682 @@
+import numpy as np
+from math import comb
+from bisect import insort
+from itertools import combinations
+from combination_chunks import iter_combinations_range, iter_revolving_door, iter_revolving_door_swaps, \
+    unrank_revolving_door
+from ballot_store import EMPTY
+from borda_scoring import exact_weight_matrix, scheme_points, first_seen_order, ranking_order
+from pairwise_matrix import VOTER_BLOCK_CELLS
+
+"""
+Borda recount after removing candidates, for the IIA (independence of irrelevant alternatives) scanners.
+
+The tables are built once per election and weight list. Removing candidates moves every candidate ranked
+below them up on that ballot, so a candidate at position i with k removed candidates above it now earns
+weights[i - k] instead of weights[i]. This works for any weight list (14-9-8-...-1, Dowdall, ...),
+not only consecutive ones.
+
+    - one removed candidate: the change of every score is one row of the precomputed pair_delta table, O(candidates)
+    - consecutive (linear) weights: each removed candidate above moves a candidate by the same step,
+      so the changes add up row by row, O(subset size x candidates)
+    - any other weights: one vectorized recount over the positions of the removed candidates,
+      O(subset size x voters + voters x ballot length), no Python loop over ballots
+
+Only the candidates at the target ranks are needed from each new ranking: every candidate gets one int64 key
+(score, then official order) and a count of the keys above each target confirms that the targets kept their
+ranks without any sort. Otherwise argpartition picks the top max(target rank) candidates and sorts just those.
+
+iter_iia_gray walks the combinations in revolving-door order instead, where each removal differs from the
+previous one by one swapped candidate. With consecutive weights the scores of a whole batch of consecutive
+removals are then one cumulative sum of pair_delta swap rows, and the target check runs on the batch at once.
+"""
+
+# Versions of the RemovalTables and RemovalIndex layouts, part of the key of cached objects (see precompute_cache.py)
+REMOVAL_TABLES_VERSION = 6
+REMOVAL_INDEX_VERSION = 4
+
+# ranking_keys value of removed candidates, below every packed key
+REMOVED_KEY = np.iinfo(np.int64).min
+
+# Consecutive removals scored and checked at once by iter_iia_gray
+GRAY_BATCH = 512
+
+
+class RemovalTables:
+    """
+    Per-election tables for recomputing Borda scores after removing any subset of candidates.
+
+    Attributes:
+        election (Election): election from ballot_store
+        weights (np.ndarray): points per rank position, zero-padded to the ballot length and multiplied
+            by `scale` so that they are integers (see borda_scoring.exact_weight_matrix)
+        scale (int): 1 for integer weights; scores are divided by it only for display (points)
+        base_scores (np.ndarray): scaled Borda points of every candidate id with nobody removed
+        positions (np.ndarray): candidates x voters position table (ballot_length = unranked),
+            election.rank_positions() itself (a view into the shared arena in pool workers)
+        pair_delta (np.ndarray): candidates x candidates, [r, c] = change of c's score when only r is removed
+        official (Ranking): official ranking, with O(1) name <-> rank lookups
+        official_order (np.ndarray): candidate ids in official ranking order (rank 1 first), official.order
+        official_rank (np.ndarray): official rank (1-based) of every candidate id, official.rank
+        tiebreak_keys (np.ndarray): int64 tie-break part of ranking_keys, higher for better official ranks
+        packed_keys (bool): whether scores and tie-break fit in one int64 key (always, short of huge weights)
+
+    Only the arrays named in DERIVED depend on the weights; derived_arrays / from_derived cache them without
+    the ballots, and the rest is rebuilt around the Election of the process that loads them.
+    """
+
+    DERIVED = ('weights', 'scale', 'base_scores', 'pair_delta', 'linear', 'official_order')
+
+    def __init__(self, election, weights, by_position=False):
+        self._attach(election)
+        weights, scales = exact_weight_matrix(weights, election.ballot_length)
+        self.weights, self.scale = weights[0], int(scales[0])
+        # The general recount sums in float64 (bincount), which is exact for integers below 2 ** 53
+        if int(np.abs(self.weights).max(initial=0)) * election.n_voters >= 2 ** 53:
+            raise OverflowError('scaled weights are too large for an exact recount')
+        self.base_scores = election.position_counts() @ self.weights
+
+        # Points gained by moving up one position from each position (0 for the top and for unranked)
+        length = election.ballot_length
+        step = np.zeros(length + 1, dtype=self.weights.dtype)
+        step[1:length] = self.weights[:-1] - self.weights[1:]
+        gain = step[self.positions]   # candidates x voters
+
+        # pair_delta[r, c] = sum over ballots with r ranked above c of c's one-position gain,
+        # in blocks of voters so the candidates x candidates x voters comparison stays bounded
+        n = election.n_candidates
+        self.pair_delta = np.zeros((n, n), dtype=gain.dtype)
+        block = max(1, VOTER_BLOCK_CELLS // max(n * n, 1))
+        for start in range(0, election.n_voters, block):
+            block_positions = self.positions[:, start:start + block]
+            above = block_positions[:, None, :] < block_positions[None, :, :]
+            self.pair_delta += np.einsum('rcv,cv->rc', above, gain[:, start:start + block])
+
+        # Equal one-position gains everywhere mean removals add up independently
+        self.linear = bool(np.all(step[1:length] == step[1])) if length > 1 else True
+
+        self.official_order = ranking_order(self.base_scores, first_seen_order(election, by_position))
+        self._set_official()
+
+    def _attach(self, election):
+        self.election = election
+        self.positions = election.rank_positions()
+
+    def _set_official(self):
+        election = self.election
+        self.official = election.ranking(self.official_order, self.base_scores)
+        self.official_order = self.official.order
+        self.official_rank = self.official.rank
+
+        # Packed ranking keys (ranking_keys): score * candidates + tie-break, with the official rank 1 highest
+        n = election.n_candidates
+        self.tiebreak_keys = (n - self.official_rank).astype(np.int64)
+        self.packed_keys = int(np.abs(self.weights).max(initial=0)) * election.n_voters * (n + 1) < 2 ** 62
+
+    def derived_arrays(self):
+        """The DERIVED attributes as a dict: what the cache keeps, no ballot or candidates x voters table."""
+        return {name: getattr(self, name) for name in self.DERIVED}
+
+    @classmethod
+    def from_derived(cls, election, arrays):
+        """
+        Tables of `election` from its derived_arrays (e.g. a cache entry), without recounting anything.
+        The position table and the official Ranking are taken from or built on `election`, so in a pool
+        worker they are views into the shared ballot arena rather than private copies.
+        """
+        tables = cls.__new__(cls)
+        tables.__dict__.update(arrays)
+        tables._attach(election)
+        tables._set_official()
+        return tables
+
+    def points(self, scores):
+        """Scaled scores (base_scores, scores_after_removal, ...) as Borda points."""
+        return scheme_points(scores, self.scale)
+
+    def scores_after_removal(self, removed):
+        """
+        Scaled Borda points (see points) of every candidate id after removing the `removed` candidate ids.
+        Entries of the removed candidates are left in the array and have no meaning.
+        """
+        removed = np.asarray(removed, dtype=np.intp)
+        if len(removed) == 1 or self.linear:
+            return self.base_scores + self.pair_delta[removed].sum(axis=0)
+
+        election = self.election
+        n_voters, length = election.n_voters, election.ballot_length
+
+        # shift[v, i] = number of removed candidates ranked above position i on ballot v
+        removed_positions = self.positions[removed]   # subset x voters
+        ranked = removed_positions < length
+        voter_idx = np.broadcast_to(np.arange(n_voters), removed_positions.shape)[ranked]
+        shift = np.zeros((n_voters, length + 1), dtype=np.intp)
+        np.add.at(shift, (voter_idx, removed_positions[ranked] + 1), 1)
+        shift = np.cumsum(shift, axis=1)[:, :length]
+
+        new_weights = self.weights[np.arange(length) - shift]
+        delta = new_weights - self.weights
+        # Slots of removed candidates and blank slots do not contribute
+        delta[voter_idx, removed_positions[ranked]] = 0
+        filled = election.ballots != EMPTY
+        return self.base_scores + np.bincount(election.ballots[filled], weights=delta[filled],
+                                              minlength=election.n_candidates).astype(self.base_scores.dtype)
+
+    def single_removal_scores(self):
+        """
+        Scaled Borda points after removing each candidate alone, all at once: (candidates x candidates),
+        row r = scores with candidate r removed (entry [r, r] has no meaning).
+        """
+        return self.base_scores[None, :] + self.pair_delta
+
+    def single_removal_rankings(self):
+        """
+        New ranking after removing each candidate alone: (candidates x candidates - 1), row r = the
+        remaining candidate ids in ranking order after removing r; ties keep the official order.
+        """
+        n = self.election.n_candidates
+        scores = self.single_removal_scores()[:, self.official_order]
+        # Push the removed candidate below everybody, then one stable sort per row
+        removed = self.official_order[None, :] == np.arange(n)[:, None]
+        scores[removed] = scores.min() - 1
+        order = np.argsort(-scores, axis=1, kind='stable')
+        return self.official_order[order[:, :-1]]
+
+    def single_removal_changes(self, adjust_ranks=True):
+        """
+        Which ranks change when each candidate is removed alone: bool (candidates x candidates),
+        [r, t - 1] True when the candidate found at official rank t differs after removing r.
+        With adjust_ranks, rank t is looked up at t - 1 when r was ranked above it (see detect_iia).
+        The rank of r itself always counts as changed.
+
+        Target windows follow directly: np.logical_or.accumulate(changes, axis=1)[r, t - 1] tells
+        whether removing r changes any of the ranks 1..t, and changes[:, target_ranks - 1].any(axis=1)
+        whether it changes a given set of target ranks.
+        """
+        n = self.election.n_candidates
+        rankings = self.single_removal_rankings()
+        ranks = np.broadcast_to(np.arange(1, n + 1), (n, n))
+        if adjust_ranks:
+            ranks = ranks - (self.official_rank[:, None] < ranks)
+        # Rank n no longer exists when nothing above it was removed
+        lookup = np.minimum(ranks, n - 1) - 1
+        changed = np.take_along_axis(rankings, lookup, axis=1) != self.official_order[None, :]
+        changed |= ranks > n - 1
+        changed[np.arange(n), self.official_rank - 1] = True
+        return changed
+
+    def ranking_keys(self, scores, removed=()):
+        """
+        One int64 key per candidate id that orders the new ranking by itself: a larger key ranks higher,
+        equal scores are ordered by official rank and removed candidates get the smallest key.
+        None when the scores are too large to pack with the tie-break (ranking_after_removal still works).
+        """
+        if not self.packed_keys:
+            return None
+        keys = scores * self.election.n_candidates + self.tiebreak_keys
+        keys[list(removed)] = REMOVED_KEY
+        return keys
+
+    def ids_at_ranks(self, keys, ranks):
+        """
+        Candidate ids at the (1-based) ranks of the ranking given by ranking_keys: argpartition picks the
+        top max(ranks) candidates and only those are sorted, O(candidates + max(ranks) log max(ranks)).
+        """
+        ranks = np.asarray(ranks, dtype=np.intp)
+        depth = int(ranks.max())
+        cut = len(keys) - depth
+        top = np.argpartition(keys, cut)[cut:]
+        top = top[np.argsort(keys[top])[::-1]]
+        return top[ranks - 1]
+
+    def ids_after_removal(self, removed, ranks, scores=None):
+        """Candidate ids at the (1-based) ranks after the removal, ranking_after_removal(removed)[ranks - 1]."""
+        if scores is None:
+            scores = self.scores_after_removal(removed)
+        keys = self.ranking_keys(scores, removed)
+        if keys is None:
+            return self.ranking_after_removal(removed, scores)[np.asarray(ranks, dtype=np.intp) - 1]
+        return self.ids_at_ranks(keys, ranks)
+
+    def ranking_after_removal(self, removed, scores=None):
+        """Candidate ids in the new ranking order after the removal; ties keep the official order."""
+        if scores is None:
+            scores = self.scores_after_removal(removed)
+        remaining = self.official_order[~np.isin(self.official_order, removed)]
+        return ranking_order(scores, remaining)
+
+
+def detect_iia(tables, target_ranks, removal_pool, removal_amount, adjust_ranks=True, prune=False, strict=True,
+               gray=False):
+    """
+    Enumerate removals and return those that change the candidates at the target ranks.
+    Same as list(iter_iia(...)).
+
+    With adjust_ranks the target ranks are compared after shifting them up by the number of removed
+    candidates ranked above them (baseball scanner); without it the same rank positions are compared
+    (college-poll scanner).
+
+    Ties are broken by the official order, so the new ranking is deterministic. With strict, a removal
+    only counts when the strict order changes: a candidate now found at a target rank that is tied on
+    points with the target it displaced shares that rank with it (see target_changed), so it is no violation.
+
+    Args:
+        tables (RemovalTables): tables of the election
+        target_ranks (list): official ranks (1-based) of the target candidates
+        removal_pool (list): candidate ids that may be removed
+        removal_amount (int): number of candidates removed at once
+        adjust_ranks (bool): shift the target ranks by the removed candidates above them
+        prune (bool): skip subtrees of combinations that provably cannot reorder the targets,
+            see detect_iia_branch_and_bound. Returns the same violations in the same order.
+        strict (bool): ignore changes that only come from how a tie is broken
+        gray (bool): without prune, enumerate in revolving-door order with incremental scores,
+            see iter_iia_gray. Returns the same violations in revolving-door order.
+
+    Returns:
+        list: (removed_ids, new_target_ids) tuples, one per violation, in combinations() order
+    """
+    return list(iter_iia(tables, target_ranks, removal_pool, removal_amount, adjust_ranks, prune, strict=strict,
+                         gray=gray))
+
+
+def iter_iia(tables, target_ranks, removal_pool, removal_amount, adjust_ranks=True, prune=False, index_range=None,
+             strict=True, gray=False):
+    """
+    detect_iia as a generator: violations are yielded as they are found, so a caller streaming them
+    to disk never holds the whole result list.
+
+    Args:
+        see detect_iia
+        index_range (tuple): (start, stop), only look at the combinations with these indices in
+            combinations() order (one chunk of combination_chunks.plan_chunks); all by default.
+            With gray, the indices are taken in revolving-door order (same count, so the same chunks)
+
+    Yields:
+        tuple: (removed_ids, new_target_ids), in combinations() order (revolving-door order with gray)
+    """
+    target_ranks = np.asarray(target_ranks, dtype=np.intp)
+    if removal_amount == 1:
+        pool = list(removal_pool)
+        if index_range is not None:
+            pool = pool[index_range[0]:index_range[1]]
+        yield from detect_single_removals(tables, target_ranks, pool, adjust_ranks, strict)
+        return
+    if prune:
+        yield from iter_iia_branch_and_bound(tables, target_ranks, removal_pool, removal_amount, adjust_ranks, index_range,
+                                             strict)
+        return
+    if gray:
+        yield from iter_iia_gray(tables, target_ranks, removal_pool, removal_amount, adjust_ranks, index_range, strict)
+        return
+
+    target_ids = tables.official_order[target_ranks - 1]
+
+    if index_range is None:
+        removals = combinations(removal_pool, removal_amount)
+    else:
+        removals = iter_combinations_range(list(removal_pool), removal_amount, *index_range)
+    for removed in removals:
+        scores = tables.scores_after_removal(removed)
+        new_ranks = _new_target_ranks(tables, target_ranks, removed, adjust_ranks)
+        new_target_ids = _new_target_ids(tables, scores, removed, target_ids, new_ranks)
+        if target_changed(scores, target_ids, new_target_ids, removed, strict):
+            yield removed, tuple(new_target_ids)
+
+
+def iter_iia_gray(tables, target_ranks, removal_pool, removal_amount, adjust_ranks=True, index_range=None, strict=True):
+    """
+    iter_iia over the combinations in revolving-door (Gray code) order, where each removal swaps one candidate
+    of the previous one (combination_chunks.iter_revolving_door_swaps). With consecutive (linear) weights the
+    scores of GRAY_BATCH consecutive removals are the scores of the first one plus a cumulative sum of
+    pair_delta[joined] - pair_delta[left] rows, and the targets of the whole batch are checked at once
+    (_batch_violations); only the removals that move a target are looked at one by one.
+    Other weights are recounted per combination (scores_after_removal), as in iter_iia.
+
+    The scores stay exact int64 sums, so the violations are the same as iter_iia's, in revolving-door order.
+
+    Args:
+        see iter_iia; index_range counts the combinations in revolving-door order
+
+    Yields:
+        tuple: (removed_ids, new_target_ids), in revolving-door order
+    """
+    target_ranks = np.asarray(target_ranks, dtype=np.intp)
+    target_ids = tables.official_order[target_ranks - 1]
+    pool = np.asarray(removal_pool, dtype=np.intp)
+    total = comb(len(pool), removal_amount)
+    start, stop = index_range if index_range is not None else (0, total)
+    stop = min(stop, total)
+    if start >= stop:
+        return
+
+    if not (tables.linear and tables.packed_keys):
+        for removed in iter_revolving_door(pool.tolist(), removal_amount, start, stop):
+            scores = tables.scores_after_removal(removed)
+            new_ranks = _new_target_ranks(tables, target_ranks, removed, adjust_ranks)
+            new_target_ids = _new_target_ids(tables, scores, removed, target_ids, new_ranks)
+            if target_changed(scores, target_ids, new_target_ids, removed, strict):
+                yield removed, tuple(new_target_ids)
+        return
+
+    positions = unrank_revolving_door(len(pool), removal_amount, start)
+    scores = tables.scores_after_removal(pool[positions])
+    swaps = iter_revolving_door_swaps(len(pool), removal_amount, start, stop)
+    rows, left, joined = [list(positions)], [], []
+    checked_first = False
+    for out, into in swaps:
+        positions.remove(out)
+        insort(positions, into)
+        rows.append(list(positions))
+        left.append(out)
+        joined.append(into)
+        if len(rows) == GRAY_BATCH:
+            scores = yield from _batch_violations(tables, scores, pool, rows, left, joined, target_ranks, target_ids,
+                                                  adjust_ranks, strict, checked_first)
+            # The last removal of the batch (already checked) starts the next one
+            rows, left, joined = rows[-1:], [], []
+            checked_first = True
+    yield from _batch_violations(tables, scores, pool, rows, left, joined, target_ranks, target_ids, adjust_ranks,
+                                 strict, checked_first)
+
+
+def _batch_violations(tables, scores, pool, rows, left, joined, target_ranks, target_ids, adjust_ranks, strict,
+                      checked_first=False):
+    # rows = pool positions of consecutive revolving-door removals, row i + 1 = row i with pool[left[i]] swapped
+    # for pool[joined[i]]; scores = scores of row 0, which is skipped when checked_first (the previous batch's
+    # last row). Yields the violations, returns the scores of the last row
+    removed_ids = pool[np.array(rows, dtype=np.intp)]
+    steps = tables.pair_delta[pool[joined]] - tables.pair_delta[pool[left]]
+    batch_scores = np.empty((len(rows), len(scores)), dtype=scores.dtype)
+    batch_scores[0] = scores
+    np.cumsum(steps, axis=0, out=batch_scores[1:])
+    batch_scores[1:] += scores
+
+    # ranking_keys of every row; a row keeps its targets when exactly new_rank - 1 keys are above each
+    keys = batch_scores * tables.election.n_candidates + tables.tiebreak_keys[None, :]
+    np.put_along_axis(keys, removed_ids, REMOVED_KEY, axis=1)
+    new_ranks = np.broadcast_to(target_ranks, (len(rows), len(target_ranks)))
+    if adjust_ranks:
+        removed_ranks = tables.official_rank[removed_ids]
+        new_ranks = new_ranks - (removed_ranks[:, :, None] < target_ranks[None, None, :]).sum(axis=1)
+    target_keys = keys[:, target_ids]
+    above = (keys[:, None, :] > target_keys[:, :, None]).sum(axis=2)
+    kept = (above + 1 == new_ranks).all(axis=1) & (target_keys > REMOVED_KEY).all(axis=1)
+    kept[0] |= checked_first
+
+    for row in np.flatnonzero(~kept):
+        removed = tuple(removed_ids[row].tolist())
+        new_target_ids = tables.ids_at_ranks(keys[row], new_ranks[row])
+        if target_changed(batch_scores[row], target_ids, new_target_ids, removed, strict):
+            yield removed, tuple(new_target_ids)
+    return batch_scores[-1]
+
+
+class RemovalIndex:
+    """
+    New ranking of every removal of `removal_amount` candidates from a pool, computed once per election.
+
+    The stored outcomes do not depend on the target ranks, so any target window (ranks 1..3, 1..4, ...)
+    and any narrower removal pool is answered by filtering the index (query) instead of enumerating and
+    recounting the combinations again.
+
+    Attributes (all but tables are the DERIVED arrays, see RemovalTables.from_derived):
+        tables (RemovalTables): tables of the election
+        pool (np.ndarray): candidate ids that may be removed, in official order
+        removed (np.ndarray): (removals x removal_amount) removed ids, one row per combination, in combinations() order
+        rankings (np.ndarray): (removals x remaining candidates) new ranking order of every row of `removed`
+        scores (np.ndarray): (removals x candidates) new scores of every row of `removed`, for the strict comparison
+    """
+
+    DERIVED = ('pool', 'removed', 'rankings', 'scores')
+
+    def __init__(self, tables, removal_pool, removal_amount):
+        self.tables = tables
+        self.pool = np.asarray(removal_pool, dtype=np.intp)
+        self.removed = np.array(list(combinations(self.pool.tolist(), removal_amount)), dtype=np.intp)
+        self.removed = self.removed.reshape(-1, removal_amount)
+        n_remaining = tables.election.n_candidates - removal_amount
+        if removal_amount == 1:
+            self.rankings = tables.single_removal_rankings()[self.removed[:, 0]]
+            self.scores = tables.single_removal_scores()[self.removed[:, 0]]
+        else:
+            self.rankings = np.empty((len(self.removed), n_remaining), dtype=np.intp)
+            self.scores = np.empty((len(self.removed), tables.election.n_candidates), dtype=tables.base_scores.dtype)
+            for row, removed in enumerate(self.removed):
+                self.scores[row] = tables.scores_after_removal(removed)
+                self.rankings[row] = tables.ranking_after_removal(removed, self.scores[row])
+
+    def derived_arrays(self):
+        """The DERIVED attributes as a dict, without the tables (cached on their own)."""
+        return {name: getattr(self, name) for name in self.DERIVED}
+
+    @classmethod
+    def from_derived(cls, tables, arrays):
+        """Index of the election of `tables` from its derived_arrays."""
+        index = cls.__new__(cls)
+        index.__dict__.update(arrays)
+        index.tables = tables
+        return index
+
+    def query(self, target_ranks, removal_pool=None, adjust_ranks=True, strict=True):
+        """
+        detect_iia answered from the index.
+
+        Args:
+            target_ranks (list): official ranks (1-based) of the target candidates
+            removal_pool (list): candidate ids that may be removed (a subset of the index pool);
+                by default every pool candidate that is not a target
+            adjust_ranks (bool): see detect_iia
+            strict (bool): see detect_iia
+
+        Returns:
+            list: (removed_ids, new_target_ids) tuples, one per violation, in combinations() order
+        """
+        tables = self.tables
+        target_ranks = np.asarray(target_ranks, dtype=np.intp)
+        target_ids = tables.official_order[target_ranks - 1]
+        if removal_pool is None:
+            allowed = ~np.isin(self.removed, target_ids).any(axis=1)
+        else:
+            allowed = np.isin(self.removed, removal_pool).all(axis=1)
+
+        removed = self.removed[allowed]
+        new_ranks = np.broadcast_to(target_ranks, (len(removed), len(target_ranks)))
+        if adjust_ranks:
+            removed_ranks = tables.official_rank[removed]
+            new_ranks = new_ranks - (removed_ranks[:, :, None] < target_ranks[None, None, :]).sum(axis=1)
+        new_target_ids = np.take_along_axis(self.rankings[allowed], new_ranks - 1, axis=1)
+        if strict:
+            scores = self.scores[allowed]
+            changed = (np.take_along_axis(scores, new_target_ids, axis=1) != scores[:, target_ids]).any(axis=1)
+            changed |= np.isin(removed, target_ids).any(axis=1)
+        else:
+            changed = (new_target_ids != target_ids[None, :]).any(axis=1)
+        return [(tuple(r), tuple(t)) for r, t in zip(removed[changed].tolist(), new_target_ids[changed].tolist())]
+
+
+def detect_single_removals(tables, target_ranks, removal_pool, adjust_ranks=True, strict=True):
+    """
+    detect_iia for removal_amount = 1, answered from the all-single-removals matrices of the tables
+    instead of one recount per candidate.
+
+    Returns:
+        list: (removed_ids, new_target_ids) tuples, one per violation, in removal_pool order
+    """
+    target_ranks = np.asarray(target_ranks, dtype=np.intp)
+    pool = np.asarray(removal_pool, dtype=np.intp)
+    if len(pool) == 0:
+        return []
+    # Any change of the strict order is also a change of the tie-broken order, so the latter filters first
+    changed = tables.single_removal_changes(adjust_ranks)[np.ix_(pool, target_ranks - 1)].any(axis=1)
+    rankings = tables.single_removal_rankings()
+    scores = tables.single_removal_scores()
+    target_ids = tables.official_order[target_ranks - 1]
+
+    violations = []
+    for removed in pool[changed].tolist():
+        new_target_ids = rankings[removed][_new_target_ranks(tables, target_ranks, (removed,), adjust_ranks) - 1]
+        if target_changed(scores[removed], target_ids, new_target_ids, (removed,), strict):
+            violations.append(((removed,), tuple(new_target_ids)))
+    return violations
+
+
+def target_changed(scores, target_ids, new_target_ids, removed, strict):
+    """
+    Whether a removal moved a target rank.
+
+    Args:
+        scores (np.ndarray): candidate id -> points after the removal
+        target_ids (np.ndarray): the target candidates, in the order of their ranks
+        new_target_ids (np.ndarray): the candidates now found at the target ranks
+        removed (iterable of int): the removed candidate ids
+        strict (bool): compare tie-broken rankings (False), or count a rank as changed only when the
+            candidate now found there has different points from the target it replaced (True), since
+            equal points mean both share that rank
+
+    Returns:
+        bool: True when some target rank changed
+    """
+    if not strict:
+        return not np.array_equal(new_target_ids, target_ids)
+    if not set(removed).isdisjoint(target_ids.tolist()):
+        return True
+    return bool((scores[new_target_ids] != scores[target_ids]).any())
+
+
+def _new_target_ids(tables, scores, removed, target_ids, new_ranks):
+    # ranking_after_removal(removed, scores)[new_ranks - 1] without sorting every candidate
+    keys = tables.ranking_keys(scores, removed)
+    if keys is None:
+        return tables.ranking_after_removal(removed, scores)[new_ranks - 1]
+    # Early exit: a target is still at its new rank when exactly new_rank - 1 candidates rank above it
+    target_keys = keys[target_ids]
+    if target_keys.min() > REMOVED_KEY:
+        above = (keys[None, :] > target_keys[:, None]).sum(axis=1)
+        if (above + 1 == new_ranks).all():
+            return target_ids
+    return tables.ids_at_ranks(keys, new_ranks)
+
+
+def _new_target_ranks(tables, target_ranks, removed, adjust_ranks):
+    if not adjust_ranks:
+        return target_ranks
+    removed_ranks = tables.official_rank[list(removed)]
+    return target_ranks - (removed_ranks[None, :] < target_ranks[:, None]).sum(axis=1)
+
+
+def detect_iia_branch_and_bound(tables, target_ranks, removal_pool, removal_amount, adjust_ranks=True, strict=True):
+    """List of the violations found by iter_iia_branch_and_bound."""
+    return list(iter_iia_branch_and_bound(tables, target_ranks, removal_pool, removal_amount, adjust_ranks,
+                                          strict=strict))
+
+
+def iter_iia_branch_and_bound(tables, target_ranks, removal_pool, removal_amount, adjust_ranks=True, index_range=None,
+                              strict=True):
+    """
+    Same result as detect_iia, but walks the combinations as a depth-first tree (pool index order,
+    so the output order matches combinations()) and skips whole subtrees that cannot produce a violation.
+
+    A violation needs some remaining candidate to swap places with a target. Removing candidates only
+    moves the others up, so at a node with chosen set S and k more picks left from the rest of the pool:
+        - lower bound of a score: the score after removing S alone
+        - upper bound of a score: on every ballot, the candidate also moves up past min(k, number of
+          still-available pool candidates ranked above it) more positions
+    If no (target, candidate) pair can swap under these bounds, no combination below the node is a violation.
+    Without adjust_ranks, removing a candidate ranked above a target already moves the target,
+    so such subtrees are never skipped.
+    With index_range, subtrees whose combinations all fall outside the range are skipped as well
+    (a subtree covers a contiguous block of combinations() indices).
+    A strict violation is also a swap, so the bounds hold with strict as well.
+
+    Args:
+        see detect_iia
+
+    Yields:
+        tuple: (removed_ids, new_target_ids), one per violation, in combinations() order
+    """
+    target_ranks = np.asarray(target_ranks, dtype=np.intp)
+    target_ids = tables.official_order[target_ranks - 1]
+    pool = np.asarray(removal_pool, dtype=np.intp)
+    n_pool = len(pool)
+    if removal_amount > n_pool:
+        return
+    range_start, range_stop = index_range if index_range is not None else (0, comb(n_pool, removal_amount))
+
+    length = tables.election.ballot_length
+    positions = tables.positions
+    n_candidates, n_voters = positions.shape
+    # Points per position with 0 for unranked (index ballot_length)
+    weights = np.append(tables.weights, 0)
+    # Voters per block of the score sums: int64 temporaries of the byte size of a VOTER_BLOCK_CELLS bool block
+    block = max(1, VOTER_BLOCK_CELLS // (8 * n_candidates))
+
+    # Shifts are at most removal_amount, so the candidates x voters tables are int16; no table has a pool axis
+    shift_dtype = np.int16
+    # best_tail[j] = the removal_amount best (smallest) positions of the pool candidates from index j on, per
+    # ballot (pool + 1 x removal_amount x voters, ballot_length = none left). On a ballot, the still-available
+    # pool candidates above a candidate number at least m exactly when the m-th best of them is above it
+    best_tail = np.full((n_pool + 1, removal_amount, tables.election.n_voters), length, dtype=positions.dtype)
+    for j in range(n_pool - 1, -1, -1):
+        merged = np.vstack([positions[pool[j]][None, :], best_tail[j + 1]])
+        best_tail[j] = np.sort(merged, axis=0)[:removal_amount]
+
+    def available_above(start, picks_left):
+        # min(picks_left, pool candidates from index start on ranked above each candidate), per ballot
+        count = np.zeros(positions.shape, dtype=shift_dtype)
+        for m in range(picks_left):
+            count += best_tail[start, m][None, :] < positions
+        return count
+
+    # Official rank relation between every target and every candidate
+    target_above = tables.official_rank[target_ids][:, None] < tables.official_rank[None, :]
+    max_target_rank = target_ranks.max()
+
+    def shifted_scores(shift):
+        # Scores of every candidate when moved up `shift` positions on each ballot (unranked stays unranked)
+        scores = np.zeros(n_candidates, dtype=weights.dtype)
+        for first in range(0, n_voters, block):
+            block_positions = positions[:, first:first + block]
+            moved = np.where(block_positions < length, block_positions - shift[:, first:first + block], length)
+            scores += weights[moved].sum(axis=1)
+        return scores
+
+    def can_violate(chosen, shift, start, picks_left):
+        if not adjust_ranks and (tables.official_rank[pool[chosen]] < max_target_rank).any():
+            return True
+        if not adjust_ranks and picks_left and (tables.official_rank[pool[start:]] < max_target_rank).any():
+            return True
+        low = shifted_scores(shift)
+        high = shifted_scores(shift + available_above(start, picks_left))
+        # Removed candidates cannot swap with anything, and a target does not swap with itself
+        alive = np.ones((len(target_ids), len(low)), dtype=bool)
+        alive[:, pool[chosen]] = False
+        alive[np.arange(len(target_ids)), target_ids] = False
+        # target above candidate: swap needs high[c] > low[t]; candidate above target: high[t] > low[c]
+        swap_down = target_above & (high[None, :] > low[target_ids][:, None])
+        swap_up = ~target_above & (high[target_ids][:, None] > low[None, :])
+        return bool(((swap_down | swap_up) & alive).any())
+
+    def search(chosen, shift, start, first_index):
+        # first_index = combinations() index of the first combination below this node
+        picks_left = removal_amount - len(chosen)
+        if picks_left == 0:
+            removed = tuple(pool[chosen].tolist())
+            scores = shifted_scores(shift)
+            new_ranks = _new_target_ranks(tables, target_ranks, removed, adjust_ranks)
+            new_target_ids = _new_target_ids(tables, scores, removed, target_ids, new_ranks)
+            if target_changed(scores, target_ids, new_target_ids, removed, strict):
+                yield removed, tuple(new_target_ids)
+            return
+        if not can_violate(chosen, shift, start, picks_left):
+            return
+        for j in range(start, n_pool - picks_left + 1):
+            size = comb(n_pool - j - 1, picks_left - 1)
+            if first_index >= range_stop:
+                return
+            if first_index + size > range_start:
+                # Ballots on which pool[j] is ranked above each candidate move that candidate up one more
+                child_shift = shift + (positions[pool[j]][None, :] < positions)
+                yield from search(chosen + [j], child_shift, j + 1, first_index)
+            first_index += size
+
+    yield from search([], np.zeros(positions.shape, dtype=shift_dtype), 0, 0)
@@ -0,0 +1,185 @@
+import numpy as np
+
+"""
+Majority relation of an election, computed from its pairwise count matrix (see pairwise_matrix.py).
+
+The majority graph has an edge a -> b when more ballots put a above b than b above a; pairs with equal
+counts have no edge. Condorcet cycles are the directed cycles of this graph. A cycle never leaves a
+strongly connected component (SCC), and elections are close to transitive, so the components are small
+and the cycle search only runs inside them.
+"""
+
+
+def majority_graph(pairwise):
+    """
+    Boolean adjacency matrix of the strict majority relation.
+
+    Args:
+        pairwise (np.ndarray): candidates x candidates count matrix, [a, b] = ballots ranking a above b
+
+    Returns:
+        np.ndarray: bool matrix, [a, b] True when a beats b head to head
+    """
+    return pairwise > pairwise.T
+
+
+def reachability(graph):
+    """[a, b] True when b can be reached from a along graph edges (every node reaches itself)."""
+    reach = graph | np.eye(len(graph), dtype=bool)
+    # Square the relation until it stops growing: log2(candidates) boolean matrix products
+    while True:
+        grown = (reach.astype(np.int32) @ reach.astype(np.int32)) > 0
+        if np.array_equal(grown, reach):
+            return reach
+        reach = grown
+
+
+def strongly_connected_components(graph):
+    """
+    Strongly connected components of a graph.
+
+    Returns:
+        list: one sorted id array per component, ordered by their smallest id
+    """
+    reach = reachability(graph)
+    mutual = reach & reach.T
+    # Label every node with the smallest node of its component
+    labels = np.argmax(mutual, axis=1)
+    return [np.flatnonzero(labels == label) for label in np.unique(labels)]
+
+
+def _distances_to(graph, nodes, target):
+    # Number of edges of the shortest path from every node to target, moving only through `nodes`
+    dist = np.full(len(graph), len(graph) + 1, dtype=np.intp)
+    dist[target] = 0
+    allowed = np.zeros(len(graph), dtype=bool)
+    allowed[nodes] = True
+    frontier = np.zeros(len(graph), dtype=bool)
+    frontier[target] = True
+    step = 0
+    while frontier.any():
+        step += 1
+        # Predecessors of the frontier that have no distance yet
+        frontier = graph[:, frontier].any(axis=1) & allowed & (dist > step)
+        dist[frontier] = step
+    return dist
+
+
+def iter_cycles(graph, cycle_size):
+    """
+    Every simple directed cycle with `cycle_size` nodes, each one once, in every orientation present
+    in the graph (not only the one following the sorted names).
+
+    A cycle is reported starting at its smallest id. For every possible start, the search is limited
+    to the larger ids in the start's component, and a path is only extended to a node that can still
+    get back to the start within the remaining number of steps.
+
+    Args:
+        graph (np.ndarray): bool adjacency matrix, e.g. majority_graph(pairwise)
+        cycle_size (int): number of nodes on the cycle (at least 3)
+
+    Yields:
+        tuple: node ids along the cycle, smallest first; the last node points back to the first
+    """
+    for component in strongly_connected_components(graph):
+        if len(component) < cycle_size:
+            continue
+        for i, start in enumerate(component):
+            # Cycles through start that use only start and larger ids stay in one component of that subgraph
+            candidates = component[i:]
+            sub = graph[np.ix_(candidates, candidates)]
+            reach = reachability(sub)
+            nodes = candidates[reach[0] & reach[:, 0]]
+            if len(nodes) < cycle_size:
+                continue
+            dist = _distances_to(graph, nodes, start)
+            start = int(start)
+            nodes = nodes.tolist()
+            successors = {u: [v for v in nodes if graph[u, v] and v != start] for u in nodes}
+
+            path = [start]
+            on_path = {start}
+
+            def extend(u):
+                if len(path) == cycle_size:
+                    if graph[u, start]:
+                        yield tuple(path)
+                    return
+                steps_left = cycle_size - len(path)
+                for v in successors[u]:
+                    if v in on_path or dist[v] > steps_left:
+                        continue
+                    path.append(v)
+                    on_path.add(v)
+                    yield from extend(v)
+                    path.pop()
+                    on_path.discard(v)
+
+            yield from extend(start)
+
+
+def find_cycles(graph, cycle_size):
+    """All cycles of iter_cycles as a list."""
+    return list(iter_cycles(graph, cycle_size))
+
+
+def count_cycles(graph, cycle_size):
+    """Number of simple directed cycles with `cycle_size` nodes, without storing them."""
+    return sum(1 for _ in iter_cycles(graph, cycle_size))
+
+
+def condorcet_winner(graph):
+    """Id of the candidate who beats every other candidate head to head, or None."""
+    winners = np.flatnonzero(graph.sum(axis=1) == len(graph) - 1)
+    return int(winners[0]) if len(winners) else None
+
+
+def condorcet_loser(graph):
+    """Id of the candidate who loses to every other candidate head to head, or None."""
+    losers = np.flatnonzero(graph.sum(axis=0) == len(graph) - 1)
+    return int(losers[0]) if len(losers) else None
+
+
+def smith_set(pairwise):
+    """
+    Smith set: the smallest non-empty set of candidates that each beat every candidate outside it.
+    No outside candidate beats or ties a member, so these are the candidates that reach every other
+    candidate along "beats or ties" edges.
+
+    Args:
+        pairwise (np.ndarray): candidates x candidates count matrix
+
+    Returns:
+        np.ndarray: sorted candidate ids
+    """
+    weak = pairwise >= pairwise.T
+    return np.flatnonzero(reachability(weak).all(axis=1))
+
+
+def schwartz_set(graph):
+    """
+    Schwartz set: union of the smallest sets that no outside candidate beats, i.e. the strongly
+    connected components of the majority graph without incoming edges. A candidate is in it when
+    every candidate that reaches it along majority edges is also reached by it.
+
+    Returns:
+        np.ndarray: sorted candidate ids
+    """
+    reach = reachability(graph)
+    return np.flatnonzero((~reach.T | reach).all(axis=1))
+
+
+def majority_sets(pairwise):
+    """
+    Condorcet winner, Condorcet loser, Smith set and Schwartz set of one election from its pairwise matrix.
+
+    Returns:
+        dict: 'Condorcet Winner' and 'Condorcet Loser' (id or None), 'Smith Set' and 'Schwartz Set' (id arrays)
+    """
+    graph = majority_graph(pairwise)
+    return {
+        'Condorcet Winner': condorcet_winner(graph),
+        'Condorcet Loser': condorcet_loser(graph),
+        'Smith Set': smith_set(pairwise),
+        'Schwartz Set': schwartz_set(graph),
+    }
@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+from fractions import Fraction
+
+"""
+Which candidates can win an election under some positional (scoring) rule, computed exactly.
+
+A positional rule gives w_1 >= w_2 >= ... >= w_L >= 0 points to the positions of a ballot, and a candidate's
+score is counts[c] @ w with the candidates x positions count table of the election. Writing the weights as
+w_p = d_p + d_(p+1) + ... + d_L with d >= 0, the rule is a mix of "top-j approval" rules and the score is
+cumulative[c] @ d, where cumulative[c, j] = number of ballots ranking c in the top j + 1 positions.
+
+Candidate x wins under the rules of the cone {d >= 0 : (cumulative[x] - cumulative[y]) @ d > 0 for every y},
+one half-space per opponent (winning_region). Whether the cone is empty is a zero-sum matrix game: with d on
+the simplex (top weight 1), x can win iff max_d min_y (cumulative[x] - cumulative[y]) @ d > 0. The game is
+solved as one small linear program, exactly in rationals, so the answer does not depend on a weight grid
+(which grows exponentially with the ballot length, 10 for the MVP vote and 25 for the AP poll).
+
+Most candidates are settled by vectorized checks over all candidates at once: a candidate whose cumulative
+counts are matched or beaten everywhere by another candidate cannot win, and a candidate that wins a top-j
+approval rule can. Only the remaining ones need the LP.
+"""
+
+
+def cumulative_counts(election):
+    """(candidates x positions) int table: [c, j] = ballots ranking c in the top j + 1 positions."""
+    return np.cumsum(election.position_counts(), axis=1)
+
+
+def winning_region(election, candidate):
+    """
+    Half-space representation of the weight vectors under which `candidate` wins.
+
+    Returns:
+        tuple: (H, n_strict) with H an int matrix over the weight vector w (positions): the candidate wins
+            under w iff H[:n_strict] @ w > 0 (it beats every other candidate) and H[n_strict:] @ w >= 0
+            (the weights are non-increasing and non-negative)
+    """
+    counts = election.position_counts().astype(np.int64)
+    length = counts.shape[1]
+    beats = counts[candidate][None, :] - np.delete(counts, candidate, axis=0)
+    # w_p - w_(p+1) >= 0 and w_L >= 0
+    monotone = np.eye(length, dtype=np.int64) - np.eye(length, k=1, dtype=np.int64)
+    return np.vstack([beats, monotone]), len(beats)
+
+
+def _max_sum_packing(payoff):
+    """
+    max sum(y) s.t. payoff.T @ y <= 1, y >= 0 for a strictly positive integer matrix (opponents x positions),
+    by the simplex method on a Fraction tableau with Bland's rule (the slack basis is feasible, no phase 1).
+
+    Returns:
+        tuple: (optimal value, dual solution z over the positions), both as Fractions
+    """
+    m, n = payoff.shape
+    # One row per position constraint: [payoff[:, j] | slack e_j | rhs 1]
+    rows = [[Fraction(int(v)) for v in payoff[:, j]] + [Fraction(int(j == k)) for k in range(n)] + [Fraction(1)]
+            for j in range(n)]
+    objective = [Fraction(-1)] * m + [Fraction(0)] * (n + 1)
+    basis = list(range(m, m + n))
+
+    while True:
+        entering = next((k for k in range(m + n) if objective[k] < 0), None)
+        if entering is None:
+            break
+        # Positive payoffs bound every column, so some row always limits the entering variable
+        candidates = [(rows[r][-1] / rows[r][entering], basis[r], r) for r in range(n) if rows[r][entering] > 0]
+        _, _, leaving = min(candidates)
+        pivot = rows[leaving][entering]
+        rows[leaving] = [v / pivot for v in rows[leaving]]
+        for r in range(n):
+            factor = rows[r][entering]
+            if r != leaving and factor:
+                rows[r] = [v - factor * p for v, p in zip(rows[r], rows[leaving])]
+        factor = objective[entering]
+        objective = [v - factor * p for v, p in zip(objective, rows[leaving])]
+        basis[leaving] = entering
+
+    return objective[-1], objective[m:m + n]
+
+
+def best_rule(cumulative, candidate):
+    """
+    Weights maximizing the candidate's smallest lead over every other candidate, top weight 1.
+
+    Returns:
+        tuple: (margin, weights) as Fractions; the candidate can win iff margin > 0,
+            and can at best tie for the win iff margin == 0
+    """
+    lead = cumulative[candidate][None, :] - np.delete(cumulative, candidate, axis=0)
+    if len(lead) == 0:
+        return Fraction(1), [Fraction(1)] + [Fraction(0)] * (cumulative.shape[1] - 1)
+    # Shift the game to positive payoffs: max_d min_y (lead + K) @ d = value + K for d on the simplex
+    shift = int(np.abs(lead).max()) + 1
+    total, z = _max_sum_packing(lead + shift)
+    game_value = 1 / total
+    d = [value * game_value for value in z]
+    weights = [sum(d[p:], Fraction(0)) for p in range(len(d))]
+    return game_value - shift, weights
+
+
+def possible_winners(election, margins=False):
+    """
+    For every candidate: can some non-increasing, non-negative scoring vector make it the sole winner,
+    with one such vector (top weight 1) as a witness.
+
+    Args:
+        election (Election): election from ballot_store
+        margins (bool): also solve the LP for the candidates settled by the vectorized checks, and report
+            every undominated candidate's best lead (points per ballot) with the weights achieving it
+
+    Returns:
+        DataFrame: columns Candidate, Can-Win, Weights (empty when the candidate cannot win)
+            and with margins, Margin (NaN for dominated candidates), in candidate id order
+    """
+    cumulative = cumulative_counts(election).astype(np.int64)
+    length = cumulative.shape[1]
+
+    # Matched or beaten at every cut-off by another candidate: no rule lets the candidate win outright
+    covered = (cumulative[None, :, :] >= cumulative[:, None, :]).all(axis=2)   # [x, y]: y covers x
+    np.fill_diagonal(covered, False)
+    dominated = covered.any(axis=1)
+    # Sole leader of a top-j approval count: that rule (1 point for each of the top j positions) makes it win
+    leaders = cumulative == cumulative.max(axis=0)
+    sole_leader = leaders & (leaders.sum(axis=0) == 1)
+
+    rows = []
+    for candidate in range(len(cumulative)):
+        row = {'Candidate': election.names[candidate], 'Can-Win': False, 'Weights': ''}
+        if dominated[candidate]:
+            if margins:
+                row['Margin'] = np.nan
+        elif sole_leader[candidate].any() and not margins:
+            top_j = int(np.argmax(sole_leader[candidate])) + 1
+            row.update({'Can-Win': True, 'Weights': '-'.join(['1'] * top_j + ['0'] * (length - top_j))})
+        else:
+            margin, weights = best_rule(cumulative, candidate)
+            if margin > 0:
+                row.update({'Can-Win': True, 'Weights': '-'.join(str(w) for w in weights)})
+            if margins:
+                row['Margin'] = float(margin) / max(election.n_voters, 1)
+        rows.append(row)
+    return pd.DataFrame(rows)
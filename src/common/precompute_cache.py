@@ -0,0 +1,158 @@
+import os
+import hashlib
+import pickle
+import tempfile
+
+"""
+Persistent cache for per-election precomputations (removal tables, pairwise matrices, ...).
+
+An entry is keyed on
+    - a namespace naming what is cached (e.g. 'poll_removal_tables'),
+    - the algorithm version of the code that computes it, bumped whenever the cached object changes,
+    - the SHA-256 of the bytes of every source CSV it was computed from,
+    - the remaining parameters (weights, ...),
+so fixing a ballot file or changing the algorithm simply misses the old entries instead of returning them.
+
+Entries are written to a temporary file and renamed into place, so processes of a ProcessPoolExecutor
+can read and fill the same directory at the same time without ever seeing a half-written file.
+The directory is kept under a size budget: reading an entry refreshes its modification time, and the
+least recently used entries are deleted first.
+"""
+
+CACHE_DIR = './cache'
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Only files named <namespace>-<sha256>.pkl belong to the cache (and may be evicted)
+ENTRY_SUFFIX = '.pkl'
+DIGEST_LENGTH = 64
+
+# Digest of every source file seen by this process, keyed on (path, size, mtime) so edits are noticed
+_file_digests = {}
+
+
+def file_digest(path):
+    """SHA-256 hex digest of the bytes of a file, computed once per process and file version."""
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if memo_key not in _file_digests:
+        with open(path, 'rb') as f:
+            _file_digests[memo_key] = hashlib.sha256(f.read()).hexdigest()
+    return _file_digests[memo_key]
+
+
+def _is_entry(filename):
+    stem = filename[:-len(ENTRY_SUFFIX)]
+    return filename.endswith(ENTRY_SUFFIX) and '-' in stem and len(stem.rsplit('-', 1)[1]) == DIGEST_LENGTH
+
+
+class PrecomputeCache:
+    """
+    Content-addressed pickle cache with LRU eviction.
+
+    Args:
+        cache_dir (str): directory holding the entries, created if needed
+        max_bytes (int): size budget of all entries together
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def entry_path(self, namespace, version, sources, params=()):
+        """
+        File of the entry for these inputs.
+
+        Args:
+            namespace (str): what is cached
+            version (int): algorithm version of the cached object
+            sources (list): paths of the input files; their contents are part of the key
+            params: any other inputs, hashed through their repr()
+        """
+        digest = hashlib.sha256()
+        digest.update(f'{namespace}|{version}|{params!r}'.encode())
+        for path in sources:
+            digest.update(file_digest(path).encode())
+        return os.path.join(self.cache_dir, f'{namespace}-{digest.hexdigest()}{ENTRY_SUFFIX}')
+
+    def get(self, path):
+        """
+        Cached object stored at `path`.
+
+        Raises:
+            KeyError: when there is no usable entry (missing, evicted meanwhile or unreadable)
+        """
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            raise KeyError(path)
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            # Left by an older version of the code: drop it and recompute
+            self._remove(path)
+            raise KeyError(path)
+        # Mark as recently used
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return value
+
+    def put(self, path, value):
+        """Store `value` at `path` atomically, then evict entries over the size budget."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+        self.evict()
+
+    def get_or_compute(self, namespace, version, sources, params, compute):
+        """
+        Cached result for the inputs, or compute() stored under them.
+
+        Args:
+            see entry_path
+            compute (callable): builds the object when it is not cached
+        """
+        path = self.entry_path(namespace, version, sources, params)
+        try:
+            return self.get(path)
+        except KeyError:
+            value = compute()
+            self.put(path, value)
+            return value
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        for filename in os.listdir(self.cache_dir):
+            if not _is_entry(filename):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, filename))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, filename))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, filename in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(os.path.join(self.cache_dir, filename))
+            total -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def cached(namespace, version, sources, params, compute, cache_dir=CACHE_DIR):
+    """Shortcut for PrecomputeCache(cache_dir).get_or_compute(...)."""
+    return PrecomputeCache(cache_dir).get_or_compute(namespace, version, sources, params, compute)
@@ -0,0 +1,185 @@
+import os
+import csv
+import ast
+import heapq
+import queue
+import shutil
+import tempfile
+import pandas as pd
+
+"""
+Streaming writer for the IIA scanners' result rows.
+
+Pool workers send their rows in small batches through a queue (send_records) while they are still
+searching, and the parent feeds every batch into an ExternalSortCSV as it arrives (receive_records).
+The sink keeps at most chunk_rows rows in memory: a full chunk is sorted and spilled to a temporary
+run file, and close() merges the sorted runs into the final CSV (external merge sort). Memory therefore
+stays flat however many violations are found.
+
+Rows with equal sort keys come out in submission order (task, then row within the task), whatever order the
+batches arrived in: every chunk is put in that order and sorted stably, the run files carry the (task, row)
+position of each row, and the merge compares (key, task, row). The output is therefore the same whether or
+not the sink spilled, and the same from run to run.
+"""
+
+# Rows held in memory by the sink before a sorted run is spilled to disk
+CHUNK_ROWS = 200_000
+# Rows per queue message sent by a worker
+BATCH_ROWS = 1_000
+# Leading columns of the run files: submission position of every row, dropped from the output
+POSITION_COLUMNS = ['_task', '_row']
+
+
+def _parse(value):
+    # Run files hold the CSV text; tuples and numbers are compared as the objects they were written from
+    try:
+        return ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return value
+
+
+class ExternalSortCSV:
+    """
+    CSV sink sorted on one column, with bounded memory.
+
+    Args:
+        output_path (str): final CSV file, written by close()
+        sort_key (str): column to sort by
+        ascending (bool): sort direction (the scanners sort descending)
+        chunk_rows (int): rows kept in memory before a sorted run is spilled
+    """
+
+    def __init__(self, output_path, sort_key, ascending=False, chunk_rows=CHUNK_ROWS):
+        self.output_path = output_path
+        self.sort_key = sort_key
+        self.ascending = ascending
+        self.chunk_rows = chunk_rows
+        self.n_rows = 0
+        self._buffer = []   # (task, row, record)
+        self._runs = []
+        self._run_dir = None
+
+    def add(self, records, task=0, start=0):
+        """
+        Add rows (dicts with the same keys). `task` and `start` give the position of the first row
+        in submission order, which decides the order of rows with equal sort keys.
+        """
+        for offset, record in enumerate(records):
+            self._buffer.append((task, start + offset, record))
+            if len(self._buffer) >= self.chunk_rows:
+                self._spill()
+
+    def _sorted_chunk(self, with_position=False):
+        # Submission order first, then a stable sort, so equal keys keep their (task, row) order
+        self._buffer.sort(key=lambda item: item[:2])
+        df = pd.DataFrame([record for _, _, record in self._buffer])
+        if with_position:
+            positions = pd.DataFrame([item[:2] for item in self._buffer], columns=POSITION_COLUMNS)
+            df = pd.concat([positions, df], axis=1)
+        self.n_rows += len(df)
+        self._buffer = []
+        return df.sort_values(by=self.sort_key, ascending=self.ascending, kind='stable')
+
+    def _spill(self):
+        if self._run_dir is None:
+            self._run_dir = tempfile.mkdtemp(prefix='iia_runs_', dir=os.path.dirname(os.path.abspath(self.output_path)))
+        path = os.path.join(self._run_dir, f'run_{len(self._runs)}.csv')
+        self._sorted_chunk(with_position=True).to_csv(path, index=False)
+        self._runs.append(path)
+
+    def close(self):
+        """
+        Write the output file. Nothing is written when no row was added.
+
+        Returns:
+            int: number of rows written
+        """
+        try:
+            if not self._runs:
+                if self._buffer:
+                    self._sorted_chunk().to_csv(self.output_path, index=False)
+                return self.n_rows
+            if self._buffer:
+                self._spill()
+            self._merge_runs()
+            return self.n_rows
+        finally:
+            self.discard()
+
+    def _merge_runs(self):
+        files = [open(path, newline='') for path in self._runs]
+        try:
+            readers = [csv.reader(f) for f in files]
+            header = [next(reader) for reader in readers][0]
+            key_column = header.index(self.sort_key)
+            n_position = len(POSITION_COLUMNS)
+
+            # Equal keys are ordered by (task, row) in both directions; with reverse the position is negated
+            sign = 1 if self.ascending else -1
+            def merge_key(row):
+                return _parse(row[key_column]), sign * int(row[0]), sign * int(row[1])
+
+            merged = heapq.merge(*readers, key=merge_key, reverse=not self.ascending)
+            with open(self.output_path, 'w', newline='') as out:
+                writer = csv.writer(out, lineterminator='\n')
+                writer.writerow(header[n_position:])
+                writer.writerows(row[n_position:] for row in merged)
+        finally:
+            for f in files:
+                f.close()
+
+    def discard(self):
+        """Remove the temporary runs."""
+        if self._run_dir is not None:
+            shutil.rmtree(self._run_dir, ignore_errors=True)
+            self._run_dir = None
+        self._runs = []
+        self._buffer = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is not None:
+            self.discard()
+
+
+def send_records(result_queue, task, records, batch_rows=BATCH_ROWS):
+    """
+    Worker side: send the rows of an iterable in batches of (task, start, rows) as they are produced.
+
+    Returns:
+        int: number of rows sent
+    """
+    batch, sent = [], 0
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_rows:
+            result_queue.put((task, sent, batch))
+            sent += len(batch)
+            batch = []
+    if batch:
+        result_queue.put((task, sent, batch))
+        sent += len(batch)
+    return sent
+
+
+def receive_records(result_queue, sink, futures, poll_seconds=0.1):
+    """
+    Parent side: move batches from the queue into the sink until every future is done and the queue is
+    drained. A worker's batches are all queued before its future completes.
+    """
+    while True:
+        try:
+            task, start, records = result_queue.get(timeout=poll_seconds)
+            sink.add(records, task, start)
+        except queue.Empty:
+            if all(future.done() for future in futures):
+                break
+    # Anything still queued after the last future finished
+    while True:
+        try:
+            task, start, records = result_queue.get_nowait()
+        except queue.Empty:
+            return
+        sink.add(records, task, start)
@@ -0,0 +1,187 @@
+import numpy as np
+import pandas as pd
+from itertools import combinations_with_replacement
+from ballot_store import EMPTY
+from borda_scoring import borda_scores, exact_weight_matrix, exact_fraction, first_seen_order
+
+"""
+Weight-scheme sweeps for scoring-reversal studies (see the Benoit scoring-reversals paper in `relevant files/`).
+
+A family of weight vectors (geometric decay, every monotone integer vector up to a bound, ...) is stacked
+into one (schemes x positions) matrix and applied to the position-count table of an election in a single
+matrix multiply, so thousands of schemes cost one call per election. Every scheme is then ranked with the
+same tie-break as the results folders and compared with a reference scheme (the official one): which
+schemes elect another winner, and which change the top k. As for the strict IIA check
+(iia_engine.target_changed), a slot only counts as changed when the candidate now found there has
+different points from the reference candidate it displaced: an exact tie broken the other way is no reversal.
+"""
+
+
+def geometric_schemes(ratios, length):
+    """
+    Geometric decay: weights 1, r, r^2, ... over `length` positions, one scheme per ratio.
+    r = 1 gives every ranked position 1 point, r -> 0 approaches plurality.
+    Ratios are read as exact fractions (0.37 -> 37/100, see borda_scoring.exact_fraction) and the weights are
+    kept as Fractions: r^9 scaled to integers overflows int64, and float sums would turn exact ties into
+    near-ties that rank either way.
+
+    Returns:
+        tuple: (scheme names, object schemes x length matrix of Fractions)
+    """
+    fractions = [exact_fraction(r) for r in ratios]
+    matrix = np.array([[r ** i for i in range(length)] for r in fractions], dtype=object).reshape(-1, length)
+    return [f'geometric-{float(r):g}' for r in fractions], matrix
+
+
+def monotone_integer_schemes(length, bound):
+    """
+    Every non-increasing integer weight vector over `length` positions with weights in 0..bound
+    and a positive first weight (C(bound + length, length) - 1 schemes).
+
+    Returns:
+        tuple: (scheme names such as '3-2-2-1-0', int64 schemes x length matrix)
+    """
+    rows = [weights for weights in combinations_with_replacement(range(bound, -1, -1), length) if weights[0] > 0]
+    return ['-'.join(map(str, weights)) for weights in rows], np.array(rows, dtype=np.int64).reshape(-1, length)
+
+
+def truncated_borda_schemes(length):
+    """Borda over the top k positions (k, k-1, ..., 1, 0, ...), one scheme per k in 1..length."""
+    matrix = np.clip(np.arange(1, length + 1)[:, None] - np.arange(length)[None, :], 0, None)
+    return [f'top{k}' for k in range(1, length + 1)], matrix.astype(np.int64)
+
+
+def _fit(matrix, ballot_length):
+    # Pad with 0 points or cut the schemes to the ballot length, like weight_matrix
+    fitted = np.zeros((len(matrix), ballot_length), dtype=matrix.dtype)
+    width = min(ballot_length, matrix.shape[1])
+    fitted[:, :width] = matrix[:, :width]
+    return fitted
+
+
+def _exact_keys(scores):
+    # Exact (object) scores as int64 keys with the same order, equalities and signs, which lexsort can rank
+    values, inverse = np.unique(scores, return_inverse=True)
+    inverse = inverse.reshape(scores.shape)
+    positive, negative = (values > 0)[inverse], (values < 0)[inverse]
+    return np.where(positive, inverse + 1, np.where(negative, inverse - len(values), 0)).astype(np.int64)
+
+
+def sweep_rankings(election, weights, by_position=False):
+    """
+    Score and rank an election under a stack of weight schemes at once.
+
+    Args:
+        election (Election): election from ballot_store
+        weights (np.ndarray): schemes x positions weight matrix; an object matrix of Fractions
+            (geometric_schemes) is scored exactly
+        by_position (bool): tie-break order, see borda_scoring.first_seen_order (True for college polls)
+
+    Returns:
+        tuple: ((schemes x candidates) scores, (schemes x candidates) candidate ids in ranking order).
+            For exact weights the scores are int64 keys ordered and tied like the exact points
+    """
+    scores = borda_scores(election, _fit(np.asarray(weights), election.ballot_length))
+    if scores.dtype == object:
+        scores = _exact_keys(scores)
+    return scores, rank_rows(election, scores, by_position)
+
+
+def rank_rows(election, scores, by_position=False):
+    """
+    Rank every row of a (rows x candidates) score matrix: (rows x candidates) candidate ids in ranking order,
+    ties broken by first_seen_order of the election.
+    """
+    tiebreak = first_seen_order(election, by_position)
+    # One lexsort per row on (score, tie-break position), as borda_scoring.ranking_order does for one scheme
+    tie_position = np.broadcast_to(np.arange(len(tiebreak)), (len(scores), len(tiebreak)))
+    return tiebreak[np.lexsort((tie_position, -scores[:, tiebreak]), axis=-1)]
+
+
+def top_k_changes(election, scores, order, top_k=1, strict=True):
+    """
+    Winner and top k of every row of a ranked score matrix (see sweep_rankings) compared with row 0,
+    the reference. Candidates with 0 points are left out of the top k, as in the comparator.
+
+    With strict, a slot of a row only changes when the candidate found there has different points, in that
+    row, from the reference candidate of the slot (tied candidates share the slot, whichever one the
+    tie-break lists), and an unchanged slot lists the reference candidate; the changed slots list the rest of
+    the row's top k in ranking order, so every slot keeps its points. Without strict the tie-broken candidate
+    ids are compared and listed.
+
+    Returns:
+        DataFrame: one row per score row after the reference, columns Winner, Top-k, Winner-Changed, Top-k-Changed
+    """
+    top = order[:, :top_k].copy()
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    if strict:
+        # Points of the reference top k in every row; equal points in a slot mean no change
+        reference = order[0, :top_k]
+        changed = top_scores[1:] != scores[1:, reference]
+        top[1:] = _strict_slots(top[1:], reference, changed)
+    else:
+        changed = top[1:] != top[0][None, :]
+    top[top_scores <= 0] = EMPTY
+    top = top[1:]
+
+    def decode(ids):
+        return ', '.join(election.names[i] for i in ids if i != EMPTY)
+
+    return pd.DataFrame({
+        'Winner': [decode(row[:1]) for row in top],
+        f'Top-{top_k}': [decode(row) for row in top],
+        'Winner-Changed': changed[:, 0],
+        f'Top-{top_k}-Changed': changed.any(axis=1),
+    })
+
+
+def _strict_slots(top, reference, changed):
+    # Reference candidate in every unchanged slot, the other candidates of the row's top k in the changed ones.
+    # A reference candidate outside the row's top k ties with its slot, which is then the row's last tied
+    # group, so dropping the surplus from the end of the row keeps the points of every slot
+    shown = ((top[:, :, None] == reference[None, None, :]) & ~changed[:, None, :]).any(axis=2)
+    rest = np.take_along_axis(top, np.argsort(shown, axis=1, kind='stable'), axis=1)
+    fill = np.take_along_axis(rest, np.maximum(np.cumsum(changed, axis=1) - 1, 0), axis=1)
+    return np.where(changed, fill, reference[None, :])
+
+
+def scheme_sweep(election, names, weights, reference, top_k=1, by_position=False, strict=True):
+    """
+    Compare every scheme of a family with a reference scheme on one election.
+
+    Args:
+        election (Election): election from ballot_store
+        names (list): scheme names, one per row of `weights`
+        weights (np.ndarray): schemes x positions weight matrix (e.g. from geometric_schemes)
+        reference (list): weight list of the reference scheme, e.g. MVP_SCHEMES['14-9-8--1']
+        top_k (int): size of the top group compared besides the winner
+        by_position (bool): tie-break order, see sweep_rankings
+        strict (bool): ignore changes that only come from how a tie is broken, see top_k_changes
+
+    Returns:
+        DataFrame: one row per scheme with its winner and top k (candidates with 0 points are left out,
+            as in the comparator) and whether they differ from the reference scheme's
+    """
+    reference_matrix, _ = exact_weight_matrix(reference, election.ballot_length)
+    weights = _fit(np.asarray(weights), election.ballot_length)
+    # The reference is row 0 of the batch (scaled to integers, which does not change its ranking)
+    stacked = np.vstack([reference_matrix.astype(weights.dtype), weights])
+    scores, order = sweep_rankings(election, stacked, by_position)
+    changes = top_k_changes(election, scores, order, top_k, strict)
+    changes.insert(0, 'Scheme', list(names))
+    return changes
+
+
+def reversal_summary(sweep, top_k=1):
+    """
+    Condense a scheme_sweep table: number of schemes, how many change the winner and the top k,
+    and every other winner with the number of schemes electing it.
+    """
+    changed = sweep[sweep['Winner-Changed']]
+    other_winners = changed['Winner'].value_counts()
+    return {
+        'Schemes': len(sweep),
+        'Winner-Changes': int(sweep['Winner-Changed'].sum()),
+        f'Top-{top_k}-Changes': int(sweep[f'Top-{top_k}-Changed'].sum()),
+        'Other-Winners': ', '.join(f'{winner} ({count})' for winner, count in other_winners.items()),
+    }
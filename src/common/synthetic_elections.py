@@ -0,0 +1,253 @@
+import os
+import argparse
+import numpy as np
+import pandas as pd
+from numpy.lib.format import open_memmap
+from ballot_store import Election, EMPTY, MVP_RANK_COLUMNS, POLL_RANK_COLUMNS
+from ballot_archive import INDEX_COLUMNS, _encode_key
+
+"""
+Seeded synthetic elections for load and stress tests, in the layouts of the real data.
+
+Three ballot models, every one drawn for a whole block of voters at once:
+    - impartial: impartial culture, every ranking equally likely (argsort of uniform random keys)
+    - mallows: Mallows model around the reference order (candidate 1 first) with dispersion phi
+      (0 = everybody votes the reference order, 1 = impartial), by repeated insertion; insertions only push
+      candidates down, so only the top ballot_length slots are kept
+    - plackett-luce: Plackett-Luce with strength (c + 1) ** -alpha for candidate c, by the Gumbel-max trick
+      (argsort of log-strength plus Gumbel noise)
+A ballot lists its top ballot_length candidates; slots beyond the number of candidates stay blank.
+
+Voters are drawn in blocks of BLOCK_VOTERS, block b with the generator seeded with (seed, b), so the same
+seed always gives the same ballots however they are written. The writers stream block by block:
+    - write_mvp_csv, write_poll_csv: the CSV layouts of mvp_ballots_by_year and ballot_data_by_season_and_week,
+      readable by ballot_store.read_mvp_election / read_poll_election with path=...
+    - write_columnar: the .npy columns of ballot_archive.py (ballots written into a memory-mapped file),
+      readable by BallotArchive(archive_dir)
+
+Run `python src/common/synthetic_elections.py --help` from the repository root for the command line.
+"""
+
+SYNTHETIC_DIR = './data/synthetic'
+MODELS = ('impartial', 'mallows', 'plackett-luce')
+
+# Voters drawn from one random stream
+BLOCK_VOTERS = 4096
+
+
+def candidate_names(n_candidates, prefix='Candidate'):
+    """'Candidate 001', 'Candidate 002', ... (zero-padded, so alphabetical order = candidate id order)."""
+    width = len(str(n_candidates))
+    return [f'{prefix} {i:0{width}d}' for i in range(1, n_candidates + 1)]
+
+
+def _impartial(rng, n_voters, n_candidates, length):
+    return np.argsort(rng.random((n_voters, n_candidates)), axis=1)[:, :length]
+
+
+def _plackett_luce(rng, n_voters, n_candidates, length, alpha):
+    log_strength = -alpha * np.log(np.arange(1, n_candidates + 1))
+    keys = log_strength + rng.gumbel(size=(n_voters, n_candidates))
+    return np.argsort(-keys, axis=1)[:, :length]
+
+
+def _mallows(rng, n_voters, n_candidates, length, phi):
+    top = np.full((n_voters, length), EMPTY, dtype=np.int16)
+    columns = np.arange(length)[None, :]
+    for i in range(n_candidates):
+        # Candidate i is inserted d places above the bottom of the i + 1 slots, P(d) proportional to phi ** d
+        u = rng.random(n_voters)
+        if phi == 0:
+            d = np.zeros(n_voters, dtype=np.intp)
+        elif phi == 1:
+            d = np.floor(u * (i + 1)).astype(np.intp)
+        else:
+            d = np.floor(np.log1p(-u * (1 - phi ** (i + 1))) / np.log(phi)).astype(np.intp)
+        position = (i - np.minimum(d, i))[:, None]
+        shifted = np.empty_like(top)
+        shifted[:, 1:] = top[:, :-1]
+        top = np.where(columns < position, top, np.where(columns == position, np.int16(i), shifted))
+    return top
+
+
+def iter_ballot_blocks(n_voters, n_candidates, ballot_length, model='impartial', seed=0, phi=0.8, alpha=1.0):
+    """
+    Ballots of one synthetic election, block by block.
+
+    Args:
+        n_voters (int): number of ballots
+        n_candidates (int): number of candidates (at most 32767, the ids are int16)
+        ballot_length (int): rank positions per ballot
+        model (str): one of MODELS
+        seed (int): seed of the election
+        phi (float): Mallows dispersion in [0, 1]
+        alpha (float): Plackett-Luce strength exponent (0 = impartial)
+
+    Yields:
+        np.ndarray: int16 (voters x ballot_length) candidate ids, EMPTY for blank slots, BLOCK_VOTERS rows
+            except for the last block
+    """
+    if model not in MODELS:
+        raise ValueError(f'unknown model {model!r}, expected one of {MODELS}')
+    if not 0 <= phi <= 1:
+        raise ValueError('phi must be between 0 and 1')
+    filled = min(ballot_length, n_candidates)
+    for block, start in enumerate(range(0, n_voters, BLOCK_VOTERS)):
+        rng = np.random.default_rng([seed, block])
+        size = min(BLOCK_VOTERS, n_voters - start)
+        if model == 'impartial':
+            ids = _impartial(rng, size, n_candidates, filled)
+        elif model == 'mallows':
+            ids = _mallows(rng, size, n_candidates, filled, phi)
+        else:
+            ids = _plackett_luce(rng, size, n_candidates, filled, alpha)
+        ballots = np.full((size, ballot_length), EMPTY, dtype=np.int16)
+        ballots[:, :filled] = ids
+        yield ballots
+
+
+def synthetic_election(key, n_voters, n_candidates, ballot_length, model='impartial', seed=0, **params):
+    """
+    One synthetic election in memory, as an Election (candidate names from candidate_names).
+
+    Args:
+        key (tuple): election key, e.g. (year, league) or (season, week)
+        see iter_ballot_blocks for the others; params = phi, alpha
+    """
+    blocks = list(iter_ballot_blocks(n_voters, n_candidates, ballot_length, model, seed, **params))
+    ballots = np.concatenate(blocks) if blocks else np.empty((0, ballot_length), dtype=np.int16)
+    return Election(key, candidate_names(n_candidates), candidate_names(n_voters, 'Voter'), ballots)
+
+
+def synthetic_mvp_path(year, league, root=SYNTHETIC_DIR):
+    return f'{root}/mvp_ballots_by_year/{year}_{league}_votes.csv'
+
+
+def synthetic_poll_path(year, week, root=SYNTHETIC_DIR):
+    return f'{root}/ballot_data_by_season_and_week/season_{year}/{year}_week{week}_top25.csv'
+
+
+def _write_csv(path, key_columns, voter_column, voter_info, rank_columns, n_voters, n_candidates, model, seed, params):
+    # key_columns and voter_info: (column, constant value) pairs written before and after the voter column
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Index EMPTY (-1) picks the trailing '' for blank slots
+    names = np.array(candidate_names(n_candidates) + [''], dtype=object)
+    voters = candidate_names(n_voters, 'Voter')
+    start = 0
+    with open(path, 'w', newline='') as f:
+        for ballots in iter_ballot_blocks(n_voters, n_candidates, len(rank_columns), model, seed, **params):
+            block = pd.DataFrame(names[ballots], columns=rank_columns)
+            for column, value in reversed(voter_info):
+                block.insert(0, column, value)
+            block.insert(0, voter_column, voters[start:start + len(ballots)])
+            for column, value in reversed(key_columns):
+                block.insert(0, column, value)
+            block.to_csv(f, header=start == 0, index=False)
+            start += len(ballots)
+
+
+def write_mvp_csv(year, league, n_voters, n_candidates, model='impartial', seed=0, root=SYNTHETIC_DIR, **params):
+    """
+    Stream one synthetic MVP vote to synthetic_mvp_path(year, league) in the mvp_ballots_by_year layout
+    (10 ranks). Read it back with read_mvp_election(year, league, path=synthetic_mvp_path(year, league)).
+
+    Returns:
+        str: path of the CSV
+    """
+    path = synthetic_mvp_path(year, league, root)
+    key_columns = [('Year', year), ('League', league)]
+    writer_info = [('Affiliation', 'Synthetic'), ('Chapter', '')]
+    _write_csv(path, key_columns, 'Name', writer_info, MVP_RANK_COLUMNS, n_voters, n_candidates, model, seed, params)
+    return path
+
+
+def write_poll_csv(year, week, n_voters, n_candidates, model='impartial', seed=0, root=SYNTHETIC_DIR, **params):
+    """
+    Stream one synthetic AP poll to synthetic_poll_path(year, week) in the ballot_data_by_season_and_week
+    layout (25 ranks). Read it back with read_poll_election(year, week, path=synthetic_poll_path(year, week)).
+
+    Returns:
+        str: path of the CSV
+    """
+    path = synthetic_poll_path(year, week, root)
+    key_columns = [('Season', year), ('Week', week)]
+    _write_csv(path, key_columns, 'Pollster', [], POLL_RANK_COLUMNS, n_voters, n_candidates, model, seed, params)
+    return path
+
+
+def write_columnar(kind, elections, ballot_length, model='impartial', seed=0, archive_dir=f'{SYNTHETIC_DIR}/archive',
+                   **params):
+    """
+    Write synthetic elections as the .npy columns of ballot_archive.py, ballots streamed block by block into
+    a memory-mapped file. Election number i is drawn with seed + i.
+
+    Args:
+        kind (str): 'mvp' or 'poll' (decides how the keys are stored)
+        elections (list): (key, n_voters, n_candidates) per election
+        ballot_length (int): rank positions of every ballot (one column width for the whole archive)
+        see iter_ballot_blocks for the others
+
+    Returns:
+        str: the archive directory, readable by BallotArchive(archive_dir)
+    """
+    os.makedirs(archive_dir, exist_ok=True)
+    total = sum(n_voters for _, n_voters, _ in elections)
+    ballots = open_memmap(os.path.join(archive_dir, f'{kind}_ballots.npy'), mode='w+', dtype=np.int16,
+                          shape=(total, ballot_length))
+    index = np.zeros((len(elections), len(INDEX_COLUMNS)), dtype=np.int64)
+    names, voters = [], []
+    n_ballots = 0
+
+    for row, (key, n_voters, n_candidates) in enumerate(elections):
+        start = n_ballots
+        for block in iter_ballot_blocks(n_voters, n_candidates, ballot_length, model, seed + row, **params):
+            ballots[n_ballots:n_ballots + len(block)] = block
+            n_ballots += len(block)
+        # No source CSV: size and modification time stay 0
+        index[row] = [*_encode_key(kind, key), start, n_ballots,
+                      len(names), len(names) + n_candidates, len(voters), len(voters) + n_voters, 0, 0]
+        names.extend(candidate_names(n_candidates))
+        voters.extend(candidate_names(n_voters, 'Voter'))
+
+    ballots.flush()
+    del ballots
+    np.save(os.path.join(archive_dir, f'{kind}_names.npy'), np.array(names, dtype=str))
+    np.save(os.path.join(archive_dir, f'{kind}_voters.npy'), np.array(voters, dtype=str))
+    np.save(os.path.join(archive_dir, f'{kind}_index.npy'), index)
+    return archive_dir
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Write seeded synthetic elections in the layouts of the real data.')
+    parser.add_argument('layout', choices=['mvp', 'poll', 'columnar'])
+    parser.add_argument('--model', choices=MODELS, default='impartial')
+    parser.add_argument('--voters', type=int, default=1000)
+    parser.add_argument('--candidates', type=int, default=50)
+    parser.add_argument('--length', type=int, default=25, help='rank positions (columnar only; CSVs use 10 or 25)')
+    parser.add_argument('--elections', type=int, default=1, help='number of elections (columnar only)')
+    parser.add_argument('--kind', choices=['mvp', 'poll'], default='poll', help='key layout (columnar only)')
+    parser.add_argument('--year', type=int, default=2100)
+    parser.add_argument('--league', default='AL')
+    parser.add_argument('--week', type=int, default=1)
+    parser.add_argument('--phi', type=float, default=0.8)
+    parser.add_argument('--alpha', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    params = dict(phi=args.phi, alpha=args.alpha)
+
+    if args.layout == 'mvp':
+        path = write_mvp_csv(args.year, args.league, args.voters, args.candidates, args.model, args.seed, **params)
+    elif args.layout == 'poll':
+        path = write_poll_csv(args.year, args.week, args.voters, args.candidates, args.model, args.seed, **params)
+    else:
+        if args.kind == 'mvp':
+            keys = [(args.year + i // 2, ['AL', 'NL'][i % 2]) for i in range(args.elections)]
+        else:
+            keys = [(args.year, args.week + i) for i in range(args.elections)]
+        path = write_columnar(args.kind, [(key, args.voters, args.candidates) for key in keys], args.length,
+                              args.model, args.seed, **params)
+    print(f"Synthetic elections written to {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+import numpy as np
+from ballot_store import EMPTY
+from borda_scoring import exact_weight_matrix
+from scheme_sweep import rank_rows, top_k_changes
+
+"""
+Leave-one-voter-out (jackknife) sensitivity of Borda outcomes: how much a single writer or pollster decides them.
+
+Every ballot adds its own points to the candidates it ranks, so the scores without voter v are the total
+scores minus row v of the (voters x candidates) contribution matrix. One subtraction gives the scores of
+every leave-one-out electorate, one row-wise lexsort ranks them all, and the winner and top k of every row
+are compared with the full election. No ballot file is re-read and no election is rebuilt per voter.
+
+The scores are exact integer-scaled sums (see borda_scoring.exact_weight_matrix) and ties are broken by the
+first-seen order of the full election, as for the official ranking. A voter only changes the winner or the
+top k when the candidate now in a slot has different points from the one it displaced (scheme_sweep.top_k_changes
+with strict): leaving a ballot out so that two candidates end up tied is no change.
+"""
+
+
+def ballot_contributions(election, weights):
+    """
+    Points every ballot gives every candidate, scaled to integers.
+
+    Args:
+        election (Election): election from ballot_store
+        weights (list): points per rank position
+
+    Returns:
+        np.ndarray: int64 (voters x candidates) matrix; its column sums are the Borda scores of the election
+    """
+    matrix, _ = exact_weight_matrix(weights, election.ballot_length)
+    filled = election.ballots != EMPTY
+    voter_idx, position_idx = np.nonzero(filled)
+    contributions = np.zeros((election.n_voters, election.n_candidates), dtype=np.int64)
+    # A candidate appears at most once per ballot, so plain assignment places every point
+    contributions[voter_idx, election.ballots[filled]] = matrix[0, position_idx]
+    return contributions
+
+
+def leave_one_out_scores(election, weights):
+    """
+    Scaled Borda scores with each voter's ballot removed: (voters x candidates), row v = scores without voter v.
+
+    Returns:
+        tuple: (full election scores, leave-one-out score matrix)
+    """
+    contributions = ballot_contributions(election, weights)
+    total = contributions.sum(axis=0)
+    return total, total[None, :] - contributions
+
+
+def voter_jackknife(election, weights, top_k=1, by_position=False, strict=True):
+    """
+    Winner and top k of the election with each voter left out, compared with the full election.
+
+    Args:
+        election (Election): election from ballot_store
+        weights (list): points per rank position, e.g. MVP_SCHEMES['14-9-8--1']
+        top_k (int): size of the top group compared besides the winner
+        by_position (bool): tie-break order, see borda_scoring.first_seen_order (True for college polls)
+        strict (bool): ignore changes that only come from how a tie is broken
+
+    Returns:
+        DataFrame: one row per voter, columns Voter, Winner, Top-k, Winner-Changed, Top-k-Changed
+    """
+    total, scores = leave_one_out_scores(election, weights)
+    # The full election is row 0, the reference of top_k_changes
+    stacked = np.vstack([total[None, :], scores])
+    changes = top_k_changes(election, stacked, rank_rows(election, stacked, by_position), top_k, strict)
+    changes.insert(0, 'Voter', election.voters)
+    return changes
+
+
+def pivotal_voters(jackknife, top_k=1):
+    """Rows of a voter_jackknife table whose voter changes the winner or the top k when left out."""
+    return jackknife[jackknife['Winner-Changed'] | jackknife[f'Top-{top_k}-Changed']]